@@ -0,0 +1,75 @@
+"""Scaling benchmark of the indexed attributed matching against the gsy-framework attributed one.
+
+Usage:
+    python benchmarks/attributed_matching.py --sizes 1000 --sizes 10000 --sizes 50000
+
+The order books have a single time slot, whose offers have energy types and a share of whose
+bids require trading partners or energy types. The recommendations of both algorithms are
+compared, the gsy-framework algorithm is skipped above --max-reference-orders since it checks the
+requirements of every bid against every offer.
+"""
+
+import time
+
+import click
+from gsy_framework.matching_algorithms import AttributedMatchingAlgorithm
+
+from gsy_matching_engine_sdk.matching_algorithms import IndexedAttributedMatchingAlgorithm
+from order_book_factory import add_requirements, count_orders, create_matching_data, total_energy
+
+
+def _time_algorithm(algorithm, matching_data, repetitions):
+    durations = []
+    recommendations = []
+    for _ in range(repetitions):
+        start_time = time.perf_counter()
+        recommendations = algorithm.get_matches_recommendations(matching_data)
+        durations.append(time.perf_counter() - start_time)
+    return min(durations), recommendations
+
+
+def _get_trades(recommendations):
+    return sorted((recommendation["bid"]["id"], recommendation["offer"]["id"],
+                   round(recommendation["selected_energy"], 6),
+                   round(recommendation["trade_rate"], 6))
+                  for recommendation in recommendations)
+
+
+@click.command()
+@click.option("--sizes", "-s", type=int, multiple=True, default=(1000, 10000, 50000),
+              show_default=True, help="Number of orders of the time slot of each order book")
+@click.option("--requirements-share", type=click.FloatRange(0, 1), default=0.2,
+              show_default=True, help="Share of the bids that have requirements")
+@click.option("--traders", type=int, default=200, show_default=True,
+              help="Number of sellers and of buyers of each order book")
+@click.option("--max-reference-orders", type=int, default=10000, show_default=True,
+              help="Largest order book matched with the gsy-framework algorithm")
+@click.option("--repetitions", "-r", type=int, default=3, show_default=True,
+              help="Number of runs per algorithm and size (the fastest one is reported)")
+def main(sizes, requirements_share, traders, max_reference_orders, repetitions):
+    """Report the duration and matched energy of both algorithms for each order book size."""
+    click.echo(f"{'orders':>8} {'algorithm':>20} {'seconds':>10} {'matches':>8} "
+               f"{'energy':>12} {'identical':>10}")
+    for size in sizes:
+        matching_data = add_requirements(
+            create_matching_data(size, traders_count=traders), requirements_share)
+        orders_count = count_orders(matching_data)
+        duration, recommendations = _time_algorithm(
+            IndexedAttributedMatchingAlgorithm, matching_data, repetitions)
+        click.echo(f"{orders_count:>8} {'indexed-attributed':>20} {duration:>10.4f} "
+                   f"{len(recommendations):>8} {total_energy(recommendations):>12.3f} "
+                   f"{'-':>10}")
+        if orders_count > max_reference_orders:
+            click.echo(f"{orders_count:>8} {'attributed':>20} {'skipped':>10}")
+            continue
+        reference_duration, reference_recommendations = _time_algorithm(
+            AttributedMatchingAlgorithm, matching_data, repetitions)
+        is_identical = _get_trades(recommendations) == _get_trades(reference_recommendations)
+        click.echo(f"{orders_count:>8} {'attributed':>20} {reference_duration:>10.4f} "
+                   f"{len(reference_recommendations):>8} "
+                   f"{total_energy(reference_recommendations):>12.3f} "
+                   f"{'yes' if is_identical else 'NO':>10}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
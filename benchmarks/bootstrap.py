@@ -0,0 +1,110 @@
+"""Benchmark of the time the Redis matcher takes to connect and handle its first tick.
+
+Usage:
+    python benchmarks/bootstrap.py --runs 5 --id-delay 0.2
+
+A stub of gsy-e publishes ticks on an in-process fakeredis server, either for a simulation that
+answers the simulation id request after --id-delay seconds, or for a CLI simulation that never
+answers it and publishes on the channels without simulation id. The matcher constructor returns
+right away, the ticks published before the simulation id is known are buffered.
+"""
+
+import json
+import statistics
+import threading
+import time
+
+import click
+import fakeredis
+from gsy_framework.redis_channels import MatchingEngineChannels
+
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+
+
+class _FirstTickMatcher(RedisBaseMatcher):
+    """Matcher that records when it handles its first tick."""
+
+    def __init__(self, *args, **kwargs):
+        self.first_tick = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def on_tick(self, data):
+        self.first_tick.set()
+
+    def on_offers_bids_response(self, data):
+        pass
+
+    def on_matched_recommendations_response(self, data):
+        pass
+
+
+class _StubSimulation(threading.Thread):
+    """Publish a tick every tick_interval, and answer the simulation id requests after id_delay
+    (never if simulation_id is empty, as the CLI simulations)."""
+
+    def __init__(self, server, simulation_id: str, id_delay: float, tick_interval: float):
+        super().__init__(daemon=True)
+        self.redis_db = fakeredis.FakeRedis(server=server)
+        self.simulation_id = simulation_id
+        self.id_delay = id_delay
+        self.tick_interval = tick_interval
+        self.stopped = threading.Event()
+        self.pubsub = self.redis_db.pubsub()
+        self.pubsub.subscribe(MatchingEngineChannels(None).simulation_id)
+
+    def run(self):
+        tick = json.dumps({"event": "tick", "markets_info": {}})
+        channel = MatchingEngineChannels(self.simulation_id).events
+        while not self.stopped.is_set():
+            message = self.pubsub.get_message(ignore_subscribe_messages=True)
+            if message is not None and self.simulation_id:
+                threading.Timer(self.id_delay, self.redis_db.publish, args=(
+                    MatchingEngineChannels(None).simulation_id_response,
+                    json.dumps({"simulation_id": self.simulation_id}))).start()
+            self.redis_db.publish(channel, tick)
+            time.sleep(self.tick_interval)
+
+
+def _measure(simulation_id: str, id_delay: float, tick_interval: float):
+    server = fakeredis.FakeServer()
+    simulation = _StubSimulation(server, simulation_id, id_delay, tick_interval)
+    simulation.start()
+    try:
+        start_time = time.perf_counter()
+        matcher = _FirstTickMatcher(redis_db=fakeredis.FakeRedis(server=server))
+        constructed_at = time.perf_counter()
+        matcher.wait_until_ready(timeout=60)
+        ready_at = time.perf_counter()
+        matcher.first_tick.wait(timeout=60)
+        first_tick_at = time.perf_counter()
+        matcher.pubsub_thread.stop()
+        matcher.event_dispatcher.shutdown(wait=False)
+    finally:
+        simulation.stopped.set()
+    return (constructed_at - start_time, ready_at - start_time, first_tick_at - start_time)
+
+
+@click.command()
+@click.option("--runs", type=click.IntRange(min=1), default=5, show_default=True,
+              help="Number of matchers started per scenario")
+@click.option("--id-delay", type=float, default=0.2, show_default=True,
+              help="Seconds after which the stub answers the simulation id request")
+@click.option("--tick-interval", type=float, default=0.05, show_default=True,
+              help="Seconds between the ticks published by the stub")
+def main(runs, id_delay, tick_interval):
+    """Report the median durations from the creation of the matcher to its first tick."""
+    scenarios = {
+        "simulation id answered": "simulation-1",
+        "CLI simulation": "",
+    }
+    click.echo(f"{'scenario':>24} {'constructor [ms]':>17} {'ready [ms]':>11} "
+               f"{'first tick [ms]':>16}")
+    for name, simulation_id in scenarios.items():
+        durations = [_measure(simulation_id, id_delay, tick_interval) for _ in range(runs)]
+        constructor, ready, first_tick = (
+            statistics.median(values) * 1000 for values in zip(*durations))
+        click.echo(f"{name:>24} {constructor:>17.1f} {ready:>11.1f} {first_tick:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
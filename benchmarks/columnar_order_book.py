@@ -0,0 +1,92 @@
+"""Benchmark of the columnar order book view against the dicts of the bids_offers payload.
+
+Usage:
+    python benchmarks/columnar_order_book.py --sizes 10000 --sizes 100000 --traders 100
+
+For each size, the decoded payload is matched either as it is (dict path), or after converting
+it into a ColumnarOrderBook and dropping the payload (columnar path). The retained memory is the
+memory still allocated after the matching, the peak memory is the maximum during decoding,
+conversion and matching.
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+
+import click
+
+from gsy_matching_engine_sdk.matchers.columnar_order_book import ColumnarOrderBook
+from gsy_matching_engine_sdk.matching_algorithms import VectorizedPayAsClearMatchingAlgorithm
+from order_book_factory import create_matching_data, total_energy
+
+
+def _match_dicts(payload):
+    bids_offers = json.loads(payload)
+    start_time = time.perf_counter()
+    recommendations = VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations(
+        bids_offers)
+    return bids_offers, recommendations, 0., time.perf_counter() - start_time
+
+
+def _match_columns(payload):
+    bids_offers = json.loads(payload)
+    start_time = time.perf_counter()
+    order_book = ColumnarOrderBook.from_bids_offers(bids_offers)
+    conversion_duration = time.perf_counter() - start_time
+    del bids_offers
+    start_time = time.perf_counter()
+    recommendations = VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations(
+        order_book)
+    return order_book, recommendations, conversion_duration, time.perf_counter() - start_time
+
+
+def _measure(match_function, payload):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        order_book, recommendations, conversion_duration, matching_duration = (
+            match_function(payload))
+        retained_memory, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del order_book
+    return (retained_memory, peak_memory, conversion_duration, matching_duration,
+            recommendations)
+
+
+PATHS = {
+    "dicts": _match_dicts,
+    "columns": _match_columns,
+}
+
+
+@click.command()
+@click.option("--sizes", "-s", type=int, multiple=True, default=(10000, 100000),
+              show_default=True, help="Number of orders of each benchmarked payload")
+@click.option("--time-slots", type=int, default=4, show_default=True,
+              help="Number of time slots the orders are split into")
+@click.option("--traders", type=int, default=100, show_default=True,
+              help="Number of traders posting the orders (0: one trader per order)")
+def main(sizes, time_slots, traders):
+    """Report the memory and duration of matching the payload as dicts and as columns.
+
+    The durations are measured while tracing the allocations, therefore they are only
+    comparable with each other.
+    """
+    click.echo(f"{'orders':>8} {'path':>8} {'retained MB':>12} {'peak MB':>8} "
+               f"{'convert [ms]':>13} {'match [ms]':>11} {'matches':>8} {'energy':>12}")
+    for size in sizes:
+        payload = json.dumps(create_matching_data(
+            size, time_slots_count=time_slots, traders_count=traders or None))
+        for name, match_function in PATHS.items():
+            retained_memory, peak_memory, conversion_duration, matching_duration, \
+                recommendations = _measure(match_function, payload)
+            click.echo(f"{size:>8} {name:>8} {retained_memory / 2 ** 20:>12.1f} "
+                       f"{peak_memory / 2 ** 20:>8.1f} {conversion_duration * 1000:>13.2f} "
+                       f"{matching_duration * 1000:>11.2f} {len(recommendations):>8} "
+                       f"{total_energy(recommendations):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,53 @@
+"""Benchmark of the SDK matching algorithms against the gsy-framework ones.
+
+Usage:
+    python benchmarks/matching_algorithms.py --sizes 1000 --sizes 10000 --sizes 100000
+"""
+
+import time
+
+import click
+from gsy_framework.matching_algorithms import AttributedMatchingAlgorithm
+
+from gsy_matching_engine_sdk.matching_algorithms import VectorizedPayAsClearMatchingAlgorithm
+from order_book_factory import count_orders, create_matching_data, total_energy
+
+ALGORITHMS = {
+    "attributed": AttributedMatchingAlgorithm,
+    "vectorized-pay-as-clear": VectorizedPayAsClearMatchingAlgorithm,
+}
+
+
+def _time_algorithm(algorithm, matching_data, repetitions):
+    durations = []
+    recommendations = []
+    for _ in range(repetitions):
+        start_time = time.perf_counter()
+        recommendations = algorithm.get_matches_recommendations(matching_data)
+        durations.append(time.perf_counter() - start_time)
+    return min(durations), recommendations
+
+
+@click.command()
+@click.option("--sizes", "-s", type=int, multiple=True, default=(1000, 10000, 100000),
+              show_default=True, help="Number of orders of each benchmarked order book")
+@click.option("--time-slots", type=int, default=1, show_default=True,
+              help="Number of time slots the orders are split into")
+@click.option("--repetitions", "-r", type=int, default=3, show_default=True,
+              help="Number of runs per algorithm and size (the fastest one is reported)")
+@click.option("--algorithm", "-a", "algorithm_names", type=click.Choice(list(ALGORITHMS)),
+              multiple=True, default=tuple(ALGORITHMS), help="Algorithms to benchmark")
+def main(sizes, time_slots, repetitions, algorithm_names):
+    """Report the duration and matched energy of each algorithm for each order book size."""
+    click.echo(f"{'orders':>8} {'algorithm':>24} {'seconds':>10} {'matches':>8} {'energy':>12}")
+    for size in sizes:
+        matching_data = create_matching_data(size, time_slots_count=time_slots)
+        for name in algorithm_names:
+            duration, recommendations = _time_algorithm(
+                ALGORITHMS[name], matching_data, repetitions)
+            click.echo(f"{count_orders(matching_data):>8} {name:>24} {duration:>10.4f} "
+                       f"{len(recommendations):>8} {total_energy(recommendations):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
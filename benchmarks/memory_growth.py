@@ -0,0 +1,149 @@
+"""Benchmark of the memory of a matcher across many market cycles.
+
+Usage:
+    python benchmarks/memory_growth.py --market-cycles 50 --ticks 5
+    python benchmarks/memory_growth.py --market-cycles 1000 --orders 20 --report-every 100
+
+The events of a simulation are dispatched to a RedisBaseMatcher connected to an in-process
+fakeredis server, as if they were received from gsy-e: on every market cycle the open time slots
+of the future markets shift by one slot, and the spot market is replaced by a new one (with a new
+id); on every tick the markets information is sent, followed by an offers/bids response in which
+a share of the orders of each open time slot is replaced. The memory traced by tracemalloc is
+reported every --report-every market cycles, with the number of orders in the book.
+
+A matcher with bounded memory reports a flat traced memory once the first market cycles have
+filled the open time slots, however long the simulation runs. Tracing slows the allocations
+down, mostly the ones of the stub that creates the orders.
+"""
+
+import json
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import click
+import fakeredis
+from gsy_framework.redis_channels import MatchingEngineChannels
+
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+from gsy_matching_engine_sdk.memory_report import MEBIBYTE, MemoryReport
+from order_book_factory import create_time_slot_orders
+
+FIRST_TIME_SLOT = datetime(2022, 3, 15)
+SLOT_MINUTES = 15
+CHANGES_SHARE = 0.2  # Share of the orders of each time slot replaced on every tick
+
+
+class _BenchmarkMatcher(RedisBaseMatcher):
+    """Matcher that only maintains its order book."""
+
+    def on_offers_bids_response(self, data):
+        pass
+
+
+def _get_time_slot(slot_index: int) -> str:
+    return (FIRST_TIME_SLOT + timedelta(minutes=slot_index * SLOT_MINUTES)).strftime(
+        "%Y-%m-%dT%H:%M")
+
+
+class _SimulationStub:
+    """Create the markets and orders of the events sent by a simulation."""
+
+    def __init__(self, markets_count: int, time_slots_count: int, orders_count: int):
+        self.rng = random.Random(42)
+        self.future_market_ids = [self._create_id() for _ in range(markets_count)]
+        self.time_slots_count = time_slots_count
+        self.orders_count = orders_count
+        self.spot_market_id = None
+        self.market_cycle = 0
+        self.bids_offers = {}
+
+    def _create_id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128)))
+
+    def start_market_cycle(self):
+        """Open the next time slot of the future markets, and a new spot market."""
+        self.market_cycle += 1
+        self.spot_market_id = self._create_id()
+        time_slots = [_get_time_slot(self.market_cycle + index)
+                      for index in range(self.time_slots_count)]
+        bids_offers = {market_id: {time_slot: self.bids_offers.get(market_id, {}).get(time_slot)
+                                   for time_slot in time_slots}
+                       for market_id in self.future_market_ids}
+        bids_offers[self.spot_market_id] = {_get_time_slot(self.market_cycle): None}
+        self.bids_offers = bids_offers
+
+    def get_tick(self):
+        """Return the event of a tick, listing the markets and their open time slots."""
+        markets_info = {market_id: {"type_name": "Future Market", "time_slots": list(slots)}
+                        for market_id, slots in self.bids_offers.items()}
+        markets_info[self.spot_market_id]["type_name"] = "Spot Market"
+        return {"event": "tick", "markets_info": markets_info}
+
+    def get_offers_bids_response(self):
+        """Return the response of an offers/bids request, after replacing a share of the orders.
+        """
+        for time_slot_data in self.bids_offers.values():
+            for time_slot, data in time_slot_data.items():
+                new_data = create_time_slot_orders(time_slot, self.orders_count, self.rng)
+                if data is not None:
+                    for side in ("bids", "offers"):
+                        kept_count = int(len(data[side]) * (1 - CHANGES_SHARE))
+                        new_data[side][:kept_count] = data[side][:kept_count]
+                time_slot_data[time_slot] = new_data
+        return {"event": "offers_bids_response", "bids_offers": self.bids_offers}
+
+
+@click.command()
+@click.option("--market-cycles", type=click.IntRange(min=1), default=50, show_default=True,
+              help="Number of market cycles of the simulation")
+@click.option("--ticks", type=click.IntRange(min=1), default=5, show_default=True,
+              help="Number of ticks (and offers/bids responses) per market cycle")
+@click.option("--markets", type=click.IntRange(min=1), default=5, show_default=True,
+              help="Number of future markets")
+@click.option("--time-slots", type=click.IntRange(min=1), default=8, show_default=True,
+              help="Number of open time slots of each future market")
+@click.option("--orders", type=click.IntRange(min=2), default=50, show_default=True,
+              help="Number of orders of each time slot")
+@click.option("--report-every", type=click.IntRange(min=1), default=10, show_default=True,
+              help="Number of market cycles between two reports")
+def main(market_cycles, ticks, markets, time_slots, orders, report_every):
+    """Report the traced memory of the matcher across the market cycles."""
+    # pylint: disable=too-many-arguments
+    logging.getLogger("gsy_matching_engine_sdk").setLevel(logging.ERROR)
+    redis_db = fakeredis.FakeRedis()
+    matcher = _BenchmarkMatcher(redis_db=redis_db)
+    # Answer the simulation id request, the matcher is subscribed to the response already
+    redis_db.publish(MatchingEngineChannels(None).simulation_id_response,
+                     json.dumps({"simulation_id": "benchmark-simulation"}))
+    matcher.wait_until_ready(timeout=60)
+    stub = _SimulationStub(markets, time_slots, orders)
+    memory_report = MemoryReport()
+
+    click.echo(f"{'cycle':>7} {'orders':>8} {'traced MiB':>11} {'peak MiB':>9} "
+               f"{'growth MiB':>11} {'seconds':>8}")
+    start_time = time.perf_counter()
+    for _ in range(market_cycles):
+        stub.start_market_cycle()
+        matcher.event_dispatcher.dispatch({"event": "market_cycle"})
+        for _ in range(ticks):
+            matcher.event_dispatcher.dispatch(stub.get_tick())
+            matcher.event_dispatcher.wait_until_idle()
+            matcher.event_dispatcher.dispatch(stub.get_offers_bids_response())
+            matcher.event_dispatcher.wait_until_idle()
+        if stub.market_cycle % report_every == 0 or stub.market_cycle == market_cycles:
+            memory = memory_report.report()
+            click.echo(f"{stub.market_cycle:>7} {len(matcher.order_book):>8} "
+                       f"{memory['current'] / MEBIBYTE:>11.2f} "
+                       f"{memory['peak'] / MEBIBYTE:>9.2f} "
+                       f"{memory['growth'] / MEBIBYTE:>+11.2f} "
+                       f"{time.perf_counter() - start_time:>8.1f}")
+
+    matcher.pubsub_thread.stop()
+    matcher.event_dispatcher.shutdown()
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
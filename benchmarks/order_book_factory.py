@@ -0,0 +1,110 @@
+"""Synthetic order books shared by the benchmark scripts."""
+
+import random
+import uuid
+from typing import Dict, List, Optional
+
+DEFAULT_TIME_SLOT = "2022-03-15T01:15"
+ENERGY_TYPES = ("PV", "Wind", "Hydro", "Biomass")
+
+
+def _create_order(order_type: str, time_slot: str, rng: random.Random,
+                  traders_count: Optional[int] = None) -> Dict:
+    energy = round(rng.uniform(0.01, 5), 4)
+    energy_rate = round(rng.uniform(10, 40), 4)
+    if traders_count:
+        trader_uuid = str(uuid.UUID(int=rng.randrange(traders_count)))
+    else:
+        trader_uuid = str(uuid.UUID(int=rng.getrandbits(128)))
+    trader = {"name": f"{order_type}-{trader_uuid[:8]}", "uuid": trader_uuid,
+              "origin": f"{order_type}-{trader_uuid[:8]}", "origin_uuid": trader_uuid}
+    order = {
+        "type": order_type,
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "time_slot": time_slot,
+        "energy": energy,
+        "energy_rate": energy_rate,
+        "original_price": energy * energy_rate,
+        "price": energy * energy_rate,
+    }
+    if order_type == "Bid":
+        order.update({"buyer": trader, "buyer_origin": trader["origin"],
+                      "buyer_origin_id": trader_uuid, "buyer_id": trader_uuid,
+                      "requirements": None})
+    else:
+        order.update({"seller": trader, "seller_origin": trader["origin"],
+                      "seller_origin_id": trader_uuid, "seller_id": trader_uuid,
+                      "attributes": None})
+    return order
+
+
+def create_matching_data(
+        orders_count: int, markets_count: int = 1, time_slots_count: int = 1,
+        seed: int = 42, traders_count: Optional[int] = None) -> Dict:
+    """Create a bids_offers payload with orders_count orders split across all partitions.
+
+    Every order has its own trader, unless traders_count is set: then the orders are posted by
+    that number of traders (per order type).
+
+    The payload has the same structure as the one of the offers_bids_response event:
+        {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+    """
+    rng = random.Random(seed)
+    partitions_count = markets_count * time_slots_count
+    orders_per_partition = max(orders_count // partitions_count, 2)
+    matching_data = {}
+    for _ in range(markets_count):
+        market_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        matching_data[market_id] = {}
+        for slot_index in range(time_slots_count):
+            time_slot = f"2022-03-15T{slot_index // 4:02d}:{(slot_index % 4) * 15:02d}"
+            matching_data[market_id][time_slot] = create_time_slot_orders(
+                time_slot, orders_per_partition, rng, traders_count)
+    return matching_data
+
+
+def create_time_slot_orders(time_slot: str, orders_count: int, rng: random.Random,
+                            traders_count: Optional[int] = None) -> Dict:
+    """Create the bids and offers of one time slot: {"bids": [...], "offers": [...]}."""
+    return {
+        "bids": [_create_order("Bid", time_slot, rng, traders_count)
+                 for _ in range(orders_count // 2)],
+        "offers": [_create_order("Offer", time_slot, rng, traders_count)
+                   for _ in range(orders_count - orders_count // 2)],
+    }
+
+
+def add_requirements(matching_data: Dict, requirements_share: float,
+                     trading_partners_count: int = 3, seed: int = 42) -> Dict:
+    """Add energy types to the offers and requirements to a share of the bids, in place.
+
+    Half of the bids with requirements require trading partners (picked among the sellers of the
+    time slot), the other half require energy types.
+    """
+    rng = random.Random(seed)
+    for time_slot_data in matching_data.values():
+        for data in time_slot_data.values():
+            for offer in data["offers"]:
+                offer["attributes"] = {"energy_type": rng.choice(ENERGY_TYPES)}
+            seller_ids = sorted({offer["seller_id"] for offer in data["offers"]})
+            for bid in data["bids"]:
+                if rng.random() >= requirements_share:
+                    continue
+                if rng.random() < 0.5:
+                    bid["requirements"] = [{"trading_partners": rng.sample(
+                        seller_ids, min(trading_partners_count, len(seller_ids)))}]
+                else:
+                    bid["requirements"] = [{"energy_type": rng.sample(ENERGY_TYPES, 2)}]
+    return matching_data
+
+
+def count_orders(matching_data: Dict) -> int:
+    """Return the number of bids and offers of a bids_offers payload."""
+    return sum(len(data["bids"]) + len(data["offers"])
+               for time_slot_data in matching_data.values()
+               for data in time_slot_data.values())
+
+
+def total_energy(recommendations: List[Dict]) -> float:
+    """Return the total selected energy of a list of recommendations."""
+    return sum(recommendation["selected_energy"] for recommendation in recommendations)
@@ -0,0 +1,160 @@
+"""Throughput benchmark of the Redis Streams transport against the pubsub one.
+
+Usage:
+    python benchmarks/redis_streams.py --events 5000
+    python benchmarks/redis_streams.py --events 2000 --handling-delay 0.001
+
+A stub of gsy-e answers the simulation id request of the matcher, then publishes --events
+matched recommendations responses (an event type that is neither coalesced nor skipped) on an
+in-process fakeredis server: on the pubsub channel of the events for RedisBaseMatcher, or on the
+stream of the same name for RedisStreamsBaseMatcher. The duration until the matcher has handled
+all events (or stopped receiving them) is reported, together with the number of events dropped
+by its full event queue and the largest number of events waiting in that queue.
+
+With a --handling-delay the matcher is slower than the stub: the pubsub matcher buffers the
+backlog in memory and drops the events that overflow its queue, while the streams matcher stops
+reading once max_read_ahead events are queued, and leaves the backlog in Redis.
+
+fakeredis runs in the benchmark process, therefore the durations measure the client side of the
+transports, not the network round trips that batching saves with a real Redis server (run the
+benchmark with --redis-url to use one). The polling threads of fakeredis also compete with the
+handlers for the GIL, which inflates the handling delay of both transports.
+"""
+
+import json
+import logging
+import threading
+import time
+
+import click
+import fakeredis
+from gsy_framework.redis_channels import MatchingEngineChannels
+from redis import Redis
+
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+from gsy_matching_engine_sdk.matchers.redis_streams_base_matcher import RedisStreamsBaseMatcher
+
+SIMULATION_ID = "benchmark-simulation"
+PUBLISH_BATCH_SIZE = 500  # Messages sent per pipeline by the stub
+IDLE_TIMEOUT_SECONDS = 5.  # The matcher is considered done once it handles no event for this long
+
+
+class _CountingMixin:
+    """Count the handled events, and keep track of the largest queue of the matcher."""
+
+    def __init__(self, *args, handling_delay=0., **kwargs):
+        self.handling_delay = handling_delay
+        self.handled_count = 0
+        self.max_queue_depth = 0
+        self.last_handled_time = time.perf_counter()
+        super().__init__(*args, **kwargs)
+
+    def on_matched_recommendations_response(self, data):
+        self.max_queue_depth = max(
+            self.max_queue_depth, sum(self.event_dispatcher.queue_depths.values()))
+        if self.handling_delay:
+            time.sleep(self.handling_delay)
+        self.handled_count += 1
+        self.last_handled_time = time.perf_counter()
+
+
+class _PubsubMatcher(_CountingMixin, RedisBaseMatcher):
+    """Pubsub matcher that counts the handled events."""
+
+
+class _StreamsMatcher(_CountingMixin, RedisStreamsBaseMatcher):
+    """Streams matcher that counts the handled events."""
+
+
+def _answer_simulation_id_request(redis_db):
+    pubsub = redis_db.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(MatchingEngineChannels(None).simulation_id)
+
+    def answer():
+        while pubsub.get_message(timeout=1.) is None:
+            pass
+        redis_db.publish(MatchingEngineChannels(None).simulation_id_response,
+                         json.dumps({"simulation_id": SIMULATION_ID}))
+        pubsub.close()
+    thread = threading.Thread(target=answer, daemon=True)
+    thread.start()
+    return thread
+
+
+def _publish_events(redis_db, use_streams: bool, events_count: int):
+    channel = MatchingEngineChannels(SIMULATION_ID).events
+    payload = json.dumps({"event": "match", "recommendations": [], "status": "success"})
+    for start in range(0, events_count, PUBLISH_BATCH_SIZE):
+        pipeline = redis_db.pipeline(transaction=False)
+        for _ in range(min(PUBLISH_BATCH_SIZE, events_count - start)):
+            if use_streams:
+                pipeline.xadd(channel, {"data": payload})
+            else:
+                pipeline.publish(channel, payload)
+        pipeline.execute()
+
+
+def _measure(create_redis, use_streams: bool, events_count: int, handling_delay: float,
+             batch_size: int, max_read_ahead: int):
+    # pylint: disable=too-many-arguments
+    stub_redis = create_redis()
+    _answer_simulation_id_request(stub_redis)
+    if use_streams:
+        matcher = _StreamsMatcher(redis_db=create_redis(), handling_delay=handling_delay,
+                                  batch_size=batch_size, max_read_ahead=max_read_ahead)
+    else:
+        matcher = _PubsubMatcher(redis_db=create_redis(), handling_delay=handling_delay)
+    matcher.wait_until_ready(timeout=60)
+
+    start_time = time.perf_counter()
+    _publish_events(stub_redis, use_streams, events_count)
+    while (matcher.handled_count < events_count and
+           time.perf_counter() - matcher.last_handled_time < IDLE_TIMEOUT_SECONDS):
+        time.sleep(0.01)
+    duration = (matcher.last_handled_time if matcher.handled_count else
+                time.perf_counter()) - start_time
+
+    if use_streams:
+        matcher.stop_reading(timeout=10)
+    matcher.pubsub_thread.stop()
+    dropped_count = sum(matcher.event_dispatcher.get_metrics()["dropped"].values())
+    matcher.event_dispatcher.shutdown(wait=False)
+    return duration, matcher.handled_count, dropped_count, matcher.max_queue_depth
+
+
+@click.command()
+@click.option("--events", "events_count", type=click.IntRange(min=1), default=5000,
+              show_default=True, help="Number of events published by the stub")
+@click.option("--handling-delay", type=float, default=0., show_default=True,
+              help="Seconds that the matcher spends on each event")
+@click.option("--batch-size", type=click.IntRange(min=1), default=100, show_default=True,
+              help="Entries read per round trip by the streams matcher")
+@click.option("--max-read-ahead", type=click.IntRange(min=1), default=100, show_default=True,
+              help="Queued events from which the streams matcher stops reading")
+@click.option("--redis-url", type=str, default=None,
+              help="Use this Redis server instead of an in-process fakeredis one")
+def main(events_count, handling_delay, batch_size, max_read_ahead, redis_url):
+    """Report the throughput, dropped events and queue depth of both transports."""
+    # The pubsub matcher logs a warning for each dropped event
+    logging.getLogger("gsy_matching_engine_sdk").setLevel(logging.ERROR)
+    if redis_url is None:
+        server = fakeredis.FakeServer()
+
+        def create_redis():
+            return fakeredis.FakeRedis(server=server)
+    else:
+        def create_redis():
+            return Redis.from_url(redis_url)
+
+    click.echo(f"{'transport':>10} {'seconds':>9} {'events/s':>10} {'handled':>8} "
+               f"{'dropped':>8} {'max queue':>10}")
+    for transport, use_streams in (("pubsub", False), ("streams", True)):
+        duration, handled_count, dropped_count, max_queue_depth = _measure(
+            create_redis, use_streams, events_count, handling_delay, batch_size,
+            max_read_ahead)
+        click.echo(f"{transport:>10} {duration:>9.3f} {handled_count / duration:>10.0f} "
+                   f"{handled_count:>8} {dropped_count:>8} {max_queue_depth:>10}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,80 @@
+"""Offline benchmark of the matchers of setup modules, replaying a recorded session.
+
+Record a session with:
+    gsy-matching-engine-sdk run --setup <setup> --record-path session.jsonl.gz ...
+and replay it with:
+    python benchmarks/replay.py --recording session.jsonl.gz [--setup <setup> ...]
+"""
+
+import importlib
+import inspect
+import os
+import pkgutil
+
+import click
+
+import gsy_matching_engine_sdk.setups as setups
+
+REDIS_TRANSPORT = "redis"
+REST_TRANSPORT = "rest"
+
+
+def _get_matcher_classes(setup_module_name):
+    # pylint: disable=import-outside-toplevel
+    from gsy_matching_engine_sdk.matchers import RedisBaseMatcher, RestBaseMatcher
+    module = importlib.import_module(setup_module_name)
+    return [member for _, member in inspect.getmembers(module, inspect.isclass)
+            if member.__module__ == module.__name__ and
+            issubclass(member, (RedisBaseMatcher, RestBaseMatcher))]
+
+
+def _format_latency(latency):
+    return f"{latency * 1000:.2f}" if latency is not None else "-"
+
+
+@click.command()
+@click.option("--recording", required=True, type=click.Path(exists=True, dir_okay=False),
+              help="Recording created with the --record-path option of the CLI")
+@click.option("--setup", "setup_module_names", multiple=True,
+              help="Setup modules to benchmark (default: all modules of the setups package)")
+@click.option("--transport", type=click.Choice([REDIS_TRANSPORT, REST_TRANSPORT]),
+              default=REDIS_TRANSPORT, show_default=True,
+              help="Transport the matchers of the setup modules are based on")
+@click.option("--realtime", is_flag=True, default=False,
+              help="Replay events with the recorded pace instead of at full speed")
+@click.option("--skip-memory", is_flag=True, default=False,
+              help="Skip the (slower) replay that measures the peak memory")
+def main(recording, setup_module_names, transport, realtime, skip_memory):
+    """Report events/s, tick -> submission latency percentiles and peak memory per matcher."""
+    # pylint: disable=import-outside-toplevel
+    os.environ["MATCHING_ENGINE_RUN_ON_REDIS"] = (
+        "true" if transport == REDIS_TRANSPORT else "false")
+    from gsy_matching_engine_sdk.replay import ReplayDriver
+
+    if not setup_module_names:
+        setup_module_names = [f"{setups.__name__}.{name}"
+                              for _, name, _ in pkgutil.iter_modules(setups.__path__)]
+
+    click.echo(f"{'matcher':>40} {'events/s':>10} {'p50 [ms]':>9} {'p95 [ms]':>9} "
+               f"{'p99 [ms]':>9} {'peak MB':>8}")
+    for setup_module_name in setup_module_names:
+        for matcher_class in _get_matcher_classes(setup_module_name):
+            try:
+                report = ReplayDriver(matcher_class, recording, realtime=realtime).run()
+            except Exception as ex:  # pylint: disable=broad-except
+                click.echo(f"{matcher_class.__name__[-40:]:>40} failed: {ex!r}")
+                continue
+            peak_memory = "-"
+            if not skip_memory:
+                memory_report = ReplayDriver(
+                    matcher_class, recording, realtime=realtime, trace_memory=True).run()
+                peak_memory = f"{memory_report.peak_memory / 2 ** 20:.1f}"
+            click.echo(
+                f"{matcher_class.__name__[-40:]:>40} {report.events_per_second:>10.1f} "
+                f"{_format_latency(report.latency_percentile(50)):>9} "
+                f"{_format_latency(report.latency_percentile(95)):>9} "
+                f"{_format_latency(report.latency_percentile(99)):>9} {peak_memory:>8}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
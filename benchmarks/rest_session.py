@@ -0,0 +1,133 @@
+"""Benchmark of the HTTP sessions of the REST matcher against a local stub of the exchange.
+
+Usage:
+    python benchmarks/rest_session.py --requests 500 --body-sizes 100 --body-sizes 1000000
+
+Every request is sent either on a new connection, as the requests of RestCommunicationMixin,
+or on the keep-alive connections of the pooled session of RestBaseMatcher, with and without
+gzip compression of the body. The stub can emulate the bandwidth of the link to the exchange,
+by throttling the reading of the request bodies (--bandwidth-mbps).
+"""
+
+import gzip
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+import requests
+
+from gsy_matching_engine_sdk.http_session import (
+    REQUEST_TIMEOUT, compress_body, create_http_session)
+
+
+class _StubExchangeHandler(BaseHTTPRequestHandler):
+    """Decode the request body and respond with a small JSON document, like the exchange."""
+    protocol_version = "HTTP/1.1"  # Keep the connections alive
+    disable_nagle_algorithm = True  # Headers and body are written separately
+    bandwidth_mbps = 0.  # Unlimited
+
+    def _read_body(self) -> bytes:
+        remaining = int(self.headers.get("Content-Length", 0))
+        chunks = []
+        while remaining:
+            chunk = self.rfile.read(min(remaining, 64 * 1024))
+            remaining -= len(chunk)
+            chunks.append(chunk)
+            if self.bandwidth_mbps:
+                time.sleep(len(chunk) * 8 / (self.bandwidth_mbps * 1e6))
+        return b"".join(chunks)
+
+    def _respond(self):
+        body = self._read_body()
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        json.loads(body or b"{}")
+        response = b'{"status": "ready"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    do_GET = do_POST = _respond  # pylint: disable=invalid-name
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def _create_body(size: int) -> bytes:
+    """Return a JSON body of approximately the given size, that looks like recommendations."""
+    recommendation = {"market_id": "c2b3e1a0-5a5f-4b1e-9f3e-0c6f1d0e2a11",
+                      "time_slot": "2022-03-15T01:15", "selected_energy": 1.2345,
+                      "trade_rate": 23.456, "bid": {"id": "bid", "energy_rate": 30.1},
+                      "offer": {"id": "offer", "energy_rate": 20.2}}
+    count = max(size // len(json.dumps(recommendation)), 1)
+    return json.dumps({"recommended_matches": [recommendation] * count}).encode()
+
+
+def _send_on_new_connection(url, body, _gzip_min_bytes):
+    return requests.post(url, data=body, headers={"Authorization": "JWT token",
+                                                  "Content-Type": "application/json"},
+                         timeout=REQUEST_TIMEOUT)
+
+
+def _create_pooled_sender():
+    session = create_http_session(pool_size=2, max_retries=0)
+    session.headers["Authorization"] = "JWT token"
+
+    def send(url, body, gzip_min_bytes):
+        body, headers = compress_body(body, gzip_min_bytes)
+        return session.post(url, data=body, headers=headers, timeout=REQUEST_TIMEOUT)
+    return send
+
+
+def _measure_latencies(send, url, body, gzip_min_bytes, requests_count):
+    latencies = []
+    for _ in range(requests_count):
+        start_time = time.perf_counter()
+        response = send(url, body, gzip_min_bytes)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start_time)
+    return latencies
+
+
+@click.command()
+@click.option("--requests", "requests_count", type=int, default=500, show_default=True,
+              help="Number of requests per body size and client")
+@click.option("--body-sizes", "-s", type=int, multiple=True, default=(100, 1000000),
+              show_default=True, help="Approximate sizes in bytes of the request bodies")
+@click.option("--bandwidth-mbps", type=float, default=0., show_default=True,
+              help="Bandwidth of the emulated link to the exchange (0: unlimited)")
+def main(requests_count, body_sizes, bandwidth_mbps):
+    """Report the per-request latency of each HTTP client, for each body size."""
+    _StubExchangeHandler.bandwidth_mbps = bandwidth_mbps
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubExchangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/external-connection/api/recommendations"
+    clients = {
+        "new connection": (_send_on_new_connection, None),
+        "pooled session": (_create_pooled_sender(), None),
+        "pooled + gzip": (_create_pooled_sender(), 0),
+    }
+    click.echo(f"{'body bytes':>10} {'client':>16} {'sent bytes':>10} "
+               f"{'p50 [ms]':>9} {'p95 [ms]':>9} {'mean [ms]':>10}")
+    try:
+        for body_size in body_sizes:
+            body = _create_body(body_size)
+            for name, (send, gzip_min_bytes) in clients.items():
+                latencies = _measure_latencies(send, url, body, gzip_min_bytes, requests_count)
+                sent_size = len(compress_body(body, gzip_min_bytes)[0])
+                percentiles = statistics.quantiles(latencies, n=20)
+                click.echo(f"{len(body):>10} {name:>16} {sent_size:>10} "
+                           f"{statistics.median(latencies) * 1000:>9.3f} "
+                           f"{percentiles[18] * 1000:>9.3f} "
+                           f"{statistics.mean(latencies) * 1000:>10.3f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,71 @@
+"""Micro-benchmark of the payload serializers.
+
+Usage:
+    python benchmarks/serializers.py [--payload-file <recorded-payload.json> ...]
+
+Without payload files, a synthetic offers_bids_response payload is used. The peek column is the
+duration of reading the event type from the payload header, that the matchers do instead of
+decoding the events that they do not handle.
+"""
+
+import json
+import time
+
+import click
+
+from gsy_matching_engine_sdk.serializers import SERIALIZERS, peek_event_type
+from order_book_factory import create_matching_data
+
+
+def _load_payloads(payload_files, orders_count):
+    if not payload_files:
+        return {"synthetic offers_bids_response": json.dumps({
+            "event": "offers_bids_response",
+            "bids_offers": create_matching_data(orders_count, time_slots_count=4)}).encode()}
+    payloads = {}
+    for path in payload_files:
+        with open(path, "rb") as payload_file:
+            payloads[path] = payload_file.read()
+    return payloads
+
+
+def _best_duration(function, argument, repetitions):
+    durations = []
+    for _ in range(repetitions):
+        start_time = time.perf_counter()
+        function(argument)
+        durations.append(time.perf_counter() - start_time)
+    return min(durations)
+
+
+@click.command()
+@click.option("--payload-file", "payload_files", multiple=True, type=click.Path(exists=True),
+              help="File containing a recorded JSON payload")
+@click.option("--orders", type=int, default=50000, show_default=True,
+              help="Number of orders of the synthetic payload")
+@click.option("--repetitions", "-r", type=int, default=5, show_default=True,
+              help="Number of runs per serializer (the fastest one is reported)")
+def main(payload_files, orders, repetitions):
+    """Report the decoding and encoding duration of each installed serializer."""
+    click.echo(f"{'payload':>40} {'MB':>6} {'serializer':>10} "
+               f"{'loads [ms]':>11} {'dumps [ms]':>11}")
+    for payload_name, payload in _load_payloads(payload_files, orders).items():
+        peek_duration = _best_duration(peek_event_type, payload, repetitions)
+        click.echo(f"{payload_name[-40:]:>40} {len(payload) / 2 ** 20:>6.1f} {'peek':>10} "
+                   f"{peek_duration * 1000:>11.4f} {'-':>11}")
+        for serializer_class in SERIALIZERS.values():
+            if not serializer_class.is_available():
+                click.echo(f"{payload_name[-40:]:>40} {'':>6} {serializer_class.name:>10} "
+                           "not installed")
+                continue
+            serializer = serializer_class()
+            data = serializer.loads(payload)
+            loads_duration = _best_duration(serializer.loads, payload, repetitions)
+            dumps_duration = _best_duration(serializer.dumps, data, repetitions)
+            click.echo(f"{payload_name[-40:]:>40} {len(payload) / 2 ** 20:>6.1f} "
+                       f"{serializer.name:>10} {loads_duration * 1000:>11.2f} "
+                       f"{dumps_duration * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,88 @@
+"""Benchmark of the cold start of the matcher CLI, based on python -X importtime.
+
+Usage:
+    python benchmarks/startup_time.py --runs 5 --max-cli-import-ms 300
+
+Each scenario runs in a new interpreter, and reports the median over the runs of the total import
+time, the slowest top-level imports and the transport stacks that were loaded. The process exits
+with an error if the import of the CLI exceeds --max-cli-import-ms, so that CI can track
+regressions of the startup time.
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+import click
+
+# Modules of the transport stacks, that should only be loaded by the matchers that use them
+TRANSPORT_MODULES = ("redis", "requests", "websockets", "aiohttp")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+SCENARIOS = {
+    "cli import": ("import gsy_matching_engine_sdk.cli", {}),
+    "cli --help": ("from gsy_matching_engine_sdk.cli import main; "
+                   "main(['run', '--help'], standalone_mode=False)", {}),
+    "redis setup": ("import gsy_matching_engine_sdk.setups.matching_engine_matcher",
+                    {"MATCHING_ENGINE_RUN_ON_REDIS": "true"}),
+    "rest setup": ("import gsy_matching_engine_sdk.setups.matching_engine_matcher",
+                   {"MATCHING_ENGINE_RUN_ON_REDIS": "false"}),
+}
+
+
+def _run_importtime(code: str, env: dict):
+    """Run the code in a new interpreter, return its top-level imports' cumulative times [us]
+    and the transport modules it loaded."""
+    code += ("\nimport sys; print('transports:', *(m for m in {!r} if m in sys.modules))"
+             .format(TRANSPORT_MODULES))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+        env={**os.environ, **env}, check=True)
+    top_level_imports = {}
+    for line in process.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # Indentation of one space: imported by the script itself
+        if match and len(match.group(3)) == 1:
+            top_level_imports[match.group(4)] = int(match.group(2))
+    loaded_transports = process.stdout.splitlines()[-1].split()[1:]
+    return top_level_imports, loaded_transports
+
+
+@click.command()
+@click.option("--runs", type=click.IntRange(min=1), default=5, show_default=True,
+              help="Number of interpreters started per scenario")
+@click.option("--top", type=int, default=5, show_default=True,
+              help="Number of slowest top-level imports reported per scenario")
+@click.option("--max-cli-import-ms", type=float, default=None,
+              help="Fail if the median import time of the CLI exceeds this duration")
+def main(runs, top, max_cli_import_ms):
+    """Report the import time of the CLI and of the sample setup for each transport."""
+    median_totals = {}
+    for name, (code, env) in SCENARIOS.items():
+        import_times = defaultdict(list)
+        totals = []
+        for _ in range(runs):
+            top_level_imports, loaded_transports = _run_importtime(code, env)
+            for module, cumulative_time in top_level_imports.items():
+                import_times[module].append(cumulative_time)
+            totals.append(sum(top_level_imports.values()))
+        median_totals[name] = statistics.median(totals) / 1000
+        click.echo(f"{name}: {median_totals[name]:.1f} ms, "
+                   f"transports: [{', '.join(loaded_transports)}]")
+        slowest = sorted(((statistics.median(times), module)
+                          for module, times in import_times.items()), reverse=True)[:top]
+        for import_time, module in slowest:
+            click.echo(f"    {import_time / 1000:>8.1f} ms  {module}")
+
+    if max_cli_import_ms is not None and median_totals["cli import"] > max_cli_import_ms:
+        raise click.ClickException(
+            f"The CLI import takes {median_totals['cli import']:.1f} ms, more than "
+            f"{max_cli_import_ms} ms.")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
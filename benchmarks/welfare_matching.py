@@ -0,0 +1,190 @@
+"""Benchmark of the welfare maximizing matching against a greedy attributed matching.
+
+Usage:
+    python benchmarks/welfare_matching.py --sizes 1000 --sizes 5000 --ticks 10
+
+The order books have a single time slot. The offers have energy types, and a share of the bids
+(and of the offers) require trading partners or energy types. The greedy matching matches the
+bids by descending energy rate, each one of them with the cheapest offers that it is compatible
+with (both ways). Both algorithms are reported with the duration and total surplus of their
+trades, i.e. the sum of their energies times the difference of the bid and offer rates.
+
+Then the books change on every tick (a share of the orders is replaced, and the energies of
+others are updated), and the welfare maximizing matching is repeated with and without warm
+starting the solver from the solution of the previous tick.
+
+Requires the highspy library.
+"""
+
+import random
+import time
+import uuid
+
+import click
+
+from gsy_matching_engine_sdk.matching_algorithms import WelfareMaximizingMatchingAlgorithm
+from gsy_matching_engine_sdk.matching_algorithms.order_index import (
+    SortedOrders, get_stage_requirements, satisfies_requirement)
+from order_book_factory import add_requirements, count_orders, create_matching_data
+
+FLOATING_POINT_TOLERANCE = 1e-8
+
+
+def _get_bid_requirements(bid):
+    return (get_stage_requirements(bid, with_trading_partners=True) +
+            get_stage_requirements(bid, with_trading_partners=False))
+
+
+def _is_compatible(bid, offer):
+    if offer["energy_rate"] - bid["energy_rate"] > FLOATING_POINT_TOLERANCE:
+        return False
+    offer_requirements = get_stage_requirements(offer, with_trading_partners=True)
+    if offer_requirements and not any(satisfies_requirement(bid, "buyer", requirement)
+                                      for requirement in offer_requirements):
+        return False
+    bid_requirements = _get_bid_requirements(bid)
+    return not bid_requirements or any(satisfies_requirement(offer, "seller", requirement)
+                                       for requirement in bid_requirements)
+
+
+def _match_greedily(matching_data):
+    """Return the (bid, offer, energy) trades of the greedy attributed matching."""
+    trades = []
+    for time_slot_data in matching_data.values():
+        for data in time_slot_data.values():
+            offers = SortedOrders(data["offers"], "seller", descending=False)
+            bids = SortedOrders(data["bids"], "buyer", descending=True)
+            first_offer_rank = 0  # Rank of the first offer with remaining energy
+            for bid_rank, bid in enumerate(bids.orders):
+                while (first_offer_rank < len(offers.orders) and
+                       offers.energies[first_offer_rank] <= FLOATING_POINT_TOLERANCE):
+                    first_offer_rank += 1
+                requirements = _get_bid_requirements(bid)
+                if requirements:
+                    offer_ranks = (rank for rank, _ in offers.get_candidates(requirements))
+                else:
+                    offer_ranks = range(first_offer_rank, len(offers.orders))
+                for offer_rank in offer_ranks:
+                    offer = offers.orders[offer_rank]
+                    if offer["energy_rate"] - bid["energy_rate"] > FLOATING_POINT_TOLERANCE:
+                        break
+                    if bids.energies[bid_rank] <= FLOATING_POINT_TOLERANCE:
+                        break
+                    if (offers.energies[offer_rank] <= FLOATING_POINT_TOLERANCE or
+                            not _is_compatible(bid, offer)):
+                        continue
+                    energy = min(bids.energies[bid_rank], offers.energies[offer_rank])
+                    bids.energies[bid_rank] -= energy
+                    offers.energies[offer_rank] -= energy
+                    trades.append((bid, offer, energy))
+    return trades
+
+
+def _get_surplus(trades):
+    return sum((bid["energy_rate"] - offer["energy_rate"]) * energy
+               for bid, offer, energy in trades)
+
+
+def _get_recommendations_trades(recommendations):
+    return [(recommendation["bid"], recommendation["offer"], recommendation["selected_energy"])
+            for recommendation in recommendations]
+
+
+def _add_offers_requirements(matching_data, requirements_share, seed=42):
+    """Require 3 trading partners (among the buyers of the time slot) for a share of the offers.
+    """
+    rng = random.Random(seed)
+    for time_slot_data in matching_data.values():
+        for data in time_slot_data.values():
+            buyer_ids = sorted({bid["buyer_id"] for bid in data["bids"]})
+            for offer in data["offers"]:
+                if rng.random() < requirements_share:
+                    offer["requirements"] = [{"trading_partners": rng.sample(
+                        buyer_ids, min(3, len(buyer_ids)))}]
+
+
+def _update_orders(matching_data, changes_share, rng):
+    """Replace a share of the orders with new ones and update the energies of as many others."""
+    for time_slot_data in matching_data.values():
+        for data in time_slot_data.values():
+            for orders in (data["bids"], data["offers"]):
+                changes_count = int(len(orders) * changes_share)
+                for position in rng.sample(range(len(orders)), 2 * changes_count):
+                    order = dict(orders[position])
+                    if changes_count > 0:
+                        order.update({"id": str(uuid.UUID(int=rng.getrandbits(128))),
+                                      "energy_rate": round(rng.uniform(10, 40), 4)})
+                        changes_count -= 1
+                    order["energy"] = round(rng.uniform(0.01, 5), 4)
+                    orders[position] = order
+
+
+def _time_ticks(algorithm, matching_data, ticks, changes_share):
+    rng = random.Random(42)
+    durations = []
+    iterations_count = 0
+    algorithm.get_matches_recommendations(matching_data)
+    for _ in range(ticks):
+        _update_orders(matching_data, changes_share, rng)
+        start_time = time.perf_counter()
+        algorithm.get_matches_recommendations(matching_data)
+        durations.append(time.perf_counter() - start_time)
+        iterations_count += algorithm.last_iterations_count
+    return sum(durations) / len(durations), iterations_count / ticks
+
+
+@click.command()
+@click.option("--sizes", "-s", type=int, multiple=True, default=(1000, 5000),
+              show_default=True, help="Number of orders of the time slot of each order book")
+@click.option("--requirements-share", type=click.FloatRange(0, 1), default=0.5,
+              show_default=True, help="Share of the bids that have requirements")
+@click.option("--offers-requirements-share", type=click.FloatRange(0, 1), default=0.2,
+              show_default=True, help="Share of the offers that require trading partners")
+@click.option("--traders", type=int, default=200, show_default=True,
+              help="Number of sellers and of buyers of each order book")
+@click.option("--ticks", type=int, default=10, show_default=True,
+              help="Number of ticks with updated orders, for the warm start comparison")
+@click.option("--changes-share", type=click.FloatRange(0, 0.5), default=0.02,
+              show_default=True, help="Share of the orders replaced on each tick")
+def main(sizes, requirements_share, offers_requirements_share, traders, ticks, changes_share):
+    """Report the duration and surplus of both matchings, then the warm start gains."""
+    click.echo(f"{'orders':>8} {'algorithm':>18} {'seconds':>10} {'trades':>8} "
+               f"{'surplus':>12} {'gain %':>8}")
+    for size in sizes:
+        matching_data = add_requirements(
+            create_matching_data(size, traders_count=traders), requirements_share)
+        _add_offers_requirements(matching_data, offers_requirements_share)
+        orders_count = count_orders(matching_data)
+
+        start_time = time.perf_counter()
+        greedy_trades = _match_greedily(matching_data)
+        greedy_duration = time.perf_counter() - start_time
+        greedy_surplus = _get_surplus(greedy_trades)
+        click.echo(f"{orders_count:>8} {'greedy':>18} {greedy_duration:>10.4f} "
+                   f"{len(greedy_trades):>8} {greedy_surplus:>12.2f} {'-':>8}")
+
+        start_time = time.perf_counter()
+        recommendations = WelfareMaximizingMatchingAlgorithm().get_matches_recommendations(
+            matching_data)
+        duration = time.perf_counter() - start_time
+        surplus = _get_surplus(_get_recommendations_trades(recommendations))
+        gain = 100 * (surplus - greedy_surplus) / greedy_surplus if greedy_surplus else 0.
+        click.echo(f"{orders_count:>8} {'welfare-maximizing':>18} {duration:>10.4f} "
+                   f"{len(recommendations):>8} {surplus:>12.2f} {gain:>8.2f}")
+
+    click.echo(f"\n{'orders':>8} {'start':>6} {'seconds/tick':>13} {'iterations/tick':>16}")
+    for size in sizes:
+        for warm_start in (False, True):
+            matching_data = add_requirements(
+                create_matching_data(size, traders_count=traders), requirements_share)
+            _add_offers_requirements(matching_data, offers_requirements_share)
+            duration, iterations_count = _time_ticks(
+                WelfareMaximizingMatchingAlgorithm(warm_start=warm_start), matching_data,
+                ticks, changes_share)
+            click.echo(f"{count_orders(matching_data):>8} "
+                       f"{'warm' if warm_start else 'cold':>6} {duration:>13.4f} "
+                       f"{iterations_count:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
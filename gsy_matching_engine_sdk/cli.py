@@ -18,18 +18,20 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import importlib
 import logging
 import os
+import pkgutil
 import sys
 from logging import getLogger
 
 import click
 from click.types import Choice
 from click_default_group import DefaultGroup
-from colorlog import ColoredFormatter
-from gsy_framework.exceptions import GSyException
-from gsy_framework.utils import iterate_over_all_modules
 
 import gsy_matching_engine_sdk.setups as setups
-from gsy_matching_engine_sdk.constants import SETUP_FILE_PATH
+from gsy_matching_engine_sdk.constants import (
+    DEFAULT_HTTP_MAX_RETRIES, DEFAULT_HTTP_POOL_SIZE, DEFAULT_MAX_BATCH_BYTES,
+    DEFAULT_MAX_BATCH_RECOMMENDATIONS, DEFAULT_MAX_QUEUE_SIZE, DROP_OLDEST_POLICY,
+    MAX_WORKER_THREADS, QUEUE_OVERFLOW_POLICIES, SETUP_FILE_PATH)
+from gsy_matching_engine_sdk.serializers import AUTO_SERIALIZER_NAME, SERIALIZERS
 from gsy_matching_engine_sdk.utils import (
     simulation_id_from_env, domain_name_from_env,
     websocket_domain_name_from_env)
@@ -37,7 +39,21 @@ from gsy_matching_engine_sdk.utils import (
 log = getLogger(__name__)
 
 modules_path = setups.__path__ if SETUP_FILE_PATH is None else [SETUP_FILE_PATH, ]
-_setup_modules = iterate_over_all_modules(modules_path)
+
+
+class SetupModuleOption(click.Option):
+    """Option whose help lists the available setup modules.
+
+    The modules are only discovered when the help is shown, without importing them, so that
+    running a matcher does not pay for the discovery.
+    """
+
+    def get_help_record(self, ctx):
+        setup_modules = [module.name for module in pkgutil.iter_modules(modules_path)
+                         if not module.ispkg]
+        self.help = "Setup module of matcher script. Available modules: [{}]".format(
+            ", ".join(setup_modules))
+        return super().get_help_record(ctx)
 
 
 @click.group(name="gsy-matching-engine-sdk", cls=DefaultGroup, default="run",
@@ -45,6 +61,8 @@ _setup_modules = iterate_over_all_modules(modules_path)
 @click.option("-l", "--log-level", type=Choice(list(logging._nameToLevel.keys())), default="ERROR",
               show_default=True, help="Log level")
 def main(log_level):
+    # Deferred, since it is only needed once the arguments are parsed
+    from colorlog import ColoredFormatter  # pylint: disable=import-outside-toplevel
     handler = logging.StreamHandler()
     handler.setLevel(log_level)
     handler.setFormatter(
@@ -62,9 +80,7 @@ def main(log_level):
 @main.command()
 @click.option("-b", "--base-setup-path", default=None, type=str,
               help="Accept absolute or relative path for matcher script")
-@click.option("--setup", "setup_module_name", required=True,
-              help="Setup module of matcher script. Available modules: [{}]".format(
-                  ", ".join(_setup_modules)))
+@click.option("--setup", "setup_module_name", cls=SetupModuleOption, required=True)
 @click.option("-u", "--username", default=None, type=str, help="GSy Exchange username")
 @click.option("-p", "--password", default=None, type=str, help="GSy Exchange password")
 @click.option("-d", "--domain-name", default=None,
@@ -75,9 +91,74 @@ def main(log_level):
               help="Simulation id")
 @click.option('--run-on-redis', is_flag=True, default=False,
               help="Start the client using the Redis API")
+@click.option("--serializer", type=Choice([AUTO_SERIALIZER_NAME, *SERIALIZERS]),
+              default=AUTO_SERIALIZER_NAME, show_default=True,
+              help="JSON library used to encode/decode the payloads "
+                   "(auto selects the fastest installed one)")
+@click.option("--max-worker-threads", type=click.IntRange(min=1), default=MAX_WORKER_THREADS,
+              show_default=True, help="Number of threads that handle the received events")
+@click.option("--matching-processes", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Number of processes that match the markets / time slots in parallel")
+@click.option("--record-path", type=click.Path(dir_okay=False, writable=True), default=None,
+              help="Record all exchanged messages in this file (gzip-compressed if it ends with "
+                   ".gz), to be replayed offline")
+@click.option("--metrics-port", type=int, default=None,
+              help="Serve the matcher metrics in the Prometheus format on this local port")
+@click.option("--stats-log-interval", type=float, default=None,
+              help="Log the matcher metrics every given number of seconds")
+@click.option("--cache-matching-results", is_flag=True, default=False,
+              help="Reuse the recommendations of the markets / time slots whose orders did not "
+                   "change, and do not resubmit rejected recommendations")
+@click.option("--match-changed-only", is_flag=True, default=False,
+              help="Only match the markets / time slots whose orders changed since the previous "
+                   "offers/bids response, instead of the whole order book")
+@click.option("--simulation-ids", type=str, default=None,
+              help="Comma-separated ids of the simulations to match in one process (Redis only); "
+                   "include * to also match the simulations discovered from their events")
+@click.option("--redis-streams", is_flag=True, default=False,
+              help="Read the events from Redis Streams instead of pubsub channels (Redis only)")
+@click.option("--shard-group", type=str, default=None,
+              help="Share the markets with the other workers of this group (Redis only), each "
+                   "worker matching a disjoint subset of them")
+@click.option("--max-batch-recommendations", type=click.IntRange(min=1),
+              default=DEFAULT_MAX_BATCH_RECOMMENDATIONS, show_default=True,
+              help="Maximum number of recommendations submitted in one message")
+@click.option("--max-batch-bytes", type=click.IntRange(min=1), default=DEFAULT_MAX_BATCH_BYTES,
+              show_default=True, help="Maximum size in bytes of a recommendations message")
+@click.option("--http-pool-size", type=click.IntRange(min=1), default=DEFAULT_HTTP_POOL_SIZE,
+              show_default=True, help="Number of keep-alive connections to the exchange (REST)")
+@click.option("--http-max-retries", type=click.IntRange(min=0), default=DEFAULT_HTTP_MAX_RETRIES,
+              show_default=True, help="Maximum number of retries of a failed request (REST)")
+@click.option("--gzip-min-bytes", type=click.IntRange(min=0), default=None,
+              help="Gzip the request bodies of at least this size in bytes (REST)")
+@click.option("--matching-deadline", type=click.FloatRange(min=0, min_open=True), default=None,
+              help="Seconds after a tick by which its matching has to finish; later results "
+                   "are partial")
+@click.option("--max-queue-size", type=click.IntRange(min=1), default=DEFAULT_MAX_QUEUE_SIZE,
+              show_default=True, help="Maximum number of queued events of each event type")
+@click.option("--queue-overflow-policy", type=Choice(QUEUE_OVERFLOW_POLICIES),
+              default=DROP_OLDEST_POLICY, show_default=True,
+              help="Drop the oldest queued event or the new one when a queue is full, or block "
+                   "the reading of the events until it has room")
+@click.option("--memory-report", is_flag=True, default=False,
+              help="Trace the memory allocations and log their growth on every market cycle "
+                   "(INFO level)")
 def run(base_setup_path, setup_module_name,
         username, password, domain_name,
-        web_socket, simulation_id, run_on_redis):
+        web_socket, simulation_id, run_on_redis, serializer, max_worker_threads,
+        matching_processes, record_path, metrics_port, stats_log_interval,
+        cache_matching_results, match_changed_only, simulation_ids, redis_streams, shard_group,
+        max_batch_recommendations,
+        max_batch_bytes, http_pool_size, http_max_retries, gzip_min_bytes, matching_deadline,
+        max_queue_size, queue_overflow_policy, memory_report):
+    if simulation_ids is not None and not run_on_redis:
+        raise click.UsageError("--simulation-ids is only supported with --run-on-redis.")
+    if shard_group is not None and not run_on_redis:
+        raise click.UsageError("--shard-group is only supported with --run-on-redis.")
+    if redis_streams and not run_on_redis:
+        raise click.UsageError("--redis-streams is only supported with --run-on-redis.")
+    if redis_streams and simulation_ids is not None:
+        raise click.UsageError("--redis-streams is not supported with --simulation-ids.")
     if username is not None:
         os.environ["API_CLIENT_USERNAME"] = username
     if password is not None:
@@ -89,16 +170,50 @@ def run(base_setup_path, setup_module_name,
     os.environ["MATCHING_ENGINE_SIMULATION_ID"] = (
         simulation_id if simulation_id else simulation_id_from_env())
     os.environ["MATCHING_ENGINE_RUN_ON_REDIS"] = "true" if run_on_redis else "false"
+    os.environ["MATCHING_ENGINE_SERIALIZER"] = serializer
+    os.environ["MATCHING_ENGINE_MAX_WORKER_THREADS"] = str(max_worker_threads)
+    os.environ["MATCHING_ENGINE_MATCHING_PROCESSES"] = str(matching_processes)
+    os.environ["MATCHING_ENGINE_MAX_BATCH_RECOMMENDATIONS"] = str(max_batch_recommendations)
+    os.environ["MATCHING_ENGINE_MAX_BATCH_BYTES"] = str(max_batch_bytes)
+    os.environ["MATCHING_ENGINE_HTTP_POOL_SIZE"] = str(http_pool_size)
+    os.environ["MATCHING_ENGINE_HTTP_MAX_RETRIES"] = str(http_max_retries)
+    os.environ["MATCHING_ENGINE_CACHE_MATCHING_RESULTS"] = (
+        "true" if cache_matching_results else "false")
+    os.environ["MATCHING_ENGINE_REDIS_STREAMS"] = "true" if redis_streams else "false"
+    os.environ["MATCHING_ENGINE_MATCH_CHANGED_ONLY"] = "true" if match_changed_only else "false"
+    os.environ["MATCHING_ENGINE_MAX_QUEUE_SIZE"] = str(max_queue_size)
+    os.environ["MATCHING_ENGINE_QUEUE_OVERFLOW_POLICY"] = queue_overflow_policy
+    os.environ["MATCHING_ENGINE_MEMORY_REPORT"] = "true" if memory_report else "false"
+    if record_path is not None:
+        os.environ["MATCHING_ENGINE_RECORD_PATH"] = record_path
+    if metrics_port is not None:
+        os.environ["MATCHING_ENGINE_METRICS_PORT"] = str(metrics_port)
+    if stats_log_interval is not None:
+        os.environ["MATCHING_ENGINE_STATS_LOG_INTERVAL"] = str(stats_log_interval)
+    if simulation_ids is not None:
+        os.environ["MATCHING_ENGINE_SIMULATION_IDS"] = simulation_ids
+    if shard_group is not None:
+        os.environ["MATCHING_ENGINE_SHARD_GROUP"] = shard_group
+    if gzip_min_bytes is not None:
+        os.environ["MATCHING_ENGINE_GZIP_MIN_BYTES"] = str(gzip_min_bytes)
+    if matching_deadline is not None:
+        os.environ["MATCHING_ENGINE_MATCHING_DEADLINE"] = str(matching_deadline)
     load_client_script(base_setup_path, setup_module_name)
 
 
 def load_client_script(base_setup_path, setup_module_name):
+    """Import the setup module and call its main function, if it defines one."""
+    # The GSy framework is only imported by the setup module (and the matcher it uses)
+    from gsy_framework.exceptions import GSyException  # pylint: disable=import-outside-toplevel
     try:
         if base_setup_path is None:
-            importlib.import_module(f"gsy_matching_engine_sdk.setups.{setup_module_name}")
+            setup_module = importlib.import_module(
+                f"gsy_matching_engine_sdk.setups.{setup_module_name}")
         else:
             sys.path.append(base_setup_path)
-            importlib.import_module(setup_module_name)
+            setup_module = importlib.import_module(setup_module_name)
+        if callable(getattr(setup_module, "main", None)):
+            setup_module.main()
 
     except GSyException as ex:
         raise click.BadOptionUsage(ex.args[0])
@@ -5,3 +5,23 @@ SETUP_FILE_PATH = None
 DEFAULT_DOMAIN_NAME = "http://localhost:8000"
 DEFAULT_WEBSOCKET_DOMAIN = "ws://localhost:8000/external-ws"
 MATCHING_ENGINE_SIMULATION_ID = ""
+DEFAULT_SERIALIZER = "auto"
+# Bounds of the messages that submit recommendations
+DEFAULT_MAX_BATCH_RECOMMENDATIONS = 1000
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+# Keep-alive connections of the REST matchers (recommendations batches and other requests)
+DEFAULT_HTTP_POOL_SIZE = 6
+DEFAULT_HTTP_MAX_RETRIES = 3
+# Consumption of the events from Redis Streams (see RedisStreamsBaseMatcher)
+DEFAULT_REDIS_STREAMS_CONSUMER_GROUP = "gsy-matching-engine-sdk"
+DEFAULT_REDIS_STREAMS_BATCH_SIZE = 100
+# Queued events from which the reads pause, at most the size of the event queues (no drops)
+DEFAULT_REDIS_STREAMS_MAX_READ_AHEAD = 100
+# Maximum number of events waiting in the queue of each event type of the matchers
+DEFAULT_MAX_QUEUE_SIZE = 100
+# Policies applied to the events dispatched to a full queue: drop the oldest queued event, drop
+# the dispatched event, or block the thread that dispatches it until the queue has room
+DROP_OLDEST_POLICY = "drop_oldest"
+DROP_NEWEST_POLICY = "drop_newest"
+BLOCK_POLICY = "block"
+QUEUE_OVERFLOW_POLICIES = (DROP_OLDEST_POLICY, DROP_NEWEST_POLICY, BLOCK_POLICY)
@@ -0,0 +1,54 @@
+"""Module for the pooled HTTP sessions of the REST matchers."""
+
+import gzip
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Seconds to wait for the connection to the exchange, and for its response
+REQUEST_TIMEOUT = (5., 30.)
+# Waits between retries are backoff_factor * 2 ** (retry - 1) seconds
+DEFAULT_BACKOFF_FACTOR = 0.2
+# Responses of the exchange that are retried, if the request is idempotent
+RETRIED_STATUS_CODES = (502, 503, 504)
+
+
+def create_http_session(pool_size: int, max_retries: int,
+                        backoff_factor: float = DEFAULT_BACKOFF_FACTOR) -> requests.Session:
+    """Create a session that keeps up to pool_size connections alive per host.
+
+    Failed connections are retried for all requests, since these were not sent. Requests that
+    fail with one of the RETRIED_STATUS_CODES are only retried if they are idempotent (e.g. GET),
+    so that recommendations are never submitted twice.
+
+    Args:
+        pool_size: maximum number of connections kept alive per host
+        max_retries: maximum number of retries of each request
+        backoff_factor: factor of the exponential wait between retries
+    """
+    retry = Retry(
+        total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+        backoff_factor=backoff_factor, status_forcelist=RETRIED_STATUS_CODES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, raise_on_status=False)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+def compress_body(body: Union[str, bytes], gzip_min_bytes: Optional[int]
+                  ) -> Tuple[Union[str, bytes], Dict[str, str]]:
+    """Gzip the request body if it is at least gzip_min_bytes long (None disables compression).
+
+    Returns: the body to send and the headers that describe its encoding
+    """
+    if gzip_min_bytes is None or len(body) < gzip_min_bytes:
+        return body, {}
+    if isinstance(body, str):
+        body = body.encode()
+    # Level 1 compresses JSON several times, at a fraction of the cost of the default level
+    return gzip.compress(body, compresslevel=1), {"Content-Encoding": "gzip"}
@@ -1,6 +1,40 @@
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # Imported eagerly by the type checkers and linters only
+    from gsy_matching_engine_sdk.matchers.async_redis_base_matcher import AsyncRedisBaseMatcher
+    from gsy_matching_engine_sdk.matchers.async_rest_base_matcher import AsyncRestBaseMatcher
+    from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+    from gsy_matching_engine_sdk.matchers.redis_streams_base_matcher import (
+        RedisStreamsBaseMatcher)
+    from gsy_matching_engine_sdk.matchers.rest_base_matcher import RestBaseMatcher
+
 __all__ = [
     "RestBaseMatcher",
-    "RedisBaseMatcher"
+    "RedisBaseMatcher",
+    "RedisStreamsBaseMatcher",
+    "AsyncRestBaseMatcher",
+    "AsyncRedisBaseMatcher"
 ]
-from .rest_base_matcher import RestBaseMatcher
-from .redis_base_matcher import RedisBaseMatcher
+
+# The matchers are imported on first access, so that only the stack of the used transport
+# (requests / websockets, redis or aiohttp) is loaded
+_MATCHER_MODULES = {
+    "RestBaseMatcher": ".rest_base_matcher",
+    "RedisBaseMatcher": ".redis_base_matcher",
+    "RedisStreamsBaseMatcher": ".redis_streams_base_matcher",
+    "AsyncRestBaseMatcher": ".async_rest_base_matcher",
+    "AsyncRedisBaseMatcher": ".async_redis_base_matcher",
+}
+
+
+def __getattr__(name):
+    if name not in _MATCHER_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    matcher = getattr(importlib.import_module(_MATCHER_MODULES[name], __name__), name)
+    globals()[name] = matcher
+    return matcher
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from abc import abstractmethod
+from typing import AsyncIterator, Dict, List
+
+from gsy_framework.data_classes import BidOfferMatch
+
+from gsy_matching_engine_sdk.matchers.async_event_dispatcher import AsyncEventDispatcher
+from gsy_matching_engine_sdk.matchers.connection_bootstrap import ConnectionBootstrap
+from gsy_matching_engine_sdk.matchers.matching_engine_matcher_client_interface import (
+    MatchingEngineMatcherClientInterface)
+from gsy_matching_engine_sdk.matchers.matching_engine_matcher_logger import (
+    MatchingEngineMatcherLogger)
+from gsy_matching_engine_sdk.matchers.order_book import OrderBook
+from gsy_matching_engine_sdk.matchers.recommendations_stream import RecommendationsStreamBuffer
+from gsy_matching_engine_sdk.serializers import get_serializer
+from gsy_matching_engine_sdk.utils import max_batch_recommendations_from_env
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncBaseMatcher(MatchingEngineMatcherClientInterface):
+    # pylint: disable=invalid-overridden-method
+    """Base class of the matchers that run on an asyncio event loop.
+
+    The hooks of MatchingEngineMatcherClientInterface are coroutines here, and the requests are
+    sent without blocking the loop. The events are handled by an AsyncEventDispatcher, with the
+    same queueing policy as the threaded matchers. Connecting happens in run(), that returns once
+    the simulation finishes:
+
+        asyncio.run(MyMatcher().run())
+    """
+
+    def __init__(self, serializer=None, record_path=None, metrics_port=None,
+                 stats_log_interval=None):
+        self.serializer = get_serializer(serializer)
+        # Messages received while connecting are handled once connected
+        self.bootstrap = ConnectionBootstrap()
+        # Events of the same type are handled serially, superseded ticks/responses are skipped
+        self.event_dispatcher = AsyncEventDispatcher(self, **self._get_event_queues_options())
+        self.is_finished = False
+        self._finished_event = asyncio.Event()
+
+        self.logger_helper = MatchingEngineMatcherLogger
+        self._markets_cache = None  # Cached information about markets and time slots
+        # Reverse index of the markets cache, mapping each time slot to its market type name
+        self._market_type_names_by_time_slot = {}
+        self.order_book = OrderBook()  # Open bids/offers, updated on every offers_bids_response
+        self._start_recording(record_path)
+        self._start_metrics(self.event_dispatcher, metrics_port, stats_log_interval)
+        self._start_memory_report()
+
+    async def run(self):
+        """Connect to the simulation and handle its events until it finishes."""
+        self._update_handled_events()
+        receiver_task = await self._connect_to_simulation()
+        finished_task = asyncio.create_task(self._finished_event.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {receiver_task, finished_task}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver_task in done:
+                receiver_task.result()  # Raise the error that closed the connection, if any
+        finally:
+            receiver_task.cancel()
+            finished_task.cancel()
+            await self.event_dispatcher.shutdown()
+            await self._close_connections()
+            if self.recorder is not None:
+                self.recorder.flush()
+
+    @abstractmethod
+    async def _connect_to_simulation(self) -> asyncio.Task:
+        """Start connecting to the simulation and return the task that receives its messages.
+
+        The handshakes continue in the background, and set self.bootstrap ready once done.
+        """
+
+    @abstractmethod
+    async def _close_connections(self):
+        """Close the connections opened by _connect_to_simulation."""
+
+    @abstractmethod
+    async def request_offers_bids(self, filters: Dict = None):
+        """Request the open offers/bids of the simulation."""
+
+    @abstractmethod
+    async def submit_matches(self, recommended_matches: List[BidOfferMatch.serializable_dict]):
+        """Post the recommended matches to the exchange."""
+
+    async def on_offers_bids_response(self, data: Dict):
+        recommendations = []
+        await self.submit_matches(recommendations)
+
+    async def iter_recommendations(
+            self, data: Dict) -> AsyncIterator[List[BidOfferMatch.serializable_dict]]:
+        """Asynchronous generator counterpart of the iter_recommendations hook."""
+        for recommendations in ():
+            yield recommendations
+
+    def _is_streaming_recommendations(self) -> bool:
+        return type(self).iter_recommendations is not AsyncBaseMatcher.iter_recommendations
+
+    async def _submit_streamed_recommendations(self, data: Dict):
+        stream_buffer = RecommendationsStreamBuffer(
+            self.max_batch_recommendations or max_batch_recommendations_from_env())
+        async for recommendations in self.iter_recommendations(data):
+            if self._is_matching_cancelled():
+                break
+            recommendations_to_submit = stream_buffer.add(recommendations)
+            if recommendations_to_submit:
+                await self.submit_matches(recommendations_to_submit)
+        recommendations_to_submit = stream_buffer.flush()
+        if recommendations_to_submit:
+            await self.submit_matches(recommendations_to_submit)
+
+    async def on_matched_recommendations_response(self, data: Dict):
+        pass
+
+    async def on_tick(self, data: Dict):
+        """Tick event handler."""
+
+    async def on_market_cycle(self, data: Dict):
+        """Market cycle event handler."""
+
+    async def on_finish(self, data: Dict):
+        """Finish event handler."""
+
+    async def on_event_or_response(self, data: Dict):
+        """Extra handler for all events/responses callbacks."""
+
+    async def on_area_map_response(self, data: Dict):
+        """Updated Area UUID Name map event handler."""
+
+    async def _on_offers_bids_response(self, data: Dict):
+        self.order_book.apply_snapshot(data.get("bids_offers") or {})
+        with self._track_matching_deadline() as deadline:
+            if deadline is not None and deadline.is_expired:
+                LOGGER.debug("Skipping the matching of the response of an expired tick.")
+                return
+            with self.metrics.time_stage("matching"):
+                if self._is_streaming_recommendations():
+                    await self._submit_streamed_recommendations(data)
+                else:
+                    await self.on_offers_bids_response(data=data)
+
+    async def _on_match(self, data: Dict):
+        self.logger_helper.log_recommendations_response_by_time_slot(
+            self._market_type_names_by_time_slot, data)
+        await self.on_matched_recommendations_response(data=data)
+
+    async def _on_tick(self, data: Dict):
+        self._cache_markets_information(data)
+        self.order_book.retain_time_slots(self._markets_cache)
+        await self.on_tick(data=data)
+
+    async def _on_market_cycle(self, data: Dict):
+        self._cancel_matching()
+        await self.on_market_cycle(data=data)
+        self._report_memory()
+
+    async def _on_finish(self, data: Dict):
+        try:
+            await self.on_finish(data=data)
+        finally:
+            self.is_finished = True
+            self._finished_event.set()
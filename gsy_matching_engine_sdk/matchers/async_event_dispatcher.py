@@ -0,0 +1,142 @@
+"""Module for the dispatcher of the events/responses received by asyncio matchers."""
+
+import asyncio
+import inspect
+import logging
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, Optional
+
+from gsy_matching_engine_sdk.constants import (
+    DEFAULT_MAX_QUEUE_SIZE, DROP_NEWEST_POLICY, DROP_OLDEST_POLICY)
+from gsy_matching_engine_sdk.matchers.event_dispatcher import (
+    DEFAULT_COALESCED_EVENTS, DEFAULT_LOSSLESS_EVENTS)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncEventDispatcher:
+    """Dispatch the received events/responses to the callbacks of a matcher on the event loop.
+
+    Counterpart of EventDispatcher for asyncio matchers, with the same queueing policy: every
+    event type has its own queue, processed serially in arrival order by its own task, while
+    events of different types are processed concurrently. Queued events of the coalesced types
+    are superseded by newer ones, the events of the lossless types are never dropped, and the
+    other queues apply the overflow_policy when full. The
+    "block" policy is not supported, since dispatching cannot wait without blocking the loop.
+
+    The callbacks can be either coroutine functions or plain functions.
+    """
+
+    def __init__(self, client, coalesced_events: Iterable[str] = DEFAULT_COALESCED_EVENTS,
+                 lossless_events: Iterable[str] = DEFAULT_LOSSLESS_EVENTS,
+                 max_queue_size: Optional[int] = DEFAULT_MAX_QUEUE_SIZE,
+                 overflow_policy: str = DROP_OLDEST_POLICY):
+        if overflow_policy not in (DROP_OLDEST_POLICY, DROP_NEWEST_POLICY):
+            raise ValueError(f"The queue overflow policy {overflow_policy!r} is not supported "
+                             f"by asyncio matchers.")
+        self.client = client
+        self.coalesced_events = set(coalesced_events)
+        self.lossless_events = set(lossless_events)
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self._queues: Dict[str, Deque[Dict]] = defaultdict(deque)
+        self._tasks: Dict[str, asyncio.Task] = {}  # Task that processes each event type
+        self._idle_event = asyncio.Event()  # Set when all queues are processed
+        self._idle_event.set()
+        self._processed_counts: Dict[str, int] = defaultdict(int)
+        self._coalesced_counts: Dict[str, int] = defaultdict(int)
+        self._dropped_counts: Dict[str, int] = defaultdict(int)
+        self._is_shut_down = False
+
+    def dispatch(self, data: Dict) -> None:
+        """Queue the event/response to be processed by the callbacks of the client.
+
+        Has to be called from the thread of the running event loop.
+        """
+        if self._is_shut_down:
+            return
+        event_type = data.get("event") or ""
+        queue = self._queues[event_type]
+        if queue and event_type in self.coalesced_events:
+            self._coalesced_counts[event_type] += len(queue)
+            queue.clear()
+        elif (self.max_queue_size and len(queue) >= self.max_queue_size
+              and event_type not in self.lossless_events):
+            self._dropped_counts[event_type] += 1
+            if self.overflow_policy == DROP_NEWEST_POLICY:
+                LOGGER.warning("The queue of %s events is full, dropping the new event.",
+                               event_type or "unknown")
+                return
+            queue.popleft()
+            LOGGER.warning("The queue of %s events is full, dropping the oldest event.",
+                           event_type or "unknown")
+        queue.append(data)
+        if event_type not in self._tasks:
+            self._idle_event.clear()
+            self._tasks[event_type] = asyncio.get_running_loop().create_task(
+                self._process_events(event_type))
+
+    async def _process_events(self, event_type: str) -> None:
+        queue = self._queues[event_type]
+        try:
+            while queue and not self._is_shut_down:
+                data = queue.popleft()
+                await self._execute_callback(
+                    self.client.on_event_or_response, "on_event_or_response", data)
+                callback_function_name = f"_on_{event_type}"
+                if event_type and hasattr(self.client, callback_function_name):
+                    await self._execute_callback(
+                        getattr(self.client, callback_function_name), callback_function_name,
+                        data)
+                self._processed_counts[event_type] += 1
+                # Yield to the other tasks, so that other event types get a fair share
+                await asyncio.sleep(0)
+        finally:
+            del self._tasks[event_type]
+            if not self._tasks:
+                self._idle_event.set()
+
+    @staticmethod
+    async def _execute_callback(callback_function, function_name: str, data: Dict) -> None:
+        try:
+            result = callback_function(data)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("%s raised an exception.", function_name)
+
+    async def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all dispatched events are processed; return False on timeout."""
+        try:
+            await asyncio.wait_for(self._idle_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    @property
+    def queue_depths(self) -> Dict[str, int]:
+        """Number of events waiting to be processed, per event type."""
+        # Copied first, since the metrics are collected from other threads
+        return {event_type: len(queue) for event_type, queue in list(self._queues.items())}
+
+    def get_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Return the queue depths and the processed/coalesced/dropped counts per event type."""
+        return {
+            "queue_depths": self.queue_depths,
+            "processed": dict(self._processed_counts),
+            "coalesced": dict(self._coalesced_counts),
+            "dropped": dict(self._dropped_counts),
+        }
+
+    async def shutdown(self, wait: bool = True) -> None:
+        """Stop dispatching events; the events still waiting in the queues are dropped.
+
+        Args:
+            wait: if True, wait for the events being processed to finish, otherwise cancel them
+        """
+        self._is_shut_down = True
+        tasks = [task for task in self._tasks.values() if task is not asyncio.current_task()]
+        if not wait:
+            for task in tasks:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
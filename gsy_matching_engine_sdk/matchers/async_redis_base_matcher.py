@@ -0,0 +1,227 @@
+import asyncio
+import inspect
+import logging
+from typing import Awaitable, Callable, Dict, Set
+
+from gsy_framework.client_connections.utils import log_market_progression
+from gsy_framework.redis_channels import SimulationCommandChannels, MatchingEngineChannels
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from redis.utils import str_if_bytes
+
+from gsy_matching_engine_sdk.matchers.async_base_matcher import AsyncBaseMatcher
+from gsy_matching_engine_sdk.matchers.connection_bootstrap import (
+    SIMULATION_ID_TIMEOUT_SECONDS, SimulationChannelPatterns)
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import AREA_MAP_RESPONSE
+from gsy_matching_engine_sdk.recorder import INBOUND, OUTBOUND
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _SubscriptionsPubSub(PubSub):
+    """PubSub that reports the confirmations of its pattern subscriptions to a coroutine function
+    (see the PubSub of RedisBaseMatcher)."""
+
+    def __init__(self, *args, on_pattern_subscribed: Callable[[str], Awaitable[None]], **kwargs):
+        super().__init__(*args, **kwargs)
+        self._on_pattern_subscribed = on_pattern_subscribed
+
+    async def handle_message(self, response, ignore_subscribe_messages=False):
+        if isinstance(response, list) and str_if_bytes(response[0]) == "psubscribe":
+            await self._on_pattern_subscribed(str_if_bytes(response[1]))
+        return await super().handle_message(response, ignore_subscribe_messages)
+
+
+class AsyncRedisBaseMatcher(AsyncBaseMatcher):
+    # pylint: disable=too-many-instance-attributes
+    """Handle order matching via an asyncio redis connection."""
+    def __init__(self, redis_url="redis://localhost:6379", serializer=None, record_path=None,
+                 metrics_port=None, stats_log_interval=None):
+        super().__init__(serializer=serializer, record_path=record_path,
+                         metrics_port=metrics_port, stats_log_interval=stats_log_interval)
+        self.redis_url = redis_url
+        self.simulation_id = None
+        self.redis_db = None
+        self.pubsub = None
+        self._bootstrap_channels = None
+        # Channel patterns of the simulation whose subscription is not confirmed yet; until they
+        # all are, the messages of the simulation are received via the bootstrap channels
+        self._unconfirmed_patterns: Set[str] = set()
+        self._is_subscribed_to_simulation = False
+        self._simulation_id_timeout = None
+
+    async def _connect_to_simulation(self) -> asyncio.Task:
+        """Request the simulation id, while already receiving the messages of all simulations.
+
+        The messages received before the id is known are buffered, and the ones of the
+        simulation are handled once it is (see RedisBaseMatcher._connect_to_simulation).
+        """
+        self.redis_db = Redis.from_url(self.redis_url)
+        self.pubsub = _SubscriptionsPubSub(
+            self.redis_db.connection_pool, on_pattern_subscribed=self._on_pattern_subscribed)
+        self._bootstrap_channels = SimulationChannelPatterns(self._get_response_channel_handlers)
+        await self.pubsub.subscribe(
+            **{MatchingEngineChannels(
+                self.simulation_id).simulation_id_response: self._set_simulation_id})
+        await self.pubsub.psubscribe(**{pattern: self._on_bootstrap_message
+                                        for pattern in self._bootstrap_channels.patterns})
+        receiver_task = asyncio.create_task(
+            self.pubsub.run(exception_handler=self._on_pubsub_exception))
+        self._simulation_id_timeout = asyncio.get_running_loop().call_later(
+            SIMULATION_ID_TIMEOUT_SECONDS,
+            lambda: asyncio.ensure_future(self._resolve_simulation_id("")))
+        await self.redis_db.publish(
+            MatchingEngineChannels(self.simulation_id).simulation_id, self.serializer.dumps({}))
+        return receiver_task
+
+    @staticmethod
+    def _on_pubsub_exception(exception: Exception, _pubsub):
+        LOGGER.error("Error while processing incoming message.", exc_info=exception)
+
+    async def _set_simulation_id(self, payload):
+        data = self.serializer.loads(payload["data"])
+        await self._resolve_simulation_id(data.get("simulation_id") or "")
+
+    async def _resolve_simulation_id(self, simulation_id: str):
+        """Subscribe to the channels of the simulation, in place of those of all simulations.
+
+        The channels of all simulations are only unsubscribed from once the subscription to the
+        ones of the simulation is confirmed, so that no message is published in between.
+        """
+        if self.simulation_id is not None:
+            return
+        self.simulation_id = simulation_id
+        # The patterns shared with the bootstrap channels are subscribed to already
+        self._unconfirmed_patterns = (set(self._get_response_channel_handlers(simulation_id)) -
+                                      set(self._bootstrap_channels.patterns))
+        LOGGER.debug("Received Simulation ID %s", self.simulation_id)
+        self._simulation_id_timeout.cancel()
+        await self.pubsub.unsubscribe(MatchingEngineChannels(None).simulation_id_response)
+        await self._subscribe_to_response_channels()
+        if not self._unconfirmed_patterns:
+            await self._on_subscribed_to_simulation()
+        # Prefetch the area map, and handle the messages received during the bootstrap
+        await self._publish(SimulationCommandChannels(simulation_id).area_map, "area_map", {})
+        self.bootstrap.set_ready(simulation_id)
+        LOGGER.info("Connection to gsy-e has been established.")
+
+    async def _on_pattern_subscribed(self, pattern: str):
+        if pattern not in self._unconfirmed_patterns:
+            return
+        self._unconfirmed_patterns.discard(pattern)
+        if not self._unconfirmed_patterns:
+            await self._on_subscribed_to_simulation()
+
+    async def _on_subscribed_to_simulation(self):
+        """Stop receiving the messages of all simulations, the simulation channels are live."""
+        self._is_subscribed_to_simulation = True
+        await self.pubsub.punsubscribe(
+            *(set(self._bootstrap_channels.patterns) -
+              set(self._get_response_channel_handlers(self.simulation_id))))
+
+    async def _on_bootstrap_message(self, payload: Dict):
+        """Buffer the message of a simulation whose id is not known yet.
+
+        Once the id is known, the messages of the simulation are still handled until the
+        subscription to its channels is confirmed.
+        """
+        if self._is_subscribed_to_simulation:
+            return  # Received via the channels of the simulation
+        pattern, channel = payload["pattern"], payload["channel"]
+        if isinstance(pattern, bytes):
+            pattern, channel = pattern.decode(), channel.decode()
+        simulation_id = self._bootstrap_channels.get_simulation_id(pattern, channel)
+        if simulation_id is None:
+            return
+        if not self.bootstrap.defer(
+                self._handle_bootstrap_message, simulation_id, pattern, payload):
+            # The id is resolved, before the subscription to the channels of the simulation
+            self._handle_bootstrap_message(simulation_id, pattern, payload)
+        elif simulation_id == "":
+            # Only the CLI simulations publish on the channels without id
+            await self._resolve_simulation_id("")
+
+    def _handle_bootstrap_message(self, simulation_id: str, pattern: str, payload: Dict):
+        if simulation_id != self.simulation_id:
+            return
+        handler = self._bootstrap_channels.get_handler(pattern)
+        if inspect.iscoroutinefunction(handler):
+            asyncio.ensure_future(handler(payload))
+        else:
+            handler(payload)
+
+    def _get_response_channel_handlers(self, simulation_id: str) -> Dict[str, Callable]:
+        return {
+            MatchingEngineChannels(simulation_id).events: self._on_event_or_response,
+            MatchingEngineChannels(simulation_id).response: self._on_event_or_response,
+            SimulationCommandChannels(simulation_id).response_channel("area-map"):
+                self._on_area_map_response
+        }
+
+    async def _subscribe_to_response_channels(self):
+        await self.pubsub.psubscribe(**self._get_response_channel_handlers(self.simulation_id))
+
+    async def _close_connections(self):
+        if self._simulation_id_timeout is not None:
+            self._simulation_id_timeout.cancel()
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+        if self.redis_db is not None:
+            await self.redis_db.aclose()
+
+    async def _publish(self, channel: str, kind: str, data: Dict):
+        """Encode and publish a request, keeping track of it in the recording and metrics."""
+        self._record_message(OUTBOUND, kind, data)
+        payload = self.serializer.dumps(data)
+        self._track_sent_message(kind, len(payload))
+        await self.redis_db.publish(channel, payload)
+
+    async def submit_matches(self, recommended_matches):
+        """Publish the recommendations, split into bounded messages sent in one round trip."""
+        if self._is_submission_cancelled(recommended_matches):
+            return
+        LOGGER.debug("Sending recommendations %s", recommended_matches)
+        channel = MatchingEngineChannels(self.simulation_id).recommendations
+        with self.metrics.time_stage("submit_matches"):
+            pipeline = self.redis_db.pipeline(transaction=False)
+            for batch in self._split_recommendations(recommended_matches):
+                self._track_sent_message("recommendations", len(batch.payload))
+                pipeline.publish(channel, batch.payload)
+            await pipeline.execute()
+
+    async def request_offers_bids(self, filters: Dict = None):
+        data = {"filters": filters}
+        await self._publish(
+            MatchingEngineChannels(self.simulation_id).offers_bids, "offers_bids", data)
+
+    async def request_area_id_name_map(self):
+        """Request area_id_name_map from simulation.
+
+        The area map is requested as soon as the simulation id is known, therefore the requests
+        sent before are skipped.
+        """
+        if not self.bootstrap.is_ready:
+            LOGGER.debug("The area map is requested once the simulation id is known.")
+            return
+        await self._publish(
+            SimulationCommandChannels(self.simulation_id).area_map, "area_map", {})
+
+    async def _on_area_map_response(self, payload: Dict):
+        if self.bootstrap.defer(
+                lambda: asyncio.ensure_future(self._on_area_map_response(payload))):
+            return
+        data = self.serializer.loads(payload["data"])
+        self._record_message(INBOUND, AREA_MAP_RESPONSE, data)
+        await self.on_area_map_response(data=data)
+
+    def _on_event_or_response(self, payload: Dict):
+        if self.bootstrap.defer(self._on_event_or_response, payload):
+            return
+        if self._is_unhandled_event(payload["data"]):
+            return
+        with self.metrics.time_stage("decode"):
+            data = self.serializer.loads(payload["data"])
+        self._track_received_message(data.get("event"), len(payload["data"]))
+        self._record_message(INBOUND, data.get("event") or "", data)
+        log_market_progression(data)
+        self.event_dispatcher.dispatch(data)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from typing import Dict, Union
+
+import aiohttp
+from gsy_framework.client_connections.utils import retrieve_jwt_key_from_server
+from gsy_framework.constants_limits import JWT_TOKEN_EXPIRY_IN_SECS
+
+from gsy_matching_engine_sdk.http_session import (
+    DEFAULT_BACKOFF_FACTOR, REQUEST_TIMEOUT, compress_body)
+from gsy_matching_engine_sdk.matchers.async_base_matcher import AsyncBaseMatcher
+from gsy_matching_engine_sdk.matchers.connection_bootstrap import (
+    AUTHENTICATION_HANDSHAKE, WEBSOCKET_HANDSHAKE, ConnectionBootstrap)
+from gsy_matching_engine_sdk.recorder import OUTBOUND
+from gsy_matching_engine_sdk.utils import (
+    domain_name_from_env, gzip_min_bytes_from_env, http_max_retries_from_env,
+    http_pool_size_from_env, simulation_id_from_env, websocket_domain_name_from_env)
+from gsy_matching_engine_sdk.websocket_connection import WebsocketConnection
+from gsy_matching_engine_sdk.websocket_device import WebsocketMessageReceiver
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncRestBaseMatcher(AsyncBaseMatcher):
+    # pylint: disable=too-many-instance-attributes
+    """Handle order matching via an asyncio rest/websocket connection."""
+    def __init__(self, simulation_id=None, domain_name=None, websocket_domain_name=None,
+                 serializer=None, record_path=None, metrics_port=None,
+                 stats_log_interval=None, http_pool_size=None, http_max_retries=None,
+                 gzip_min_bytes=None):
+        # pylint: disable=too-many-arguments
+        super().__init__(serializer=serializer, record_path=record_path,
+                         metrics_port=metrics_port, stats_log_interval=stats_log_interval)
+        # Events received before the matcher is authenticated are handled once it is
+        self.bootstrap = ConnectionBootstrap(
+            handshakes=(AUTHENTICATION_HANDSHAKE, WEBSOCKET_HANDSHAKE))
+        self.simulation_id = simulation_id if simulation_id else simulation_id_from_env()
+        self.domain_name = domain_name if domain_name else domain_name_from_env()
+        self.websocket_domain_name = (
+            websocket_domain_name if websocket_domain_name else websocket_domain_name_from_env())
+        self.url_prefix = f"{self.domain_name}/external-connection/api/{self.simulation_id}"
+        self.jwt_token = None
+        self.session = None
+        self.http_pool_size = http_pool_size if http_pool_size else http_pool_size_from_env()
+        self.http_max_retries = (
+            http_max_retries if http_max_retries is not None else http_max_retries_from_env())
+        # Request bodies of at least this size are gzipped (None: never)
+        self.gzip_min_bytes = gzip_min_bytes if gzip_min_bytes else gzip_min_bytes_from_env()
+        self._jwt_refresh_task = None
+        self._authentication_task = None
+        # The websocket receiver dispatches the events via the callback_thread of its client
+        self.callback_thread = self.event_dispatcher
+        self.dispatcher = WebsocketMessageReceiver(self)
+
+    async def _connect_to_simulation(self) -> asyncio.Task:
+        """Authenticate to GSy Exchange while the websocket connects.
+
+        The events received before the JWT of the requests is retrieved are handled once it is
+        (see self.bootstrap).
+        """
+        connect_timeout, read_timeout = REQUEST_TIMEOUT
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=self.http_pool_size),
+            timeout=aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout))
+        websocket_uri = f"{self.websocket_domain_name}/{self.simulation_id}/matching-engine/"
+        websocket_connection = WebsocketConnection(
+            websocket_uri, self.domain_name, self.dispatcher,
+            on_connected=self._on_websocket_connected)
+        self._authentication_task = asyncio.create_task(self._authenticate())
+        return asyncio.create_task(websocket_connection.receive_messages())
+
+    async def _authenticate(self):
+        try:
+            self.jwt_token = await asyncio.to_thread(
+                retrieve_jwt_key_from_server, self.domain_name)
+        except Exception as ex:  # pylint: disable=broad-except
+            LOGGER.exception("Authentication to %s failed.", self.domain_name)
+            self.bootstrap.set_failed(ex)
+            return
+        self._jwt_refresh_task = asyncio.create_task(self._refresh_jwt_token())
+        self.bootstrap.complete_handshake(AUTHENTICATION_HANDSHAKE, self.simulation_id)
+
+    def _on_websocket_connected(self):
+        LOGGER.info(
+            "Connection to gsy-e has been established (simulation_id: %s).", self.simulation_id)
+        self.bootstrap.complete_handshake(WEBSOCKET_HANDSHAKE, self.simulation_id)
+
+    async def _refresh_jwt_token(self):
+        while True:
+            await asyncio.sleep(JWT_TOKEN_EXPIRY_IN_SECS - 30)
+            self.jwt_token = await asyncio.to_thread(
+                retrieve_jwt_key_from_server, self.domain_name)
+
+    async def _close_connections(self):
+        for task in (self._authentication_task, self._jwt_refresh_task):
+            if task is not None:
+                task.cancel()
+        if self.session is not None:
+            await self.session.close()
+
+    async def submit_matches(self, recommended_matches):
+        """Post the recommendations, split into bounded messages that are posted concurrently."""
+        if self._is_submission_cancelled(recommended_matches):
+            return
+        if recommended_matches:
+            LOGGER.debug("Sending recommendations %s.", recommended_matches)
+            endpoint = f"{self.url_prefix}/recommendations"
+            with self.metrics.time_stage("submit_matches"):
+                await asyncio.gather(*(
+                    self._send_encoded_request("POST", endpoint, batch.payload)
+                    for batch in self._split_recommendations(recommended_matches)))
+
+    async def request_offers_bids(self, filters: Dict = None):
+        self._record_message(OUTBOUND, "offers_bids", {"filters": filters})
+        await self._get_request(f"{self.url_prefix}/offers-bids", {"filters": filters})
+
+    async def _send_request(self, method: str, endpoint: str, data: Dict) -> bool:
+        """Send the request with its body encoded by the configured serializer."""
+        return await self._send_encoded_request(method, endpoint, self.serializer.dumps(data))
+
+    async def _send_encoded_request(
+            self, method: str, endpoint: str, body: Union[str, bytes]) -> bool:
+        """Send the request with an already encoded body."""
+        # The kind of request is the last part of the endpoint, e.g. offers-bids -> offers_bids
+        request_kind = endpoint.rstrip("/").rsplit("/", 1)[-1].replace("-", "_")
+        self._track_sent_message(request_kind, len(body))
+        body, headers = compress_body(body, self.gzip_min_bytes)
+        headers.update({"Authorization": f"JWT {self.jwt_token}",
+                        "Content-Type": "application/json"})
+        for retry in range(self.http_max_retries + 1):
+            if retry:
+                await asyncio.sleep(DEFAULT_BACKOFF_FACTOR * 2 ** (retry - 1))
+            try:
+                async with self.session.request(
+                        method, endpoint, data=body, headers=headers) as response:
+                    if not response.ok:
+                        LOGGER.error("Request to %s failed with status code %s: %s.",
+                                     endpoint, response.status, await response.text())
+                    return response.ok
+            except aiohttp.ClientConnectorError as ex:
+                # The request was not sent, therefore it can be retried whatever its method
+                LOGGER.warning("Connection to %s failed (retry %s): %s.", endpoint, retry, ex)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                LOGGER.error("Request to %s failed: %s.", endpoint, ex)
+                return False
+        return False
+
+    async def _post_request(self, endpoint, data):
+        return await self._send_request("POST", endpoint, data)
+
+    async def _get_request(self, endpoint, data):
+        return await self._send_request("GET", endpoint, data)
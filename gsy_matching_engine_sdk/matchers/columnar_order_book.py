@@ -0,0 +1,229 @@
+"""Module for the compact, array-backed representation of the bids/offers of a payload."""
+
+import sys
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Numerical attributes of the orders, stored in float64 arrays
+NUMERIC_FIELDS = ("energy", "energy_rate", "price", "original_price")
+
+_MISSING = object()  # Value of the attributes that an order does not have
+_NUMBER_TYPES = {int, float}
+
+
+class ValueInterner:
+    """Share one object between the equal strings and trader dicts of the converted orders.
+
+    The ids, names and uuids of the traders are repeated in every order they post, and the
+    buyer/seller sub-dicts are identical for all orders of the same trader.
+    """
+
+    def __init__(self):
+        self._dicts: Dict[Tuple, Dict] = {}
+
+    def __len__(self):
+        return len(self._dicts)
+
+    def intern(self, value: Any) -> Any:
+        """Return the shared object that is equal to the value (or the value itself)."""
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, dict):
+            key = tuple(value.items())
+            try:
+                shared_value = self._dicts.get(key)
+            except TypeError:  # Nested lists/dicts, that are not shared
+                return value
+            if shared_value is None:
+                shared_value = {name: self.intern(item) for name, item in value.items()}
+                self._dicts[key] = shared_value
+            return shared_value
+        return value
+
+    def clear(self) -> None:
+        """Forget the shared dicts."""
+        self._dicts.clear()
+
+
+class ColumnarOrders:
+    """Bids or offers of one market / time slot, stored as one column per attribute.
+
+    The numerical attributes that all orders have are float64 arrays, the other attributes are
+    lists of (interned) values. The order dicts are only rebuilt on demand, by get_order.
+    """
+    __slots__ = ("_size", "_arrays", "_columns")
+
+    def __init__(self, orders: List[Dict], interner: Optional[ValueInterner] = None):
+        """
+        Args:
+            orders: list of bid/offer dicts, in the format of the offers_bids_response payload
+            interner: interner of the strings and trader dicts, shared by the orders of a book
+        """
+        if interner is None:
+            interner = ValueInterner()
+        self._size = len(orders)
+        field_names = {}  # Dict used as an insertion-ordered set
+        for order in orders:
+            field_names.update(dict.fromkeys(order))
+
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._columns: Dict[str, List] = {}
+        for name in field_names:
+            try:
+                values = list(map(itemgetter(name), orders))
+            except KeyError:
+                values = [order.get(name, _MISSING) for order in orders]
+            value_types = set(map(type, values))
+            if name in NUMERIC_FIELDS and value_types <= _NUMBER_TYPES:
+                self._arrays[name] = np.array(values, dtype=np.float64)
+            elif value_types == {str}:
+                self._columns[name] = list(map(sys.intern, values))
+            else:
+                intern = interner.intern
+                self._columns[name] = [
+                    value if value is _MISSING else intern(value) for value in values]
+
+    def __len__(self):
+        return self._size
+
+    def _get_array(self, name: str) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            if self._size:
+                raise ValueError(f"The orders do not all have a numerical {name}.")
+            return np.empty(0, dtype=np.float64)
+        return array
+
+    @property
+    def energies(self) -> np.ndarray:
+        """Energy of each order."""
+        return self._get_array("energy")
+
+    @property
+    def energy_rates(self) -> np.ndarray:
+        """Energy rate of each order."""
+        return self._get_array("energy_rate")
+
+    @property
+    def ids(self) -> List[str]:
+        """Id of each order."""
+        return self._columns.get("id", [])
+
+    def get_order(self, index: int) -> Dict:
+        """Rebuild the dict of the order at the given position."""
+        order = {}
+        for name, values in self._columns.items():
+            value = values[index]
+            if value is not _MISSING:
+                # Shared trader dicts are copied, so that callers can modify the returned order
+                order[name] = dict(value) if isinstance(value, dict) else value
+        for name, array in self._arrays.items():
+            order[name] = float(array[index])
+        return order
+
+    def to_dicts(self) -> List[Dict]:
+        """Rebuild the dicts of all orders."""
+        return [self.get_order(index) for index in range(self._size)]
+
+
+class ColumnarPartition:
+    """Bids and offers of one market / time slot."""
+    __slots__ = ("market_id", "time_slot", "bids", "offers")
+
+    def __init__(self, market_id: str, time_slot: str, bids: ColumnarOrders,
+                 offers: ColumnarOrders):
+        self.market_id = market_id
+        self.time_slot = time_slot
+        self.bids = bids
+        self.offers = offers
+
+    def __len__(self):
+        return len(self.bids) + len(self.offers)
+
+    def to_matching_data(self) -> Dict:
+        """Return the partition in the format expected by the matching algorithms."""
+        return {"bids": self.bids.to_dicts(), "offers": self.offers.to_dicts()}
+
+
+class ColumnarOrderBook:
+    """Columnar view of the bids_offers payload of an offers_bids_response event.
+
+    Converting the payload lets the matcher drop the order dicts, which take several times the
+    memory of the columns. The SDK matching algorithms accept the view instead of the payload:
+    the pay-as-clear algorithm only rebuilds the dicts of the matched orders, the other ones the
+    dicts of one market / time slot at a time:
+
+        order_book = ColumnarOrderBook.from_bids_offers(data.pop("bids_offers"))
+        recommendations = VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations(
+            order_book)
+    """
+
+    def __init__(self):
+        self._partitions: Dict[Tuple[str, str], ColumnarPartition] = {}
+        self._interner = ValueInterner()
+
+    @classmethod
+    def from_bids_offers(cls, bids_offers: Dict) -> "ColumnarOrderBook":
+        """Create the view of a bids_offers payload.
+
+        Args:
+            bids_offers: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+        """
+        order_book = cls()
+        order_book.update(bids_offers)
+        return order_book
+
+    def __len__(self):
+        return sum(len(partition) for partition in self._partitions.values())
+
+    def __iter__(self) -> Iterator[ColumnarPartition]:
+        return iter(list(self._partitions.values()))
+
+    def get_partition(self, market_id: str, time_slot: str) -> Optional[ColumnarPartition]:
+        """Return the partition of the market / time slot (None if it is not in the view)."""
+        return self._partitions.get((market_id, time_slot))
+
+    def update(self, bids_offers: Dict) -> None:
+        """Replace the partitions of the view with the ones of the bids_offers payload."""
+        for market_id, time_slot_data in bids_offers.items():
+            market_id = sys.intern(market_id)
+            for time_slot, data in time_slot_data.items():
+                time_slot = sys.intern(time_slot)
+                self._partitions[(market_id, time_slot)] = ColumnarPartition(
+                    market_id, time_slot,
+                    ColumnarOrders(data.get("bids") or [], self._interner),
+                    ColumnarOrders(data.get("offers") or [], self._interner))
+
+    def iter_matching_data(
+            self, nearest_first: bool = False) -> Iterator[Tuple[str, str, Dict]]:
+        """Iterate over the partitions in the format expected by the matching algorithms.
+
+        The dicts of the orders are rebuilt one partition at a time, for the algorithms that
+        need them (e.g. to check the requirements of the orders).
+
+        Args:
+            nearest_first: if True, the nearest delivery time slots are yielded first
+
+        Yields: (market_id, time_slot, {"bids": [...], "offers": [...]})
+        """
+        partitions = list(self._partitions.values())
+        if nearest_first:
+            # Time slots are ISO 8601 strings, therefore their lexicographic order is chronological
+            partitions.sort(key=lambda partition: partition.time_slot)
+        for partition in partitions:
+            yield partition.market_id, partition.time_slot, partition.to_matching_data()
+
+    def to_matching_data(self) -> Dict:
+        """Return the view in the format of the bids_offers payload."""
+        matching_data = {}
+        for partition in self._partitions.values():
+            matching_data.setdefault(partition.market_id, {})[partition.time_slot] = (
+                partition.to_matching_data())
+        return matching_data
+
+    def clear(self) -> None:
+        """Remove all partitions of the view."""
+        self._partitions.clear()
+        self._interner.clear()
@@ -0,0 +1,158 @@
+"""Module for the non-blocking bootstrap of the connections of the matchers.
+
+The matchers start receiving the messages of their simulation while their handshakes (e.g. the
+resolution of the simulation id or the authentication) are still in progress. The messages
+received in the meantime are buffered by a ConnectionBootstrap, and handled in order once all
+handshakes have succeeded.
+"""
+
+import logging
+import re
+from collections import deque
+from concurrent.futures import Future
+from threading import Lock, get_ident
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for the simulation id, before using the default id of CLI simulations
+SIMULATION_ID_TIMEOUT_SECONDS = 50
+# Messages buffered until the matcher is ready, the oldest ones are dropped beyond this number
+MAX_BUFFERED_MESSAGES = 1000
+# Handshakes of the REST matchers, that run concurrently: the matcher is ready once both succeed
+AUTHENTICATION_HANDSHAKE = "authentication"
+WEBSOCKET_HANDSHAKE = "websocket"
+# Placeholder used to derive the channel patterns of all simulations from the channel names
+SIMULATION_ID_PLACEHOLDER = "__simulation_id__"
+
+
+def get_channel_regex(channel_template: str) -> re.Pattern:
+    """Return the regex that extracts the simulation id from the channels of the template."""
+    return re.compile(
+        re.escape(channel_template).replace(re.escape("*"), ".*").replace(
+            SIMULATION_ID_PLACEHOLDER, "(?P<simulation_id>[^/]+)") + "$")
+
+
+class ConnectionBootstrap:
+    """Buffer the messages received before the matcher is ready, and handle them once it is.
+
+    The matcher is ready once all its handshakes are completed. The ready future then resolves
+    to the simulation id, or fails with the error of the handshake that failed.
+    """
+
+    def __init__(self, handshakes: Iterable[str] = (),
+                 max_buffered_messages: int = MAX_BUFFERED_MESSAGES):
+        """
+        Args:
+            handshakes: names of the handshakes to complete, if set_ready is not called directly
+            max_buffered_messages: maximum number of buffered messages
+        """
+        self.ready = Future()
+        self.is_ready = False  # Cheaper to check than the future, for every received message
+        self._lock = Lock()
+        self._pending_handshakes = set(handshakes)
+        self._messages: Deque[Tuple[Callable, Tuple]] = deque(maxlen=max_buffered_messages)
+        self._replaying_thread = None
+
+    def defer(self, handler: Callable, *args) -> bool:
+        """Buffer the call of the handler with the args until the matcher is ready.
+
+        Returns: False if the message should be handled right away, i.e. if the matcher is ready
+            or if the message is one of the buffered ones being handled
+        """
+        if self.is_ready or self._replaying_thread == get_ident():
+            return False
+        with self._lock:
+            if self.is_ready:
+                return False
+            if self.ready.done():
+                return True  # The connection failed, the messages cannot be handled
+            if len(self._messages) == self._messages.maxlen:
+                LOGGER.warning("Dropping the oldest message received before the connection to "
+                               "the simulation was established.")
+            self._messages.append((handler, args))
+        return True
+
+    def complete_handshake(self, handshake: str, simulation_id: Optional[str]) -> None:
+        """Mark the handshake as completed, and set the matcher ready if it was the last one."""
+        with self._lock:
+            self._pending_handshakes.discard(handshake)
+            if self._pending_handshakes:
+                return
+        self.set_ready(simulation_id)
+
+    def set_ready(self, simulation_id: Optional[str]) -> None:
+        """Handle the buffered messages in order, then resolve the ready future.
+
+        The messages received meanwhile by other threads wait until the buffered ones are handled.
+        """
+        with self._lock:
+            if self.is_ready or self.ready.done():
+                return
+            self._replaying_thread = get_ident()
+            try:
+                while self._messages:
+                    handler, args = self._messages.popleft()
+                    try:
+                        handler(*args)
+                    except Exception:  # pylint: disable=broad-except
+                        LOGGER.exception("Error while handling a message buffered during the "
+                                         "connection to the simulation.")
+            finally:
+                self._replaying_thread = None
+            self.is_ready = True
+        self.ready.set_result(simulation_id)
+
+    def set_failed(self, exception: BaseException) -> None:
+        """Drop the buffered messages and fail the ready future."""
+        with self._lock:
+            if self.is_ready or self.ready.done():
+                return
+            self._messages.clear()
+        self.ready.set_exception(exception)
+
+
+class SimulationChannelPatterns:
+    """Channel patterns of all simulations, used to receive messages before the id is known.
+
+    The patterns match the channels of any simulation id, and those of the default id of the
+    CLI simulations (""). Each message is attributed to the simulation of its channel.
+    """
+
+    def __init__(self, get_channel_handlers: Callable[[str], Dict[str, Callable]]):
+        """
+        Args:
+            get_channel_handlers: function that maps the channels (or channel patterns) of the
+                given simulation id to the handlers of their messages
+        """
+        self._simulation_regexes: Dict[str, re.Pattern] = {}
+        self._handlers: Dict[str, Callable] = {}
+        for channel_template, handler in get_channel_handlers(SIMULATION_ID_PLACEHOLDER).items():
+            pattern = channel_template.replace(SIMULATION_ID_PLACEHOLDER, "*")
+            self._simulation_regexes[pattern] = get_channel_regex(channel_template)
+            self._handlers[pattern] = handler
+        self._default_regexes = {channel: get_channel_regex(channel)
+                                 for channel in get_channel_handlers("")}
+        self._handlers.update(get_channel_handlers(""))
+
+    @property
+    def patterns(self) -> List[str]:
+        """Patterns of the channels of all simulations."""
+        return list(self._handlers)
+
+    def get_handler(self, pattern: str) -> Callable:
+        """Return the handler of the messages received via the pattern."""
+        return self._handlers[pattern]
+
+    def get_simulation_id(self, pattern: str, channel: str) -> Optional[str]:
+        """Return the simulation id of a message received via the pattern on the channel.
+
+        Returns: None if the channel belongs to none of the patterns, or if the message is
+            a copy received via another pattern that also matches the channel
+        """
+        for simulation_pattern, regex in self._simulation_regexes.items():
+            match = regex.match(channel)
+            if match is not None:
+                return match.group("simulation_id") if pattern == simulation_pattern else None
+        regex = self._default_regexes.get(pattern)
+        return "" if regex is not None and regex.match(channel) else None
@@ -0,0 +1,206 @@
+"""Module for the dispatcher of the events/responses received by Matching Engine matchers."""
+
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import Executor
+from concurrent.futures.thread import ThreadPoolExecutor
+from threading import Condition, Lock
+from typing import Deque, Dict, Iterable, Optional, Set
+
+from gsy_framework.utils import execute_function_util
+
+from gsy_matching_engine_sdk.constants import (
+    BLOCK_POLICY, DEFAULT_MAX_QUEUE_SIZE, DROP_NEWEST_POLICY, DROP_OLDEST_POLICY,
+    MAX_WORKER_THREADS, QUEUE_OVERFLOW_POLICIES)
+
+LOGGER = logging.getLogger(__name__)
+
+# Events whose queued instances are superseded by newer events of the same type
+DEFAULT_COALESCED_EVENTS = ("tick", "offers_bids_response")
+# Events that are never dropped, since the state of the matcher depends on each of them (e.g. a
+# lost finish event would keep the matcher waiting for the end of the simulation forever)
+DEFAULT_LOSSLESS_EVENTS = ("market_cycle", "finish", "match")
+
+
+class EventDispatcher:
+    # pylint: disable=too-many-instance-attributes
+    """Dispatch the received events/responses to the callbacks of a matcher on a worker pool.
+
+    Every event type has its own queue, whose events are processed serially in arrival order,
+    while events of different types can be processed concurrently by the workers. For each event,
+    the on_event_or_response hook of the matcher is called before its _on_<event> callback.
+
+    Events of the coalesced types only need their latest instance to be processed: when a new
+    event of these types arrives, the ones still waiting in the queue are dropped. The events of
+    the lossless types (the lifecycle events of the simulation, and the responses to the
+    recommendations) are neither coalesced nor dropped, and their queues are unbounded; they are
+    rare compared to the ticks and the offers/bids responses. The queues of the other event types
+    are bounded by max_queue_size, and the overflow_policy applies to the events dispatched to a
+    full queue:
+        - "drop_oldest" (default): the oldest queued event is dropped to make room for it;
+        - "drop_newest": the dispatched event is dropped;
+        - "block": the dispatching thread waits until the queue has room. The thread that reads
+          the messages from the connection stops reading meanwhile, leaving the backlog to the
+          connection (e.g. the output buffer of the Redis server). Do not dispatch from the
+          callbacks of the matcher with this policy, since they could wait for themselves.
+
+    Except with the "block" policy, dispatching never blocks, therefore it is safe to call it
+    from the threads that read the messages from the connection.
+
+    The worker pool can be shared by the dispatchers of several matchers, by passing it as the
+    executor; it is then not shut down with the dispatcher.
+    """
+
+    def __init__(self, client, max_workers: int = MAX_WORKER_THREADS,
+                 coalesced_events: Iterable[str] = DEFAULT_COALESCED_EVENTS,
+                 lossless_events: Iterable[str] = DEFAULT_LOSSLESS_EVENTS,
+                 max_queue_size: Optional[int] = DEFAULT_MAX_QUEUE_SIZE,
+                 executor: Optional[Executor] = None,
+                 overflow_policy: str = DROP_OLDEST_POLICY):
+        # pylint: disable=too-many-arguments
+        if overflow_policy not in QUEUE_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown queue overflow policy {overflow_policy!r}, expected one "
+                             f"of {QUEUE_OVERFLOW_POLICIES}.")
+        self.client = client
+        self.coalesced_events = set(coalesced_events)
+        self.lossless_events = set(lossless_events)
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self._owns_executor = executor is None
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers) if executor is None else executor)
+        self._lock = Lock()
+        self._idle_condition = Condition(self._lock)  # Notified when all queues are processed
+        self._dequeued_condition = Condition(self._lock)  # Notified when an event is dequeued
+        self._queues: Dict[str, Deque[Dict]] = defaultdict(deque)
+        self._active_event_types: Set[str] = set()  # Event types scheduled on the executor
+        self._processed_counts: Dict[str, int] = defaultdict(int)
+        self._coalesced_counts: Dict[str, int] = defaultdict(int)
+        self._dropped_counts: Dict[str, int] = defaultdict(int)
+        self._is_shut_down = False
+
+    def dispatch(self, data: Dict) -> None:
+        """Queue the event/response to be processed by the callbacks of the client."""
+        event_type = data.get("event") or ""
+        with self._lock:
+            if self._is_shut_down:
+                return
+            queue = self._queues[event_type]
+            if queue and event_type in self.coalesced_events:
+                self._coalesced_counts[event_type] += len(queue)
+                queue.clear()
+            elif (self.max_queue_size and len(queue) >= self.max_queue_size
+                  and event_type not in self.lossless_events):
+                if self.overflow_policy == BLOCK_POLICY:
+                    self._dequeued_condition.wait_for(
+                        lambda: self._is_shut_down or len(queue) < self.max_queue_size)
+                    if self._is_shut_down:
+                        return
+                elif self.overflow_policy == DROP_NEWEST_POLICY:
+                    self._dropped_counts[event_type] += 1
+                    LOGGER.warning("The queue of %s events is full, dropping the new event.",
+                                   event_type or "unknown")
+                    return
+                else:
+                    queue.popleft()
+                    self._dropped_counts[event_type] += 1
+                    LOGGER.warning("The queue of %s events is full, dropping the oldest event.",
+                                   event_type or "unknown")
+            queue.append(data)
+            if event_type not in self._active_event_types:
+                self._active_event_types.add(event_type)
+                self._executor.submit(self._process_next_event, event_type)
+
+    def _process_next_event(self, event_type: str) -> None:
+        with self._lock:
+            data = self._queues[event_type].popleft()
+            self._dequeued_condition.notify_all()
+
+        execute_function_util(
+            function=lambda: self.client.on_event_or_response(data),
+            function_name="on_event_or_response")
+        callback_function_name = f"_on_{event_type}"
+        if event_type and hasattr(self.client, callback_function_name):
+            callback_function = getattr(self.client, callback_function_name)
+            execute_function_util(
+                function=lambda: callback_function(data),
+                function_name=callback_function_name)
+
+        with self._lock:
+            self._processed_counts[event_type] += 1
+            if self._queues[event_type] and not self._is_shut_down:
+                # Resubmit instead of looping, so that other event types get a fair share
+                self._executor.submit(self._process_next_event, event_type)
+            else:
+                self._active_event_types.discard(event_type)
+                if not self._active_event_types:
+                    self._idle_condition.notify_all()
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until all dispatched events are processed; return False on timeout."""
+        with self._idle_condition:
+            return self._idle_condition.wait_for(
+                lambda: not self._active_event_types, timeout=timeout)
+
+    def wait_for_capacity(self, max_queued_events: int, min_capacity: int = 1,
+                          timeout: Optional[float] = None) -> int:
+        """Block until at least min_capacity events can be dispatched before max_queued_events
+        events wait in the queues.
+
+        Lets the readers of a connection bound how far they read ahead of the processing, and
+        read in batches of at least min_capacity events.
+
+        Returns: the number of events that can be dispatched before max_queued_events are queued
+            (0 on timeout, or if the dispatcher is shut down)
+        """
+        with self._dequeued_condition:
+            if not self._dequeued_condition.wait_for(
+                    lambda: self._is_shut_down or (
+                        max_queued_events - self._get_queued_count() >= min_capacity),
+                    timeout=timeout) or self._is_shut_down:
+                return 0
+            return max_queued_events - self._get_queued_count()
+
+    def _get_queued_count(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def executor(self) -> Executor:
+        """Worker pool that processes the events."""
+        return self._executor
+
+    @property
+    def is_shut_down(self) -> bool:
+        """True once the dispatcher is shut down."""
+        return self._is_shut_down
+
+    @property
+    def queue_depths(self) -> Dict[str, int]:
+        """Number of events waiting to be processed, per event type."""
+        with self._lock:
+            return {event_type: len(queue) for event_type, queue in self._queues.items()}
+
+    def get_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Return the queue depths and the processed/coalesced/dropped counts per event type."""
+        with self._lock:
+            return {
+                "queue_depths": {
+                    event_type: len(queue) for event_type, queue in self._queues.items()},
+                "processed": dict(self._processed_counts),
+                "coalesced": dict(self._coalesced_counts),
+                "dropped": dict(self._dropped_counts),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop dispatching events; the events still waiting in the queues are dropped.
+
+        Args:
+            wait: if True, block until the events being processed are finished
+        """
+        with self._lock:
+            self._is_shut_down = True
+            self._dequeued_condition.notify_all()
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+        elif wait:
+            self.wait_until_idle()
@@ -0,0 +1,151 @@
+"""Module for the sharding of the markets of a simulation across several matcher workers."""
+
+import hashlib
+import logging
+import uuid
+from functools import partial
+from threading import Event, Lock, Thread
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 10.
+SHARDING_KEY_PREFIX = "gsy-matching-engine/shards"
+
+
+def _get_rendezvous_score(worker_id: str, market_id: str) -> int:
+    # A stable hash is required, since the scores are compared across processes and nodes
+    return int.from_bytes(
+        hashlib.blake2b(f"{worker_id}/{market_id}".encode(), digest_size=8).digest(), "big")
+
+
+def assign_markets(market_ids: Iterable[str], worker_ids: Iterable[str]) -> Dict[str, str]:
+    """Assign each market to a worker with rendezvous hashing.
+
+    Every market is assigned to the worker with the highest score for it, therefore only the
+    markets of the workers that join or leave are reassigned.
+
+    Returns: {market_id: worker_id}
+    """
+    worker_ids = list(worker_ids)
+    if not worker_ids:
+        return {}
+    return {market_id: max(worker_ids, key=partial(_get_rendezvous_score, market_id=market_id))
+            for market_id in market_ids}
+
+
+class MarketSharding:
+    # pylint: disable=too-many-instance-attributes
+    """Claim a disjoint subset of the markets of a simulation, among the workers of a group.
+
+    The workers of a group register themselves in a Redis sorted set, scored by the expiry time
+    of their lease, and renew their lease periodically. The live workers are the ones with an
+    unexpired lease; each one computes the same assignment of the markets to the live workers
+    with rendezvous hashing, and keeps the markets assigned to itself. Workers that join or
+    leave (or stop renewing their lease) cause a rebalance of the markets on the next renewal.
+
+    Leases are compared to the clock of the Redis server, so the workers can run on any node.
+    """
+
+    def __init__(self, redis_db, group_name: str, worker_id: Optional[str] = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        Args:
+            redis_db: Redis connection used as the membership store
+            group_name: name of the group of workers that share the markets
+            worker_id: unique id of this worker (defaults to a random one)
+            lease_seconds: duration after which a worker that stopped renewing its lease leaves
+        """
+        self.redis_db = redis_db
+        self.group_name = group_name
+        self.worker_id = worker_id or str(uuid.uuid4())
+        self.lease_seconds = lease_seconds
+        self.workers_key = f"{SHARDING_KEY_PREFIX}/{group_name}/workers"
+        self._lock = Lock()
+        self._market_ids: FrozenSet[str] = frozenset()
+        self._worker_ids: List[str] = []
+        self._shard: FrozenSet[str] = frozenset()
+        self._stop_renewing = Event()
+        self._renewing_thread = None
+
+    @property
+    def shard(self) -> FrozenSet[str]:
+        """Ids of the markets assigned to this worker."""
+        return self._shard
+
+    @property
+    def worker_ids(self) -> List[str]:
+        """Ids of the live workers of the group, as of the latest lease renewal."""
+        return self._worker_ids
+
+    def start(self) -> None:
+        """Join the group and renew the lease in a background thread."""
+        self.renew_lease()
+        self._renewing_thread = Thread(target=self._renew_lease_periodically, daemon=True)
+        self._renewing_thread.start()
+
+    def stop(self) -> None:
+        """Leave the group, so that the other workers take over the markets of this one."""
+        self._stop_renewing.set()
+        self.redis_db.zrem(self.workers_key, self.worker_id)
+
+    def _renew_lease_periodically(self) -> None:
+        while not self._stop_renewing.wait(self.lease_seconds / 3):
+            try:
+                self.renew_lease()
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Failed to renew the lease of worker %s.", self.worker_id)
+
+    def renew_lease(self) -> None:
+        """Extend the lease of this worker, and update the live workers and the shard."""
+        seconds, microseconds = self.redis_db.time()
+        now = seconds + microseconds / 1e6
+        pipeline = self.redis_db.pipeline()
+        pipeline.zadd(self.workers_key, {self.worker_id: now + self.lease_seconds})
+        pipeline.zremrangebyscore(self.workers_key, "-inf", now)
+        pipeline.zrange(self.workers_key, 0, -1)
+        # Keep the set of an abandoned group from living forever
+        pipeline.expire(self.workers_key, int(self.lease_seconds * 10))
+        worker_ids = pipeline.execute()[2]
+        with self._lock:
+            self._worker_ids = sorted(
+                worker_id.decode() if isinstance(worker_id, bytes) else worker_id
+                for worker_id in worker_ids)
+            self._update_shard()
+
+    def set_markets(self, market_ids: Iterable[str]) -> None:
+        """Set the ids of the markets to be shared, e.g. the ones of the area map."""
+        with self._lock:
+            self._market_ids = frozenset(market_ids)
+            self._update_shard()
+
+    def _update_shard(self) -> None:
+        worker_ids = self._worker_ids or [self.worker_id]
+        shard = frozenset(
+            market_id for market_id, worker_id in assign_markets(
+                self._market_ids, worker_ids).items()
+            if worker_id == self.worker_id)
+        if shard != self._shard:
+            LOGGER.info("Worker %s (1 of %s in group %s) now matches %s of %s markets.",
+                        self.worker_id, len(worker_ids), self.group_name, len(shard),
+                        len(self._market_ids))
+        self._shard = shard
+
+    def filter_markets(self, market_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """Return the given markets (by default all markets) that belong to the shard."""
+        shard = self._shard
+        if market_ids is None:
+            return sorted(shard)
+        return [market_id for market_id in market_ids if market_id in shard]
+
+    def filter_request_filters(self, filters: Optional[Dict]) -> Dict:
+        """Restrict the markets of the filters of an offers_bids request to the shard."""
+        filters = dict(filters or {})
+        filters["markets"] = self.filter_markets(filters.get("markets"))
+        return filters
+
+    def filter_recommendations(self, recommendations: List[Dict]) -> List[Dict]:
+        """Return the recommendations whose market belongs to the shard."""
+        shard = self._shard
+        return [recommendation for recommendation in recommendations
+                if recommendation["market_id"] in shard]
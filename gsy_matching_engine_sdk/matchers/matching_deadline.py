@@ -0,0 +1,39 @@
+"""Module for the time budget of the matching of one offers/bids response."""
+
+import math
+import time
+from typing import Optional
+
+
+class MatchingDeadline:
+    """Time budget of the matching triggered by a tick, cancelled when its market cycle ends.
+
+    Matching algorithms that accept a deadline check it between units of work (e.g. markets /
+    time slots, processed best first), and return the results computed so far once it expires.
+    """
+
+    def __init__(self, budget: Optional[float] = None, start_time: Optional[float] = None):
+        """
+        Args:
+            budget: seconds available for the matching (None for no time limit)
+            start_time: time.perf_counter() at which the budget starts (defaults to now)
+        """
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.end_time = math.inf if budget is None else self.start_time + budget
+        self.is_cancelled = False
+
+    def cancel(self) -> None:
+        """Expire the deadline immediately, e.g. because the market cycle has ended."""
+        self.is_cancelled = True
+
+    @property
+    def remaining(self) -> float:
+        """Seconds left before the deadline (0 if cancelled, inf if there is no time limit)."""
+        if self.is_cancelled:
+            return 0.
+        return max(self.end_time - time.perf_counter(), 0.)
+
+    @property
+    def is_expired(self) -> bool:
+        """True if the budget is exhausted or the deadline is cancelled."""
+        return self.is_cancelled or time.perf_counter() >= self.end_time
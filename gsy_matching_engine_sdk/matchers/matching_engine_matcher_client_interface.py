@@ -1,8 +1,39 @@
+import logging
+import sys
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from contextlib import contextmanager
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Union
 
 from gsy_framework.data_classes import BidOfferMatch
 
+from gsy_matching_engine_sdk.matchers.connection_bootstrap import ConnectionBootstrap
+from gsy_matching_engine_sdk.matchers.market_sharding import MarketSharding
+from gsy_matching_engine_sdk.matchers.matching_engine_matcher_logger import (
+    MatchingEngineMatcherLogger)
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matchers.recommendations_batches import (
+    RecommendationsBatch, split_recommendations)
+from gsy_matching_engine_sdk.matchers.recommendations_stream import RecommendationsStreamBuffer
+from gsy_matching_engine_sdk.memory_report import MemoryReport
+from gsy_matching_engine_sdk.metrics import MatcherMetrics, create_matcher_metrics
+from gsy_matching_engine_sdk.recorder import INBOUND, OUTBOUND, EventRecorder
+from gsy_matching_engine_sdk.serializers import BaseSerializer, peek_event_type
+from gsy_matching_engine_sdk.utils import (
+    matching_deadline_from_env, max_batch_bytes_from_env, max_batch_recommendations_from_env,
+    max_queue_size_from_env, memory_report_from_env, metrics_port_from_env,
+    queue_overflow_policy_from_env, record_path_from_env, shard_group_from_env,
+    stats_log_interval_from_env)
+
+LOGGER = logging.getLogger(__name__)
+
+# Events whose base callback only forwards them to these hooks, therefore they are handled only
+# if one of the hooks is implemented by the matcher
+OPTIONAL_EVENT_HOOKS = {
+    "offers_bids_response": ("on_offers_bids_response", "iter_recommendations"),
+    "match": ("on_matched_recommendations_response",),
+}
+
 
 class MatchingEngineMatcherClientInterface(ABC):
     """Interface for Matching Engine API clients, that support different communication protocols.
@@ -11,7 +42,51 @@ class MatchingEngineMatcherClientInterface(ABC):
     support.
     """
 
+    serializer: BaseSerializer  # Encodes/decodes the exchanged payloads
+    # Buffers the messages received while connecting, its ready future resolves once connected
+    bootstrap: ConnectionBootstrap
     _markets_cache: Dict[str, Dict]  # Cached information about markets and time slots
+    # Reverse index of the markets cache, mapping each time slot to its market type name
+    _market_type_names_by_time_slot: Dict[str, str]
+    # Records the inbound events and outbound requests, if recording is enabled
+    recorder: Optional[EventRecorder] = None
+    metrics: MatcherMetrics = MatcherMetrics(enabled=False)  # Replaced by _start_metrics
+    # Logs the traced memory on every market cycle, if enabled
+    memory_report: Optional[MemoryReport] = None
+    # Restricts the requests and recommendations to the markets of this worker, if sharded
+    market_sharding: Optional[MarketSharding] = None
+    # Bounds of the messages that submit recommendations (default to the env variables)
+    max_batch_recommendations: Optional[int] = None
+    max_batch_bytes: Optional[int] = None
+    # Bound of the queue of each event type, and policy of the full queues (see EventDispatcher,
+    # default to the env variables)
+    max_queue_size: Optional[int] = None
+    queue_overflow_policy: Optional[str] = None
+    # Seconds after a tick by which its matching has to finish (defaults to the env variable)
+    matching_deadline: Optional[float] = None
+    # Deadline of the offers/bids response being matched, to be passed to the matching
+    # algorithms that accept one (None outside of the matching, or without a time budget)
+    deadline: Optional[MatchingDeadline] = None
+    # Matching in progress, tracked also without a time budget, so that it can be cancelled
+    # when its market cycle ends (None outside of the matching)
+    _matching_in_progress: Optional[MatchingDeadline] = None
+    deadline_misses: int = 0  # Matchings that ran out of time or outlived their market cycle
+    # Events decoded and dispatched by the matcher, the others are dropped before decoding them
+    # (None if all events are handled)
+    handled_events: Optional[FrozenSet[str]] = None
+    _last_tick_received_at: Optional[float] = None
+    _offers_bids_requested_at: Optional[float] = None
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Block until the matcher is connected to its simulation, and return the simulation id.
+
+        The matchers connect in the background, this is only needed by code that has to send
+        requests before the first event is received. Asyncio code can await
+        asyncio.wrap_future(matcher.bootstrap.ready) instead.
+
+        Raises: the error of the connection if it failed, TimeoutError after the timeout
+        """
+        return self.bootstrap.ready.result(timeout)
 
     @abstractmethod
     def request_offers_bids(self, filters: Dict):
@@ -31,6 +106,41 @@ class MatchingEngineMatcherClientInterface(ABC):
         Returns: None
         """
 
+    def iter_recommendations(self, data: Dict) -> Iterator[List[BidOfferMatch.serializable_dict]]:
+        """Yield the recommendations of the bids/offers response progressively.
+
+        If overridden, this generator replaces on_offers_bids_response: the recommendations are
+        submitted in batches while it is still running, e.g. after matching each market / time
+        slot. Iterate over the partitions with recommendations_stream.iter_partitions to match
+        the nearest delivery time slots first.
+
+        Args:
+            data: same as the data of on_offers_bids_response
+
+        Yields: lists of recommended trades List[BidOfferMatch.serializable_dict()]
+        """
+        del data  # Nothing is streamed unless the method is overridden
+        yield from ()
+
+    def _is_streaming_recommendations(self) -> bool:
+        """Return True if the matcher overrides iter_recommendations."""
+        return (type(self).iter_recommendations is not
+                MatchingEngineMatcherClientInterface.iter_recommendations)
+
+    def _submit_streamed_recommendations(self, data: Dict):
+        """Submit the recommendations yielded by iter_recommendations as they are yielded."""
+        stream_buffer = RecommendationsStreamBuffer(
+            self.max_batch_recommendations or max_batch_recommendations_from_env())
+        for recommendations in self.iter_recommendations(data):
+            if self._is_matching_cancelled():
+                break
+            recommendations_to_submit = stream_buffer.add(recommendations)
+            if recommendations_to_submit:
+                self.submit_matches(recommendations_to_submit)
+        recommendations_to_submit = stream_buffer.flush()
+        if recommendations_to_submit:
+            self.submit_matches(recommendations_to_submit)
+
     @abstractmethod
     def on_matched_recommendations_response(self, data: Dict):
         """This method will be called when the sent recommendations' response is returned.
@@ -74,11 +184,202 @@ class MatchingEngineMatcherClientInterface(ABC):
                 "<market-id-1>": {"type_name": "<market-type-name>", "time_slots": [...]}
                 "<market-id-2>": {"type_name": "<market-type-name>", "time_slots": [...]}
             }
+
+        The ids, names and time slots are interned: each tick decodes them again, while the
+        cache, its reverse index and the keys of the order book share a single copy of each.
         """
-        markets_info = data["markets_info"]
-        # Convert the list of time slots of each market into a set for improved performance
-        for market_id, market_info in markets_info.items():
-            time_slots = market_info["time_slots"]
-            markets_info[market_id]["time_slots"] = set(time_slots)
+        markets_info = {}
+        market_type_names_by_time_slot = {}
+        for market_id, market_info in data["markets_info"].items():
+            type_name = sys.intern(market_info["type_name"])
+            time_slots = [sys.intern(time_slot) for time_slot in market_info["time_slots"]]
+            # Convert the list of time slots of each market into a set for improved performance
+            markets_info[sys.intern(market_id)] = {
+                **market_info, "type_name": type_name, "time_slots": set(time_slots)}
+            for time_slot in time_slots:
+                # If several markets contain the time slot, the first one is used
+                market_type_names_by_time_slot.setdefault(time_slot, type_name)
+        data["markets_info"] = markets_info
 
         self._markets_cache = markets_info  # Replace existing cache
+        self._market_type_names_by_time_slot = market_type_names_by_time_slot
+
+    def _is_hook_implemented(self, hook_name: str) -> bool:
+        """Return True if the hook is implemented by a class outside of the base matchers."""
+        for cls in type(self).__mro__:
+            if hook_name in vars(cls):
+                return not cls.__module__.startswith(f"{__package__}.")
+        return False
+
+    def _update_handled_events(self):
+        """Work out the events handled by the matcher, before subscribing to them."""
+        self.handled_events = self._get_handled_events()
+
+    def _get_handled_events(self) -> Optional[FrozenSet[str]]:
+        """Return the events that the matcher handles, i.e. that have a callback with effects.
+
+        Called before subscribing to the events, the result is stored in handled_events.
+
+        Returns: None if all events are handled, because the matcher implements
+            on_event_or_response or records the received events
+        """
+        if self.recorder is not None or self._is_hook_implemented("on_event_or_response"):
+            return None
+        handled_events = set()
+        for cls in type(self).__mro__:
+            handled_events.update(name[len("_on_"):] for name in vars(cls)
+                                  if name.startswith("_on_") and callable(getattr(cls, name)))
+        for event_type, hook_names in OPTIONAL_EVENT_HOOKS.items():
+            if not any(self._is_hook_implemented(hook_name) for hook_name in hook_names):
+                handled_events.discard(event_type)
+        if MatchingEngineMatcherLogger.is_logging_recommendations():
+            handled_events.add("match")
+        return frozenset(handled_events)
+
+    def _is_unhandled_event(self, payload: Union[str, bytes]) -> bool:
+        """Return True if the encoded event should be dropped without decoding it, since the
+        matcher does not handle its type (read from the payload header).
+        """
+        if self.handled_events is None:
+            return False
+        event_type = peek_event_type(payload)
+        if event_type is None or event_type in self.handled_events:
+            return False
+        self.metrics.increment("skipped_events", event_type)
+        return True
+
+    @contextmanager
+    def _track_matching_deadline(self):
+        """Set the deadline of the matching of an offers/bids response during the block.
+
+        The budget starts when the latest tick was received. Without a budget, the block yields
+        None and self.deadline stays None, so that the algorithms match without a time limit
+        (e.g. in the order of the payload); the matching can still be cancelled when its market
+        cycle ends, and its recommendations are then dropped. Deadlines that expire before the
+        end of the block are counted as misses, labelled "market_cycle" if their market cycle
+        ended, or "expired" if they ran out of time.
+        """
+        budget = self.matching_deadline or matching_deadline_from_env()
+        matching = MatchingDeadline(
+            budget, start_time=self._last_tick_received_at if budget else None)
+        self._matching_in_progress = matching
+        self.deadline = matching if budget else None
+        try:
+            yield self.deadline
+        finally:
+            self.deadline = None
+            self._matching_in_progress = None
+            if matching.is_expired:
+                reason = "market_cycle" if matching.is_cancelled else "expired"
+                LOGGER.debug("The matching missed its deadline (%s).", reason)
+                self.deadline_misses += 1
+                self.metrics.increment("deadline_misses", reason)
+
+    def _cancel_matching(self):
+        """Cancel the matching in progress, since the market cycle of its orders has ended."""
+        matching = self._matching_in_progress
+        if matching is not None:
+            matching.cancel()
+
+    def _is_matching_cancelled(self) -> bool:
+        """Return True if the recommendations being calculated belong to an ended market cycle.
+        """
+        matching = self._matching_in_progress
+        return matching is not None and matching.is_cancelled
+
+    def _is_submission_cancelled(self, recommended_matches: List[Dict]) -> bool:
+        """Return True if the recommendations should be dropped, since they were calculated for
+        the orders of an ended market cycle.
+        """
+        if not self._is_matching_cancelled():
+            return False
+        LOGGER.debug("Dropping %s recommendations of an ended market cycle.",
+                     len(recommended_matches))
+        self.metrics.increment(
+            "cancelled_recommendations", "market_cycle", len(recommended_matches))
+        return True
+
+    def _start_recording(self, record_path: Optional[str] = None):
+        """Record all exchanged messages in the given file (or the one set in the env variables).
+
+        Recordings can be replayed offline with gsy_matching_engine_sdk.replay.ReplayDriver.
+        """
+        record_path = record_path or record_path_from_env()
+        if record_path:
+            self.recorder = EventRecorder(record_path, serializer=self.serializer)
+
+    def _record_message(self, direction: str, kind: str, payload: Any):
+        """Append the message to the recording, if recording is enabled."""
+        if self.recorder is not None:
+            self.recorder.record(direction, kind, payload)
+
+    def _start_metrics(self, event_dispatcher, metrics_port: Optional[int] = None,
+                       stats_log_interval: Optional[float] = None):
+        """Enable the metrics if they are exported via HTTP or logged (see MatcherMetrics)."""
+        self.metrics = create_matcher_metrics(
+            metrics_port or metrics_port_from_env(),
+            stats_log_interval or stats_log_interval_from_env())
+        self.metrics.register_collector("events", event_dispatcher.get_metrics)
+
+    def _get_event_queues_options(self) -> Dict:
+        """Return the bound and overflow policy of the event queues, as dispatcher arguments."""
+        return {
+            "max_queue_size": self.max_queue_size or max_queue_size_from_env(),
+            "overflow_policy": self.queue_overflow_policy or queue_overflow_policy_from_env()}
+
+    def _start_memory_report(self):
+        """Trace the memory allocations, if they are reported on every market cycle according to
+        the env variables.
+        """
+        if memory_report_from_env():
+            self.memory_report = MemoryReport()
+
+    def _report_memory(self):
+        """Log the traced memory of the market cycle that ended, if the report is enabled."""
+        if self.memory_report is not None:
+            self.memory_report.report(f"of market cycle {self.memory_report.reports_count + 1}")
+
+    def _start_market_sharding(self, redis_db, shard_group: Optional[str] = None):
+        """Share the markets with the other workers of the group (or the one set in the env
+        variables), using the Redis connection as the membership store (see MarketSharding).
+        """
+        shard_group = shard_group or shard_group_from_env()
+        if shard_group:
+            self.market_sharding = MarketSharding(redis_db, shard_group)
+            self.market_sharding.start()
+
+    def _split_recommendations(
+            self, recommended_matches: List[Dict]) -> List[RecommendationsBatch]:
+        """Split the recommendations into the messages that submit them, and record these."""
+        batches = split_recommendations(
+            recommended_matches, self.serializer,
+            max_batch_recommendations=(
+                self.max_batch_recommendations or max_batch_recommendations_from_env()),
+            max_batch_bytes=self.max_batch_bytes or max_batch_bytes_from_env())
+        for batch in batches:
+            self._record_message(OUTBOUND, "recommendations", batch.data)
+        return batches
+
+    def _track_received_message(self, event: str, size: int):
+        """Update the metrics that depend on the arrival time of the received messages."""
+        if event == "tick":
+            # Also the start of the matching deadline
+            self._last_tick_received_at = time.perf_counter()
+        if not self.metrics.enabled:
+            return
+        self.metrics.observe_message_size(INBOUND, size)
+        if event == "offers_bids_response" and self._offers_bids_requested_at is not None:
+            self.metrics.observe_stage_duration(
+                "offers_bids_round_trip", time.perf_counter() - self._offers_bids_requested_at)
+            self._offers_bids_requested_at = None
+
+    def _track_sent_message(self, kind: str, size: int):
+        """Update the metrics that depend on the sending time of the requests."""
+        if not self.metrics.enabled:
+            return
+        self.metrics.observe_message_size(OUTBOUND, size)
+        if kind == "offers_bids":
+            self._offers_bids_requested_at = time.perf_counter()
+        elif kind == "recommendations" and self._last_tick_received_at is not None:
+            self.metrics.observe_stage_duration(
+                "tick_to_submit", time.perf_counter() - self._last_tick_received_at)
@@ -1,7 +1,7 @@
 """Module for the logger used by Matching Engine matcher classes."""
 
 import logging
-from typing import Dict, Optional
+from typing import Dict
 
 from gsy_framework.constants_limits import DEFAULT_PRECISION
 from tabulate import tabulate
@@ -13,18 +13,22 @@ LOGGER = logging.getLogger(__name__)
 class MatchingEngineMatcherLogger:
     """Custom logger used by instances of MatchingEngine matchers."""
 
+    @classmethod
+    def is_logging_recommendations(cls) -> bool:
+        """Return True if the responses of the recommendations are logged."""
+        return LOGGER.isEnabledFor(logging.INFO)
+
     @staticmethod
-    def _get_market_type_name_by_time_slot(
-            markets_info: Dict[str, Dict], time_slot: str) -> Optional[str]:
-        """Iterate through all market objects to find the one that contains the current time slot.
+    def _get_market_type_names_by_time_slot(markets_info: Dict[str, Dict]) -> Dict[str, str]:
+        """Map each time slot to the type name of the market that contains it.
 
         NOTE: Future market objects contain multiple time slots.
         """
+        market_type_names_by_time_slot = {}
         for market_info in markets_info.values():
-            if time_slot in market_info["time_slots"]:
-                return market_info["type_name"]
-
-        return None
+            for time_slot in market_info["time_slots"]:
+                market_type_names_by_time_slot.setdefault(time_slot, market_info["type_name"])
+        return market_type_names_by_time_slot
 
     @classmethod
     def log_recommendations_response(cls, markets_info: Dict, data: Dict) -> None:
@@ -37,6 +41,27 @@ class MatchingEngineMatcherLogger:
                     "<market-id-2>": {"type_name": "<market-type-name>", "time_slots": {...}}
                 }
         """
+        if not cls.is_logging_recommendations():
+            return
+        cls.log_recommendations_response_by_time_slot(
+            cls._get_market_type_names_by_time_slot(markets_info), data)
+
+    @classmethod
+    def log_recommendations_response_by_time_slot(
+            cls, market_type_names_by_time_slot: Dict[str, str], data: Dict) -> None:
+        """Log the response data of recommendations sent to the clearing mechanism.
+
+        Same as log_recommendations_response, with the market types already indexed by time slot
+        (e.g. once per tick by the matchers). The table of recommendations is only built if the
+        INFO level is enabled.
+
+        Args:
+            market_type_names_by_time_slot: a dictionary mapping each time slot to the type name
+                of the market that contains it (future markets contain multiple time slots):
+                {"<time-slot-1>": "<market-type-name>", "<time-slot-2>": "<market-type-name>"}
+        """
+        if not cls.is_logging_recommendations():
+            return
         recommendations = data["recommendations"]
         if not recommendations:
             return
@@ -56,7 +81,7 @@ class MatchingEngineMatcherLogger:
 
         for recommendation in recommendations:
             time_slot = recommendation["time_slot"]
-            market_type_name = cls._get_market_type_name_by_time_slot(markets_info, time_slot)
+            market_type_name = market_type_names_by_time_slot.get(time_slot)
             bid = recommendation["bid"]
             offer = recommendation["offer"]
             offer_data = (f"{round(offer['energy'], DEFAULT_PRECISION)}-"
@@ -0,0 +1,130 @@
+"""Module for the cache of the recommendations of unchanged markets / time slots."""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+
+DEFAULT_MAX_CACHED_PARTITIONS = 1000
+DEFAULT_MAX_REJECTED_RECOMMENDATIONS = 10000
+
+
+def _get_order_version(order: Dict) -> Tuple:
+    """Attributes of an order that change whenever the order is (partially) traded or updated."""
+    return order["id"], order["energy"], order["energy_rate"]
+
+
+def _get_partition_fingerprint(data: Dict) -> int:
+    return hash((
+        tuple(sorted(_get_order_version(bid) for bid in data.get("bids") or [])),
+        tuple(sorted(_get_order_version(offer) for offer in data.get("offers") or []))))
+
+
+def _get_recommendation_version(recommendation: Dict) -> Tuple:
+    return (_get_order_version(recommendation["bid"]),
+            _get_order_version(recommendation["offer"]),
+            recommendation["selected_energy"])
+
+
+class MatchingResultsCache:
+    """Memoize the recommendations of each market / time slot partition of the bids_offers.
+
+    Partitions whose orders did not change since the previous call reuse their previous
+    recommendations, and the other ones are matched with the wrapped algorithm in one call, so
+    that it can still process them in parallel (e.g. a ParallelMatchingRunner).
+
+    Recommendations rejected by the exchange (see register_recommendations_response) are not
+    submitted again as long as their bid and offer keep the same version.
+
+    Both the cached partitions and the rejected recommendations are evicted in LRU order once
+    they exceed their maximum size, and are cleared on every market cycle.
+    """
+
+    def __init__(self, matching_algorithm,
+                 max_cached_partitions: int = DEFAULT_MAX_CACHED_PARTITIONS,
+                 max_rejected_recommendations: int = DEFAULT_MAX_REJECTED_RECOMMENDATIONS):
+        self.matching_algorithm = matching_algorithm
+        self.max_cached_partitions = max_cached_partitions
+        self.max_rejected_recommendations = max_rejected_recommendations
+        self._lock = Lock()
+        # (market_id, time_slot) -> (fingerprint, recommendations)
+        self._cached_results: OrderedDict = OrderedDict()
+        self._rejected_recommendations: OrderedDict = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get_matches_recommendations(
+            self, matching_data: Dict, deadline: Optional[MatchingDeadline] = None) -> List[Dict]:
+        """Return the recommendations of all partitions, matching only the changed ones.
+
+        Args:
+            matching_data: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+            deadline: passed to the wrapped algorithm, that has to accept it. The results of a
+                matching that missed its deadline may be partial, therefore they are not cached.
+        """
+        recommendations = []
+        changed_data = {}
+        fingerprints = {}
+        with self._lock:
+            for market_id, time_slot_data in matching_data.items():
+                for time_slot, data in time_slot_data.items():
+                    key = (market_id, time_slot)
+                    fingerprint = _get_partition_fingerprint(data)
+                    cached_result = self._cached_results.get(key)
+                    if cached_result is not None and cached_result[0] == fingerprint:
+                        self._cached_results.move_to_end(key)
+                        recommendations.extend(cached_result[1])
+                        self.hits += 1
+                    else:
+                        changed_data.setdefault(market_id, {})[time_slot] = data
+                        fingerprints[key] = fingerprint
+                        self.misses += 1
+
+        if changed_data:
+            if deadline is None:
+                new_recommendations = self.matching_algorithm.get_matches_recommendations(
+                    changed_data)
+            else:
+                new_recommendations = self.matching_algorithm.get_matches_recommendations(
+                    changed_data, deadline=deadline)
+                if deadline.is_expired:
+                    fingerprints.clear()  # Unmatched partitions are not distinguishable
+            recommendations_by_partition = {key: [] for key in fingerprints}
+            for recommendation in new_recommendations:
+                recommendations_by_partition.setdefault(
+                    (recommendation["market_id"], recommendation["time_slot"]), []
+                ).append(recommendation)
+            with self._lock:
+                for key, fingerprint in fingerprints.items():
+                    self._cached_results[key] = (fingerprint, recommendations_by_partition[key])
+                    self._cached_results.move_to_end(key)
+                while len(self._cached_results) > self.max_cached_partitions:
+                    self._cached_results.popitem(last=False)
+            recommendations.extend(new_recommendations)
+
+        with self._lock:
+            return [recommendation for recommendation in recommendations
+                    if _get_recommendation_version(recommendation)
+                    not in self._rejected_recommendations]
+
+    def register_recommendations_response(self, data: Dict) -> None:
+        """Remember the recommendations that the exchange rejected, to avoid resubmitting them.
+
+        Args:
+            data: the payload of the matched recommendations response
+        """
+        with self._lock:
+            for recommendation in data.get("recommendations") or []:
+                if recommendation.get("status") == "success":
+                    continue
+                version = _get_recommendation_version(recommendation)
+                self._rejected_recommendations[version] = None
+                self._rejected_recommendations.move_to_end(version)
+            while len(self._rejected_recommendations) > self.max_rejected_recommendations:
+                self._rejected_recommendations.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget all cached results and rejected recommendations."""
+        with self._lock:
+            self._cached_results.clear()
+            self._rejected_recommendations.clear()
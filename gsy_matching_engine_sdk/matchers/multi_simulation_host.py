@@ -0,0 +1,237 @@
+"""Module for the host that runs the matchers of many simulations in one process."""
+
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures.thread import ThreadPoolExecutor
+from threading import Event, Lock
+from typing import Dict, Iterable, Optional, Type
+
+from gsy_framework.redis_channels import MatchingEngineChannels, SimulationCommandChannels
+from redis import Redis
+
+from gsy_matching_engine_sdk.matchers.connection_bootstrap import (
+    SIMULATION_ID_PLACEHOLDER, get_channel_regex)
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+from gsy_matching_engine_sdk.metrics import create_matcher_metrics
+from gsy_matching_engine_sdk.utils import (
+    max_worker_threads_from_env, metrics_port_from_env, record_path_from_env,
+    stats_log_interval_from_env)
+
+LOGGER = logging.getLogger(__name__)
+
+# Value of the simulation ids that enables the discovery of the simulations from their events
+DISCOVER_SIMULATIONS = "*"
+# Number of finished simulations remembered, so that their late messages do not start them again
+MAX_FINISHED_SIMULATIONS = 1000
+
+
+def _get_simulation_record_path(record_path: str, simulation_id: str) -> str:
+    """Insert the simulation id in the name of the recording, e.g. session-<id>.jsonl.gz."""
+    directory, file_name = os.path.split(record_path)
+    stem, separator, extensions = file_name.partition(".")
+    return os.path.join(directory, f"{stem}-{simulation_id}{separator}{extensions}")
+
+
+class _HostedRedisTransportMixin:
+    """Transport of a matcher that shares the connection and worker pool of its host."""
+
+    def __init__(self, *args, host: "MultiSimulationRedisHost" = None,
+                 simulation_id: str = None, **kwargs):
+        self._host = host
+        self._hosted_simulation_id = simulation_id
+        super().__init__(*args, redis_db=host.redis_db, pubsub_thread=host.pubsub,
+                         worker_pool=host.worker_pool, **kwargs)
+
+    def _connect_to_simulation(self):
+        # The host subscribes to the channels of all simulations and routes their messages
+        self.simulation_id = self._hosted_simulation_id
+        self._host._register_matcher(  # pylint: disable=protected-access
+            self._hosted_simulation_id, self)
+        self._finish_bootstrap()
+
+    def _start_recording(self, record_path: Optional[str] = None):
+        record_path = record_path or record_path_from_env()
+        if record_path:
+            super()._start_recording(
+                _get_simulation_record_path(record_path, self._hosted_simulation_id))
+
+    def _start_metrics(self, _event_dispatcher, metrics_port: Optional[int] = None,
+                       stats_log_interval: Optional[float] = None):
+        # The host exports the metrics of all its matchers together
+        if metrics_port or stats_log_interval:
+            LOGGER.warning(
+                "The metrics_port and stats_log_interval of the matcher of simulation %s are "
+                "ignored, the metrics of the host are configured via the environment variables.",
+                self._hosted_simulation_id)
+        self.metrics = self._host.metrics
+
+    def _on_finish(self, data: Dict):
+        try:
+            super()._on_finish(data)
+        finally:
+            self._host.remove_simulation(self._hosted_simulation_id)
+
+
+class MultiSimulationRedisHost:
+    # pylint: disable=too-many-instance-attributes
+    """Run one matcher instance per simulation, sharing one Redis connection and worker pool.
+
+    Instead of subscribing to the channels of each simulation, the host subscribes to the
+    channel patterns of all simulations once, and routes every message to the matcher of its
+    simulation. The matchers publish their requests via the shared connection pool, and their
+    events are handled by a shared pool of threads (still serially per matcher and event type).
+
+    Matchers are created for the given simulation ids. If the ids contain DISCOVER_SIMULATIONS,
+    a matcher is also created for every unknown simulation whose events are received. The
+    matcher of a simulation is removed once it handles the finish event.
+    """
+
+    def __init__(self, matcher_class: Type[RedisBaseMatcher], simulation_ids: Iterable[str],
+                 redis_url: str = "redis://localhost:6379", max_workers: Optional[int] = None,
+                 matcher_kwargs: Optional[Dict] = None):
+        """
+        Args:
+            matcher_class: subclass of RedisBaseMatcher, instantiated for each simulation
+            simulation_ids: ids of the simulations, possibly including DISCOVER_SIMULATIONS
+            redis_url: URL of the Redis server shared by all simulations
+            max_workers: number of threads that handle the events of all matchers
+            matcher_kwargs: extra keyword arguments of the matchers
+        """
+        # pylint: disable=too-many-arguments
+        simulation_ids = list(simulation_ids)
+        self.discover_simulations = DISCOVER_SIMULATIONS in simulation_ids
+        self.matcher_kwargs = matcher_kwargs or {}
+        self.redis_db = Redis.from_url(redis_url)
+        self.pubsub = self.redis_db.pubsub()
+        self.worker_pool = ThreadPoolExecutor(
+            max_workers=max_workers if max_workers else max_worker_threads_from_env())
+        self.metrics = create_matcher_metrics(
+            metrics_port_from_env(), stats_log_interval_from_env())
+        self.metrics.register_collector("events", self._get_event_metrics)
+        self.matchers: Dict[str, RedisBaseMatcher] = {}
+        self._matcher_class = type(
+            f"Hosted{matcher_class.__name__}", (_HostedRedisTransportMixin, matcher_class), {})
+        self._lock = Lock()
+        self._starting_simulations = set()
+        # Least recently finished simulations first, bounded by MAX_FINISHED_SIMULATIONS
+        self._finished_simulations: OrderedDict[str, None] = OrderedDict()
+        self._finished = Event()
+        self._channel_regexes = {}
+
+        self._subscribe_to_response_channels()
+        self.pubsub_thread = self.pubsub.run_in_thread(
+            daemon=True, exception_handler=self._on_pubsub_exception)
+        for simulation_id in simulation_ids:
+            if simulation_id != DISCOVER_SIMULATIONS:
+                self.add_simulation(simulation_id)
+        self._check_is_finished()
+
+    @staticmethod
+    def _on_pubsub_exception(exception: Exception, _pubsub, _pubsub_thread):
+        LOGGER.error("Error while processing incoming message.", exc_info=exception)
+
+    def _subscribe_to_response_channels(self):
+        channel_templates = {
+            MatchingEngineChannels(SIMULATION_ID_PLACEHOLDER).events:
+                self._on_event_or_response,
+            MatchingEngineChannels(SIMULATION_ID_PLACEHOLDER).response:
+                self._on_event_or_response,
+            SimulationCommandChannels(SIMULATION_ID_PLACEHOLDER).response_channel("area-map"):
+                self._on_area_map_response
+        }
+        channel_subs = {}
+        for channel_template, callback in channel_templates.items():
+            pattern = channel_template.replace(SIMULATION_ID_PLACEHOLDER, "*")
+            self._channel_regexes[pattern] = get_channel_regex(channel_template)
+            channel_subs[pattern] = callback
+        self.pubsub.psubscribe(**channel_subs)
+
+    def add_simulation(self, simulation_id: str) -> None:
+        """Create the matcher of the simulation, unless it already exists or is finished."""
+        with self._lock:
+            if (simulation_id in self.matchers or simulation_id in self._starting_simulations
+                    or simulation_id in self._finished_simulations):
+                return
+            self._starting_simulations.add(simulation_id)
+        try:
+            self._matcher_class(host=self, simulation_id=simulation_id, **self.matcher_kwargs)
+            LOGGER.info("Started matching for simulation %s.", simulation_id)
+        finally:
+            with self._lock:
+                self._starting_simulations.discard(simulation_id)
+
+    def _register_matcher(self, simulation_id: str, matcher: RedisBaseMatcher) -> None:
+        """Route the messages of the simulation to the matcher (called while it is created)."""
+        with self._lock:
+            self.matchers[simulation_id] = matcher
+
+    def remove_simulation(self, simulation_id: str) -> None:
+        """Stop routing the messages of the simulation to its matcher."""
+        with self._lock:
+            matcher = self.matchers.pop(simulation_id, None)
+            self._finished_simulations[simulation_id] = None
+            self._finished_simulations.move_to_end(simulation_id)
+            if len(self._finished_simulations) > MAX_FINISHED_SIMULATIONS:
+                self._finished_simulations.popitem(last=False)
+        if matcher is not None:
+            matcher.event_dispatcher.shutdown(wait=False)
+            LOGGER.info("Stopped matching for simulation %s.", simulation_id)
+        self._check_is_finished()
+
+    def _check_is_finished(self) -> None:
+        with self._lock:
+            if not self.matchers and not self.discover_simulations:
+                self._finished.set()
+
+    def _get_matcher(self, payload: Dict) -> Optional[RedisBaseMatcher]:
+        pattern = payload["pattern"]
+        channel = payload["channel"]
+        if isinstance(pattern, bytes):
+            pattern, channel = pattern.decode(), channel.decode()
+        match = self._channel_regexes[pattern].match(channel)
+        if match is None:
+            return None
+        simulation_id = match.group("simulation_id")
+        with self._lock:
+            matcher = self.matchers.get(simulation_id)
+        if matcher is None and self.discover_simulations:
+            self.add_simulation(simulation_id)
+            with self._lock:
+                matcher = self.matchers.get(simulation_id)
+        return matcher
+
+    def _on_event_or_response(self, payload: Dict):
+        matcher = self._get_matcher(payload)
+        if matcher is not None:
+            matcher._on_event_or_response(payload)  # pylint: disable=protected-access
+
+    def _on_area_map_response(self, payload: Dict):
+        matcher = self._get_matcher(payload)
+        if matcher is not None:
+            matcher._on_area_map_response(payload)  # pylint: disable=protected-access
+
+    def _get_event_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Sum the event metrics of the dispatchers of all matchers."""
+        with self._lock:
+            matchers = list(self.matchers.values())
+        event_metrics = {}
+        for matcher in matchers:
+            for metric_name, values in matcher.event_dispatcher.get_metrics().items():
+                metric_values = event_metrics.setdefault(metric_name, {})
+                for label, value in values.items():
+                    metric_values[label] = metric_values.get(label, 0) + value
+        return event_metrics
+
+    def wait_until_finished(self, timeout: Optional[float] = None) -> bool:
+        """Block until all simulations are finished; return False on timeout.
+
+        If simulations are discovered, the host never finishes.
+        """
+        return self._finished.wait(timeout)
+
+    def shutdown(self) -> None:
+        """Stop receiving messages and handling events."""
+        self.pubsub_thread.stop()
+        self.worker_pool.shutdown(wait=False)
+        self.metrics.stop()
@@ -0,0 +1,236 @@
+"""Module for the in-memory order book that Matching Engine matchers maintain across ticks."""
+
+import sys
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from gsy_framework.constants_limits import FLOATING_POINT_TOLERANCE
+
+
+@dataclass
+class OrderBookDiff:
+    """Changes that a snapshot applied to the bids or offers of one market / time slot."""
+    added: List[Dict] = field(default_factory=list)
+    removed: List[Dict] = field(default_factory=list)
+    traded: List[Dict] = field(default_factory=list)  # Orders whose energy has changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.traded)
+
+
+class SortedOrders:
+    """Orders of one side of the book, indexed by id and kept sorted by energy rate."""
+
+    def __init__(self, descending: bool):
+        self._descending = descending
+        self._orders: Dict[str, Dict] = {}
+        self._sorted_keys: List[Tuple[float, str]] = []
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id: str):
+        return order_id in self._orders
+
+    def _sort_key(self, order: Dict) -> Tuple[float, str]:
+        rate = order["energy_rate"]
+        return (-rate if self._descending else rate, order["id"])
+
+    def get(self, order_id: str) -> Optional[Dict]:
+        """Return the order with the given id, or None if it is not in the book."""
+        return self._orders.get(order_id)
+
+    def add(self, order: Dict) -> None:
+        """Add the order, replacing any order with the same id."""
+        if order["id"] in self._orders:
+            self.remove(order["id"])
+        self._orders[order["id"]] = order
+        insort(self._sorted_keys, self._sort_key(order))
+
+    def remove(self, order_id: str) -> Optional[Dict]:
+        """Remove and return the order with the given id (None if it is not in the book)."""
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            del self._sorted_keys[bisect_left(self._sorted_keys, self._sort_key(order))]
+        return order
+
+    def sorted(self) -> List[Dict]:
+        """Return the orders sorted by energy rate (best first)."""
+        return [self._orders[order_id] for _, order_id in self._sorted_keys]
+
+    def apply_snapshot(self, orders: Iterable[Dict]) -> OrderBookDiff:
+        """Replace the orders with the ones of the snapshot and return the applied changes."""
+        diff = OrderBookDiff()
+        snapshot_ids = set()
+        for order in orders:
+            snapshot_ids.add(order["id"])
+            existing_order = self._orders.get(order["id"])
+            if existing_order is None:
+                diff.added.append(order)
+            elif (abs(existing_order["energy"] - order["energy"]) > FLOATING_POINT_TOLERANCE or
+                  existing_order["energy_rate"] != order["energy_rate"]):
+                diff.traded.append(order)
+            else:
+                continue
+            self.add(order)
+        for order_id in set(self._orders) - snapshot_ids:
+            diff.removed.append(self.remove(order_id))
+        return diff
+
+
+class OrderBookPartition:
+    """Bids and offers of one market / time slot."""
+
+    def __init__(self):
+        self.bids = SortedOrders(descending=True)
+        self.offers = SortedOrders(descending=False)
+
+    def __len__(self):
+        return len(self.bids) + len(self.offers)
+
+    def to_matching_data(self) -> Dict:
+        """Return the partition in the format expected by the matching algorithms."""
+        return {"bids": self.bids.sorted(), "offers": self.offers.sorted()}
+
+
+class OrderBook:
+    """Open bids and offers of the simulation, keyed by market id and time slot.
+
+    The book is updated with the snapshots of the offers_bids_response events and keeps track
+    of the partitions that changed with the latest update, so that matching algorithms only have
+    to process the orders of these partitions instead of the whole book.
+
+    The book is updated on tick and on offers_bids_response, whose events are handled
+    concurrently by the matchers, therefore its methods are serialized by a lock. The partitions
+    returned by get_partition are not protected by it, get_matching_data returns copies.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._partitions: Dict[Tuple[str, str], OrderBookPartition] = {}
+        self._changed_partitions: Set[Tuple[str, str]] = set()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(partition) for partition in self._partitions.values())
+
+    def get_partition(self, market_id: str, time_slot: str) -> Optional[OrderBookPartition]:
+        """Return the partition of the market / time slot (None if it has no orders)."""
+        with self._lock:
+            return self._partitions.get((market_id, time_slot))
+
+    def apply_snapshot(self, bids_offers: Dict) -> Dict[Tuple[str, str], Dict[str, OrderBookDiff]]:
+        """Update the book with the bids_offers payload of an offers_bids_response event.
+
+        Time slots missing from the snapshot of a market are removed from the book, while
+        markets missing from the snapshot (e.g. filtered out in the request) are left untouched.
+
+        Args:
+            bids_offers: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+
+        Returns: the bids/offers diffs of the changed partitions, keyed by (market_id, time_slot)
+        """
+        with self._lock:
+            return self._apply_snapshot(bids_offers)
+
+    def _apply_snapshot(
+            self, bids_offers: Dict) -> Dict[Tuple[str, str], Dict[str, OrderBookDiff]]:
+        diffs = {}
+        for market_id, time_slot_data in bids_offers.items():
+            for time_slot, data in time_slot_data.items():
+                key = (market_id, time_slot)
+                partition = self._partitions.get(key)
+                if partition is None:
+                    partition = OrderBookPartition()
+                    # Shares the copies of the markets cache, instead of the decoded strings
+                    key = (sys.intern(market_id), sys.intern(time_slot))
+                bids_diff = partition.bids.apply_snapshot(data.get("bids") or [])
+                offers_diff = partition.offers.apply_snapshot(data.get("offers") or [])
+                if bids_diff or offers_diff:
+                    diffs[key] = {"bids": bids_diff, "offers": offers_diff}
+                if partition:
+                    self._partitions[key] = partition
+                else:
+                    self._partitions.pop(key, None)
+
+            stale_keys = [key for key in self._partitions
+                          if key[0] == market_id and key[1] not in time_slot_data]
+            for key in stale_keys:
+                partition = self._partitions.pop(key)
+                diffs[key] = {
+                    "bids": OrderBookDiff(removed=partition.bids.sorted()),
+                    "offers": OrderBookDiff(removed=partition.offers.sorted())}
+
+        self._changed_partitions = set(diffs)
+        return diffs
+
+    def apply_diff(self, market_id: str, time_slot: str,
+                   added: Iterable[Dict] = (), removed_ids: Iterable[str] = (),
+                   traded: Iterable[Dict] = ()) -> None:
+        """Apply incremental changes of orders (identified by their ids) to one partition.
+
+        Orders are identified as bids/offers by their "type" attribute. Traded orders replace the
+        existing orders with the same id; fully traded orders should be part of removed_ids.
+        """
+        with self._lock:
+            key = (market_id, time_slot)
+            partition = self._partitions.get(key)
+            if partition is None:
+                key = (sys.intern(market_id), sys.intern(time_slot))
+                partition = self._partitions[key] = OrderBookPartition()
+            for order in (*added, *traded):
+                side = partition.bids if order.get("type") == "Bid" else partition.offers
+                side.add(order)
+            for order_id in removed_ids:
+                if partition.bids.remove(order_id) is None:
+                    partition.offers.remove(order_id)
+            if not partition:
+                del self._partitions[key]
+            self._changed_partitions.add(key)
+
+    def retain_time_slots(self, markets_info: Dict[str, Dict]) -> None:
+        """Drop the partitions whose time slots are no longer open in their market, and the ones
+        of the markets that are no longer listed, so that the book does not grow with the ended
+        market cycles.
+
+        Args:
+            markets_info: {market_id: {"type_name": ..., "time_slots": {...}}}, as cached on tick
+        """
+        with self._lock:
+            for key in list(self._partitions):
+                market_id, time_slot = key
+                market_info = markets_info.get(market_id)
+                if market_info is None or time_slot not in market_info["time_slots"]:
+                    del self._partitions[key]
+                    self._changed_partitions.discard(key)
+
+    def get_matching_data(self, only_changed: bool = False) -> Dict:
+        """Return the book in the format expected by the matching algorithms.
+
+        Args:
+            only_changed: if True, only include the partitions changed by the latest update
+
+        Returns: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+        """
+        matching_data = {}
+        with self._lock:
+            for key, partition in self._partitions.items():
+                if only_changed and key not in self._changed_partitions:
+                    continue
+                market_id, time_slot = key
+                matching_data.setdefault(market_id, {})[time_slot] = (
+                    partition.to_matching_data())
+        return matching_data
+
+    @property
+    def changed_matching_data(self) -> Dict:
+        """Matching data of the partitions that changed with the latest update."""
+        return self.get_matching_data(only_changed=True)
+
+    def clear(self) -> None:
+        """Remove all orders from the book."""
+        with self._lock:
+            self._partitions.clear()
+            self._changed_partitions.clear()
@@ -0,0 +1,183 @@
+"""Module for the runner that matches the markets / time slots of a payload in parallel."""
+
+import concurrent.futures
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Future, as_completed
+from concurrent.futures.process import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matchers.recommendations_stream import iter_partitions
+
+LOGGER = logging.getLogger(__name__)
+
+DEADLINE_POLL_INTERVAL = 0.05  # seconds
+
+# Matching algorithm of the worker process, sent once when the worker starts
+_worker_matching_algorithm = None  # pylint: disable=invalid-name
+
+
+def _initialize_worker(matching_algorithm) -> None:
+    global _worker_matching_algorithm  # pylint: disable=global-statement
+    _worker_matching_algorithm = matching_algorithm
+
+
+def _match_shard(market_id: str, time_slot: str, data: Dict) -> Tuple[List[Dict], float]:
+    start_time = time.perf_counter()
+    recommendations = _worker_matching_algorithm.get_matches_recommendations(
+        {market_id: {time_slot: data}})
+    return recommendations, time.perf_counter() - start_time
+
+
+@dataclass
+class ShardTiming:
+    """Matching duration of one market / time slot shard."""
+    market_id: str
+    time_slot: str
+    orders_count: int
+    duration: float  # seconds spent by the algorithm in the worker process
+
+
+class ParallelMatchingRunner:
+    """Match each market / time slot of the bids_offers payload on a pool of processes.
+
+    The partitions of the payload are independent, therefore they are sharded across the
+    processes and their recommendations are merged in the order of the payload. The matching
+    algorithm is sent to each process only once, when the process starts, so that every tick
+    only pickles the orders of the shards.
+
+    With max_workers=1 the partitions are matched in the calling thread, without a pool.
+    """
+
+    def __init__(self, matching_algorithm, max_workers: Optional[int] = None,
+                 mp_context=None):
+        """
+        Args:
+            matching_algorithm: class/object that implements get_matches_recommendations, e.g.
+                AttributedMatchingAlgorithm. It has to be importable by the worker processes.
+            max_workers: number of processes (defaults to the number of CPUs)
+            mp_context: multiprocessing context of the pool. Defaults to "spawn", since forking
+                a matcher process also copies its connection threads in an undefined state.
+        """
+        self.matching_algorithm = matching_algorithm
+        self.max_workers = max_workers if max_workers else multiprocessing.cpu_count()
+        self.last_shard_timings: List[ShardTiming] = []
+        self._executor = None
+        if self.max_workers > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=mp_context or multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker, initargs=(matching_algorithm,))
+
+    def get_matches_recommendations(
+            self, matching_data: Dict, deadline: Optional[MatchingDeadline] = None) -> List[Dict]:
+        """Calculate the recommendations of all markets / time slots of the payload.
+
+        Args:
+            matching_data: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+            deadline: if set, the shards are matched nearest delivery time slots first, and only
+                the recommendations of the shards matched before the deadline are returned
+
+        Returns: list of BidOfferMatch.serializable_dict() recommendations
+        """
+        if deadline is None:
+            partitions = ((market_id, time_slot, data)
+                          for market_id, time_slot_data in matching_data.items()
+                          for time_slot, data in time_slot_data.items())
+        else:
+            partitions = iter_partitions(matching_data)
+        shards = [(market_id, time_slot, data) for market_id, time_slot, data in partitions
+                  if data.get("bids") and data.get("offers")]
+        if not shards:
+            self.last_shard_timings = []
+            return []
+
+        if self._executor is None or len(shards) == 1:
+            results = [
+                None if deadline is not None and deadline.is_expired
+                else self._match_shard_in_thread(*shard) for shard in shards]
+        else:
+            futures = [self._executor.submit(_match_shard, *shard) for shard in shards]
+            if deadline is None:
+                results = [future.result() for future in futures]
+            else:
+                self._wait_until_deadline(futures, deadline)
+                results = [future.result() if future.done() and not future.cancelled() else None
+                           for future in futures]
+
+        recommendations = []
+        self.last_shard_timings = []
+        for (market_id, time_slot, data), result in zip(shards, results):
+            if result is None:  # The shard was not matched before the deadline
+                continue
+            shard_recommendations, duration = result
+            recommendations.extend(shard_recommendations)
+            self.last_shard_timings.append(ShardTiming(
+                market_id=market_id, time_slot=time_slot,
+                orders_count=len(data["bids"]) + len(data["offers"]), duration=duration))
+
+        if len(self.last_shard_timings) < len(shards):
+            LOGGER.debug("Matched %s of %s shards before the deadline.",
+                         len(self.last_shard_timings), len(shards))
+        elif LOGGER.isEnabledFor(logging.DEBUG):
+            slowest_shard = max(self.last_shard_timings, key=lambda timing: timing.duration)
+            LOGGER.debug(
+                "Matched %s shards, slowest: market %s, time slot %s (%s orders, %.3f s).",
+                len(shards), slowest_shard.market_id, slowest_shard.time_slot,
+                slowest_shard.orders_count, slowest_shard.duration)
+        return recommendations
+
+    @staticmethod
+    def _wait_until_deadline(futures: List[Future], deadline: MatchingDeadline) -> None:
+        """Wait for the futures until the deadline expires, then cancel the pending ones.
+
+        Shards that are already being matched by a worker cannot be cancelled, their results are
+        discarded.
+        """
+        pending = futures
+        while pending and not deadline.is_expired:
+            # The deadline can be cancelled at any time, therefore it is polled periodically
+            _, pending = concurrent.futures.wait(
+                pending, timeout=min(deadline.remaining, DEADLINE_POLL_INTERVAL))
+        for future in pending:
+            future.cancel()
+
+    def iter_matches_recommendations(self, matching_data: Dict) -> Iterator[List[Dict]]:
+        """Yield the recommendations of each market / time slot as soon as it is matched.
+
+        The shards are scheduled nearest delivery time slots first, and their recommendations
+        are yielded in completion order, which makes it suitable for iter_recommendations.
+
+        Args:
+            matching_data: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+        """
+        shards = [(market_id, time_slot, data)
+                  for market_id, time_slot, data in iter_partitions(matching_data)
+                  if data.get("bids") and data.get("offers")]
+        if self._executor is None or len(shards) == 1:
+            for shard in shards:
+                yield self._match_shard_in_thread(*shard)[0]
+            return
+        futures = [self._executor.submit(_match_shard, *shard) for shard in shards]
+        try:
+            for future in as_completed(futures):
+                yield future.result()[0]
+        finally:
+            # The consumer stopped early, the shards that did not start are not needed anymore
+            for future in futures:
+                future.cancel()
+
+    def _match_shard_in_thread(
+            self, market_id: str, time_slot: str, data: Dict) -> Tuple[List[Dict], float]:
+        start_time = time.perf_counter()
+        recommendations = self.matching_algorithm.get_matches_recommendations(
+            {market_id: {time_slot: data}})
+        return recommendations, time.perf_counter() - start_time
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Terminate the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
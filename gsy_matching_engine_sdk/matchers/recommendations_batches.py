@@ -0,0 +1,67 @@
+"""Module for the splitting of the recommendations into bounded messages."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Union
+
+from gsy_matching_engine_sdk.constants import (
+    DEFAULT_MAX_BATCH_BYTES, DEFAULT_MAX_BATCH_RECOMMENDATIONS)
+from gsy_matching_engine_sdk.serializers import BaseSerializer
+
+
+@dataclass
+class RecommendationsBatch:
+    """Recommendations submitted in one message, along with the encoded message."""
+    recommendations: List[Dict]
+    payload: Union[str, bytes]  # Encoded {"recommended_matches": recommendations}
+
+    @property
+    def data(self) -> Dict:
+        """Decoded content of the message."""
+        return {"recommended_matches": self.recommendations}
+
+
+def split_recommendations(
+        recommendations: List[Dict], serializer: BaseSerializer,
+        max_batch_recommendations: int = DEFAULT_MAX_BATCH_RECOMMENDATIONS,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES) -> List[RecommendationsBatch]:
+    """Split the recommendations into batches bounded in count and in encoded size.
+
+    Every recommendation is encoded once, and the payload of each batch is assembled from the
+    encoded recommendations. A recommendation larger than max_batch_bytes is sent alone.
+    An empty list of recommendations results in a single empty batch.
+
+    Args:
+        recommendations: list of BidOfferMatch.serializable_dict() recommendations
+        serializer: serializer of the payloads
+        max_batch_recommendations: maximum number of recommendations of a batch
+        max_batch_bytes: maximum size of the payload of a batch (best effort, see above)
+    """
+    empty_payload = serializer.dumps({"recommended_matches": []})
+    # Depending on the serializer, the payloads are either str or bytes
+    if isinstance(empty_payload, bytes):
+        opening, closing = empty_payload.split(b"[]", 1)
+        opening, separator, closing = opening + b"[", b",", b"]" + closing
+    else:
+        opening, closing = empty_payload.split("[]", 1)
+        opening, separator, closing = opening + "[", ",", "]" + closing
+
+    batches = []
+    batch_recommendations, batch_payloads = [], []
+    batch_size = len(empty_payload)
+    for recommendation in recommendations:
+        payload = serializer.dumps(recommendation)
+        if batch_recommendations and (
+                len(batch_recommendations) >= max_batch_recommendations or
+                batch_size + len(separator) + len(payload) > max_batch_bytes):
+            batches.append(RecommendationsBatch(
+                batch_recommendations, opening + separator.join(batch_payloads) + closing))
+            batch_recommendations, batch_payloads = [], []
+            batch_size = len(empty_payload)
+        batch_recommendations.append(recommendation)
+        batch_payloads.append(payload)
+        batch_size += len(separator) + len(payload)
+
+    if batch_recommendations or not batches:
+        batches.append(RecommendationsBatch(
+            batch_recommendations, opening + separator.join(batch_payloads) + closing))
+    return batches
@@ -0,0 +1,57 @@
+"""Module for the streaming of recommendations, submitted while the matching is in progress."""
+
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Maximum time that yielded recommendations wait for more ones before being submitted
+DEFAULT_STREAM_FLUSH_INTERVAL = 0.05  # seconds
+
+
+def iter_partitions(bids_offers: Dict) -> Iterator[Tuple[str, str, Dict]]:
+    """Iterate over the market / time slot partitions, nearest delivery time slots first.
+
+    Args:
+        bids_offers: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+
+    Yields: (market_id, time_slot, {"bids": [...], "offers": [...]})
+    """
+    # Time slots are ISO 8601 strings, therefore their lexicographic order is chronological
+    partitions = sorted(
+        ((time_slot, market_id) for market_id, time_slot_data in bids_offers.items()
+         for time_slot in time_slot_data),
+        key=lambda partition: partition[0])
+    for time_slot, market_id in partitions:
+        yield market_id, time_slot, bids_offers[market_id][time_slot]
+
+
+class RecommendationsStreamBuffer:
+    """Group the recommendations yielded by a matcher into the submissions that send them.
+
+    The first yielded recommendations are submitted immediately, to minimize the time to the
+    first submission. Later ones are grouped until they fill a batch, or until they have waited
+    for flush_interval seconds, so that small partitions do not cause a message each.
+    """
+
+    def __init__(self, max_batch_recommendations: int,
+                 flush_interval: float = DEFAULT_STREAM_FLUSH_INTERVAL):
+        self.max_batch_recommendations = max_batch_recommendations
+        self.flush_interval = flush_interval
+        self._recommendations: List[Dict] = []
+        self._last_flush_time: Optional[float] = None
+
+    def add(self, recommendations: List[Dict]) -> Optional[List[Dict]]:
+        """Buffer the recommendations; return the recommendations to submit now, if any."""
+        self._recommendations.extend(recommendations)
+        if not self._recommendations:
+            return None
+        if (self._last_flush_time is None or
+                len(self._recommendations) >= self.max_batch_recommendations or
+                time.perf_counter() - self._last_flush_time >= self.flush_interval):
+            return self.flush()
+        return None
+
+    def flush(self) -> List[Dict]:
+        """Return all buffered recommendations."""
+        recommendations, self._recommendations = self._recommendations, []
+        self._last_flush_time = time.perf_counter()
+        return recommendations
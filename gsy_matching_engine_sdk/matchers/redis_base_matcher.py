@@ -1,95 +1,261 @@
-import json
 import logging
-from concurrent.futures.thread import ThreadPoolExecutor
-from typing import Dict
+from threading import Lock, Timer
+from typing import Callable, Dict, Set
 
 from gsy_framework.client_connections.utils import log_market_progression
 from gsy_framework.redis_channels import SimulationCommandChannels, MatchingEngineChannels
-from gsy_framework.utils import execute_function_util, wait_until_timeout_blocking
 from redis import Redis
+from redis.client import PubSub
+from redis.utils import str_if_bytes
 
-from gsy_matching_engine_sdk.constants import MAX_WORKER_THREADS
+from gsy_matching_engine_sdk.matchers.connection_bootstrap import (
+    SIMULATION_ID_TIMEOUT_SECONDS, ConnectionBootstrap, SimulationChannelPatterns)
+from gsy_matching_engine_sdk.matchers.event_dispatcher import EventDispatcher
 from gsy_matching_engine_sdk.matchers.matching_engine_matcher_client_interface import (
     MatchingEngineMatcherClientInterface)
 from gsy_matching_engine_sdk.matchers.matching_engine_matcher_logger import (
     MatchingEngineMatcherLogger)
+from gsy_matching_engine_sdk.matchers.order_book import OrderBook
+from gsy_matching_engine_sdk.recorder import INBOUND, OUTBOUND
+from gsy_matching_engine_sdk.serializers import get_serializer
+from gsy_matching_engine_sdk.utils import max_worker_threads_from_env
 
 LOGGER = logging.getLogger(__name__)
 
+AREA_MAP_RESPONSE = "area_map_response"
+
+
+class _SubscriptionsPubSub(PubSub):
+    """PubSub that reports the confirmations of its pattern subscriptions to a callback.
+
+    The callback is called by the thread that reads the messages, in the order in which they are
+    received: the messages read after the confirmation of a pattern are the ones published after
+    the subscription.
+    """
+
+    def __init__(self, *args, on_pattern_subscribed: Callable[[str], None], **kwargs):
+        super().__init__(*args, **kwargs)
+        self._on_pattern_subscribed = on_pattern_subscribed
+
+    def handle_message(self, response, ignore_subscribe_messages=False):
+        if isinstance(response, list) and str_if_bytes(response[0]) == "psubscribe":
+            self._on_pattern_subscribed(str_if_bytes(response[1]))
+        return super().handle_message(response, ignore_subscribe_messages)
+
 
 class RedisBaseMatcher(MatchingEngineMatcherClientInterface):
     # pylint: disable=too-many-instance-attributes
     """Handle order matching via redis connection."""
-    def __init__(self, redis_url="redis://localhost:6379", pubsub_thread=None):
+    def __init__(self, redis_url="redis://localhost:6379", pubsub_thread=None, serializer=None,
+                 max_workers=None, record_path=None, metrics_port=None, stats_log_interval=None,
+                 redis_db=None, worker_pool=None, shard_group=None):
+        # pylint: disable=too-many-arguments
+        # redis_db and worker_pool replace the connection and threads owned by the matcher, so
+        # that they can be shared by several matchers (see MultiSimulationRedisHost)
         self.simulation_id = None
+        # Messages received before the simulation id is known are handled once it is
+        self.bootstrap = ConnectionBootstrap()
+        self._simulation_id_lock = Lock()
+        self._simulation_id_timer = None
+        self._bootstrap_channels = None
+        # Channel patterns of the simulation whose subscription is not confirmed yet; until they
+        # all are, the messages of the simulation are received via the bootstrap channels
+        self._unconfirmed_patterns: Set[str] = set()
+        self._is_subscribed_to_simulation = False
+        self.serializer = get_serializer(serializer)
         self.pubsub_thread = pubsub_thread
-        self.redis_db = Redis.from_url(redis_url)
-        self.pubsub = self.redis_db.pubsub() if pubsub_thread is None else pubsub_thread
-        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKER_THREADS)
+        self.redis_db = Redis.from_url(redis_url) if redis_db is None else redis_db
+        self.pubsub = (
+            _SubscriptionsPubSub(self.redis_db.connection_pool,
+                                 on_pattern_subscribed=self._on_pattern_subscribed)
+            if pubsub_thread is None else pubsub_thread)
+        # Events of the same type are handled serially, superseded ticks/responses are skipped
+        self.event_dispatcher = EventDispatcher(
+            self, max_workers=max_workers if max_workers else max_worker_threads_from_env(),
+            executor=worker_pool, **self._get_event_queues_options())
+        # Worker threads of the dispatcher, that subclasses can also submit their own tasks to
+        self.executor = self.event_dispatcher.executor
 
         self.logger_helper = MatchingEngineMatcherLogger
         self._markets_cache = None  # Cached information about markets and time slots
+        # Reverse index of the markets cache, mapping each time slot to its market type name
+        self._market_type_names_by_time_slot = {}
+        self.order_book = OrderBook()  # Open bids/offers, updated on every offers_bids_response
+        self._start_recording(record_path)
+        self._start_metrics(self.event_dispatcher, metrics_port, stats_log_interval)
+        self._start_memory_report()
+        # The markets of the area map are shared with the other workers of the shard group
+        self._start_market_sharding(self.redis_db, shard_group)
 
+        self._update_handled_events()
         self._connect_to_simulation()
 
     def _connect_to_simulation(self):
-        """Subscribe to redis response channels and thus connect to a simulation."""
-        self._get_simulation_id(is_blocking=True)
-        self._subscribe_to_response_channels()
-        LOGGER.info("Connection to gsy-e has been established.")
-
-    def _set_simulation_id(self, payload):
-        data = json.loads(payload["data"])
-        self.simulation_id = data.get("simulation_id")
-        LOGGER.debug("Received Simulation ID %s", self.simulation_id)
-
-    def _check_is_set_simulation_id(self):
-        return self.simulation_id is not None
+        """Request the simulation id, while already receiving the messages of all simulations.
 
-    def _start_pubsub_thread(self):
-        if self.pubsub_thread is None:
-            self.pubsub_thread = self.pubsub.run_in_thread(daemon=True)
-
-    def _get_simulation_id(self, is_blocking=True):
+        The constructor does not wait for the id: the messages received meanwhile are buffered,
+        and the ones of the simulation are handled once its id is known (see self.bootstrap).
+        CLI simulations do not answer the request, their id ("") is resolved by their first
+        message, or after SIMULATION_ID_TIMEOUT_SECONDS.
+        """
         self.pubsub.subscribe(
             **{MatchingEngineChannels(
                 self.simulation_id).simulation_id_response: self._set_simulation_id
                })
+        self._subscribe_to_bootstrap_channels()
         self._start_pubsub_thread()
+        self._simulation_id_timer = Timer(
+            SIMULATION_ID_TIMEOUT_SECONDS, self._resolve_simulation_id, args=("",))
+        self._simulation_id_timer.daemon = True
+        self._simulation_id_timer.start()
         self.redis_db.publish(
-            MatchingEngineChannels(self.simulation_id).simulation_id, json.dumps({}))
+            MatchingEngineChannels(self.simulation_id).simulation_id, self.serializer.dumps({}))
+
+    def _set_simulation_id(self, payload):
+        data = self.serializer.loads(payload["data"])
+        self._resolve_simulation_id(data.get("simulation_id") or "")
 
-        if is_blocking:
-            try:
-                wait_until_timeout_blocking(self._check_is_set_simulation_id, timeout=50)
-            except AssertionError:
-                self.simulation_id = ""  # default simulation id for cli simulations
+    def _resolve_simulation_id(self, simulation_id: str):
+        """Subscribe to the channels of the simulation, in place of those of all simulations.
 
-    def _subscribe_to_response_channels(self):
-        channel_subs = {
-            MatchingEngineChannels(self.simulation_id).events: self._on_event_or_response,
-            MatchingEngineChannels(self.simulation_id).response: self._on_event_or_response,
-            SimulationCommandChannels(self.simulation_id).response_channel("area-map"):
+        The channels of all simulations are only unsubscribed from once the subscription to the
+        ones of the simulation is confirmed, so that no message is published in between.
+        """
+        with self._simulation_id_lock:
+            if self.simulation_id is not None:
+                return
+            self.simulation_id = simulation_id
+            if self._bootstrap_channels is not None:
+                # The patterns shared with the bootstrap channels are subscribed to already
+                self._unconfirmed_patterns = (
+                    set(self._get_response_channel_handlers(simulation_id)) -
+                    set(self._bootstrap_channels.patterns))
+        LOGGER.debug("Received Simulation ID %s", self.simulation_id)
+        self._simulation_id_timer.cancel()
+        self.pubsub.unsubscribe(MatchingEngineChannels(None).simulation_id_response)
+        self._subscribe_to_response_channels()
+        if not self._unconfirmed_patterns or not isinstance(self.pubsub, _SubscriptionsPubSub):
+            # No confirmation to wait for (a pubsub passed by the caller does not report them)
+            self._on_subscribed_to_simulation()
+        self._finish_bootstrap()
+
+    def _on_pattern_subscribed(self, pattern: str):
+        with self._simulation_id_lock:
+            if pattern not in self._unconfirmed_patterns:
+                return
+            self._unconfirmed_patterns.discard(pattern)
+            if self._unconfirmed_patterns:
+                return
+        self._on_subscribed_to_simulation()
+
+    def _on_subscribed_to_simulation(self):
+        """Stop receiving the messages of all simulations, the simulation channels are live."""
+        self._is_subscribed_to_simulation = True
+        self._unsubscribe_from_bootstrap_channels()
+
+    def _subscribe_to_bootstrap_channels(self):
+        """Receive the messages of all simulations, until those of the simulation are received."""
+        self._bootstrap_channels = SimulationChannelPatterns(self._get_response_channel_handlers)
+        self.pubsub.psubscribe(**{pattern: self._on_bootstrap_message
+                                  for pattern in self._bootstrap_channels.patterns})
+
+    def _unsubscribe_from_bootstrap_channels(self):
+        self.pubsub.punsubscribe(*(set(self._bootstrap_channels.patterns) -
+                                   set(self._get_response_channel_handlers(self.simulation_id))))
+
+    def _finish_bootstrap(self):
+        """Prefetch the area map, and handle the messages received during the bootstrap."""
+        self._publish(SimulationCommandChannels(self.simulation_id).area_map, "area_map", {})
+        self.bootstrap.set_ready(self.simulation_id)
+        LOGGER.info("Connection to gsy-e has been established.")
+
+    def _on_bootstrap_message(self, payload: Dict):
+        """Buffer the message of a simulation whose id is not known yet.
+
+        Once the id is known, the messages of the simulation are still handled until the
+        subscription to its channels is confirmed.
+        """
+        if self._is_subscribed_to_simulation:
+            return  # Received via the channels of the simulation
+        pattern, channel = payload["pattern"], payload["channel"]
+        if isinstance(pattern, bytes):
+            pattern, channel = pattern.decode(), channel.decode()
+        simulation_id = self._bootstrap_channels.get_simulation_id(pattern, channel)
+        if simulation_id is None:
+            return
+        if not self.bootstrap.defer(
+                self._handle_bootstrap_message, simulation_id, pattern, payload):
+            # The id was resolved meanwhile, before subscribing to the channels of the simulation
+            self._handle_bootstrap_message(simulation_id, pattern, payload)
+        elif simulation_id == "":
+            # Only the CLI simulations publish on the channels without id
+            self._resolve_simulation_id("")
+
+    def _handle_bootstrap_message(self, simulation_id: str, pattern: str, payload: Dict):
+        if simulation_id == self.simulation_id:
+            self._bootstrap_channels.get_handler(pattern)(payload)
+
+    def _start_pubsub_thread(self):
+        if self.pubsub_thread is None:
+            self.pubsub_thread = self.pubsub.run_in_thread(daemon=True)
+
+    def _get_response_channel_handlers(self, simulation_id: str) -> Dict[str, Callable]:
+        return {
+            MatchingEngineChannels(simulation_id).events: self._on_event_or_response,
+            MatchingEngineChannels(simulation_id).response: self._on_event_or_response,
+            SimulationCommandChannels(simulation_id).response_channel("area-map"):
                 self._on_area_map_response
         }
-        self.pubsub.psubscribe(**channel_subs)
+
+    def _subscribe_to_response_channels(self):
+        self.pubsub.psubscribe(**self._get_response_channel_handlers(self.simulation_id))
         self._start_pubsub_thread()
 
+    def _publish(self, channel: str, kind: str, data: Dict):
+        """Encode and publish a request, keeping track of it in the recording and metrics."""
+        self._record_message(OUTBOUND, kind, data)
+        payload = self.serializer.dumps(data)
+        self._track_sent_message(kind, len(payload))
+        self.redis_db.publish(channel, payload)
+
     def submit_matches(self, recommended_matches):
+        """Publish the recommendations, split into bounded messages sent in one round trip.
+
+        The exchange responds to each message with a matched_recommendations_response event.
+        """
+        if self._is_submission_cancelled(recommended_matches):
+            return
+        if self.market_sharding is not None:
+            recommended_matches = self.market_sharding.filter_recommendations(
+                recommended_matches)
         LOGGER.debug("Sending recommendations %s", recommended_matches)
-        data = {"recommended_matches": recommended_matches}
-        self.redis_db.publish(
-            MatchingEngineChannels(self.simulation_id).recommendations, json.dumps(data))
+        channel = MatchingEngineChannels(self.simulation_id).recommendations
+        with self.metrics.time_stage("submit_matches"):
+            pipeline = self.redis_db.pipeline(transaction=False)
+            for batch in self._split_recommendations(recommended_matches):
+                self._track_sent_message("recommendations", len(batch.payload))
+                pipeline.publish(channel, batch.payload)
+            pipeline.execute()
 
     def request_offers_bids(self, filters: Dict = None):
+        if self.market_sharding is not None:
+            filters = self.market_sharding.filter_request_filters(filters)
+            if not filters["markets"]:
+                LOGGER.debug("No markets are assigned to this worker, skipping the request.")
+                return
         data = {"filters": filters}
-        self.redis_db.publish(
-            MatchingEngineChannels(self.simulation_id).offers_bids, json.dumps(data))
+        self._publish(MatchingEngineChannels(self.simulation_id).offers_bids, "offers_bids", data)
 
     def request_area_id_name_map(self):
-        """Request area_id_name_map from simulation."""
-        self.redis_db.publish(SimulationCommandChannels(
-            self.simulation_id).area_map, json.dumps({}))
+        """Request area_id_name_map from simulation.
+
+        The area map is requested as soon as the simulation id is known, therefore the requests
+        sent before are skipped.
+        """
+        if not self.bootstrap.is_ready:
+            LOGGER.debug("The area map is requested once the simulation id is known.")
+            return
+        self._publish(SimulationCommandChannels(self.simulation_id).area_map, "area_map", {})
 
     def _on_offers_bids_response(self, data: Dict):
         """Trigger actions when receiving the offers_bids_response event.
@@ -105,14 +271,24 @@ class RedisBaseMatcher(MatchingEngineMatcherClientInterface):
                 }
 
         """
-        self.on_offers_bids_response(data=data)
+        self.order_book.apply_snapshot(data.get("bids_offers") or {})
+        with self._track_matching_deadline() as deadline:
+            if deadline is not None and deadline.is_expired:
+                LOGGER.debug("Skipping the matching of the response of an expired tick.")
+                return
+            with self.metrics.time_stage("matching"):
+                if self._is_streaming_recommendations():
+                    self._submit_streamed_recommendations(data)
+                else:
+                    self.on_offers_bids_response(data=data)
 
     def on_offers_bids_response(self, data: Dict):
         recommendations = []
         self.submit_matches(recommendations)
 
     def _on_match(self, data: Dict):
-        self.logger_helper.log_recommendations_response(self._markets_cache, data)
+        self.logger_helper.log_recommendations_response_by_time_slot(
+            self._market_type_names_by_time_slot, data)
         self.on_matched_recommendations_response(data=data)
 
     def on_matched_recommendations_response(self, data: Dict):
@@ -120,31 +296,38 @@ class RedisBaseMatcher(MatchingEngineMatcherClientInterface):
 
     def _on_tick(self, data: Dict):
         self._cache_markets_information(data)
+        self.order_book.retain_time_slots(self._markets_cache)
         self.on_tick(data=data)
 
     def _on_market_cycle(self, data: Dict):
+        self._cancel_matching()
         self.on_market_cycle(data=data)
+        self._report_memory()
 
     def _on_finish(self, data: Dict):
+        if self.recorder is not None:
+            self.recorder.flush()
+        if self.market_sharding is not None:
+            self.market_sharding.stop()
         self.on_finish(data=data)
 
-    def _on_area_map_response(self, data: Dict):
+    def _on_area_map_response(self, payload: Dict):
+        if self.bootstrap.defer(self._on_area_map_response, payload):
+            return
+        data = self.serializer.loads(payload["data"])
+        self._record_message(INBOUND, AREA_MAP_RESPONSE, data)
+        if self.market_sharding is not None:
+            self.market_sharding.set_markets(data.get("area_mapping") or {})
         self.on_area_map_response(data=data)
 
     def _on_event_or_response(self, payload: Dict):
-        data = json.loads(payload["data"])
+        if self.bootstrap.defer(self._on_event_or_response, payload):
+            return
+        if self._is_unhandled_event(payload["data"]):
+            return
+        with self.metrics.time_stage("decode"):
+            data = self.serializer.loads(payload["data"])
+        self._track_received_message(data.get("event"), len(payload["data"]))
+        self._record_message(INBOUND, data.get("event") or "", data)
         log_market_progression(data)
-        self.executor.submit(
-            execute_function_util,
-            function=lambda: self.on_event_or_response(data),
-            function_name="on_event_or_response")
-
-        # Call the corresponding event handler
-        event = data.get("event")
-        callback_function_name = f"_on_{event}"
-        if hasattr(self, callback_function_name):
-            callback_function = getattr(self, callback_function_name)
-            self.executor.submit(
-                execute_function_util,
-                function=lambda: callback_function(data),
-                function_name=callback_function_name)
+        self.event_dispatcher.dispatch(data)
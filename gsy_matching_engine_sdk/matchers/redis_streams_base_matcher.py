@@ -0,0 +1,209 @@
+"""Module for the Redis matcher that reads the events from Redis Streams instead of pubsub."""
+
+import logging
+import os
+import socket
+import time
+from functools import partial
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from gsy_framework.utils import execute_function_util
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError, TimeoutError as RedisTimeoutError
+
+from gsy_matching_engine_sdk.constants import (
+    DEFAULT_REDIS_STREAMS_BATCH_SIZE, DEFAULT_REDIS_STREAMS_CONSUMER_GROUP,
+    DEFAULT_REDIS_STREAMS_MAX_READ_AHEAD)
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+
+LOGGER = logging.getLogger(__name__)
+
+# Milliseconds that a read waits for new entries, and seconds between reconnection attempts
+STREAM_BLOCK_MILLISECONDS = 1000
+STREAM_RECONNECT_DELAY_SECONDS = 1.
+# Seconds between two trims of the acknowledged entries of the streams
+STREAM_TRIM_INTERVAL_SECONDS = 5.
+# Entries left unacknowledged by a consumer for this long are claimed by the starting consumers
+STREAM_CLAIM_IDLE_MILLISECONDS = 60 * 1000
+
+
+def _parse_stream_id(entry_id: Union[str, bytes]) -> Tuple[int, int]:
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    milliseconds, _, sequence = entry_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+class RedisStreamsBaseMatcher(RedisBaseMatcher):
+    # pylint: disable=too-many-instance-attributes
+    """Handle order matching via Redis Streams, in place of the pubsub channels of the events.
+
+    The simulation appends its events and responses to streams named after the channels that
+    RedisBaseMatcher subscribes to, with the encoded payload in the "data" field of each entry.
+    The matcher reads them as a consumer of a consumer group, therefore:
+        - the entries appended while the matcher is disconnected (or not started yet) are read
+          once it (re)connects, instead of being lost;
+        - the events are read in batches of batch_size entries per round trip, and acknowledged
+          in one round trip once dispatched;
+        - the reads pause while max_read_ahead events wait in the queues of the event
+          dispatcher, the backlog stays in Redis instead of growing in the memory of the matcher;
+        - the entries that all consumer groups have acknowledged are trimmed periodically.
+
+    Every matcher that should receive all events (e.g. each worker of a shard group) needs its
+    own consumer_group, since the consumers of a group share its entries. The consumer_name
+    identifies the matcher in its group: the entries that it has read but not acknowledged are
+    read again when a consumer with the same name starts, and the ones of the consumers idle
+    for STREAM_CLAIM_IDLE_MILLISECONDS are claimed by the starting consumers.
+
+    The simulation id handshake and the requests still use the pubsub channels.
+    """
+
+    def __init__(self, *args, consumer_group: str = DEFAULT_REDIS_STREAMS_CONSUMER_GROUP,
+                 consumer_name: Optional[str] = None,
+                 batch_size: int = DEFAULT_REDIS_STREAMS_BATCH_SIZE,
+                 max_read_ahead: int = DEFAULT_REDIS_STREAMS_MAX_READ_AHEAD,
+                 trim_interval: Optional[float] = STREAM_TRIM_INTERVAL_SECONDS, **kwargs):
+        """
+        Args:
+            consumer_group: name of the consumer group of the matcher in each stream
+            consumer_name: name of the matcher in its consumer group (defaults to the host name
+                and process id)
+            batch_size: maximum number of entries read per round trip
+            max_read_ahead: number of queued events from which the reads pause (at most the
+                max_queue_size of the event dispatcher, so that no event overflows its queue)
+            trim_interval: seconds between two trims of the acknowledged entries (None to never
+                trim the streams)
+            args, kwargs: arguments of RedisBaseMatcher
+        """
+        # Set before connecting, since the streams are read once the simulation id is known
+        self.consumer_group = consumer_group
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.max_read_ahead = max_read_ahead
+        self.trim_interval = trim_interval
+        self._stream_handlers: Dict[str, Callable] = {}
+        self._streams_thread = None
+        self._stop_reading = Event()
+        super().__init__(*args, **kwargs)
+
+    def _subscribe_to_bootstrap_channels(self):
+        """The entries appended before the simulation id is known are read once it is."""
+
+    def _unsubscribe_from_bootstrap_channels(self):
+        pass
+
+    def _subscribe_to_response_channels(self):
+        self._stream_handlers = self._get_response_channel_handlers(self.simulation_id)
+        for stream in self._stream_handlers:
+            self._create_consumer_group(stream)
+        self._streams_thread = Thread(
+            target=self._read_streams, name="redis-streams-reader", daemon=True)
+        self._streams_thread.start()
+
+    def _create_consumer_group(self, stream: str):
+        try:
+            self.redis_db.xgroup_create(stream, self.consumer_group, id="0", mkstream=True)
+        except ResponseError as ex:
+            if "BUSYGROUP" not in str(ex):
+                raise
+        self.redis_db.xautoclaim(
+            stream, self.consumer_group, self.consumer_name,
+            min_idle_time=STREAM_CLAIM_IDLE_MILLISECONDS, justid=True)
+
+    def stop_reading(self, timeout: Optional[float] = None):
+        """Stop reading the streams, and wait for the entries being handled."""
+        self._stop_reading.set()
+        if self._streams_thread is not None:
+            self._streams_thread.join(timeout)
+
+    def _read_streams(self):
+        """Read, dispatch and acknowledge the entries of the streams until stopped.
+
+        The first reads return the entries of the consumer that are still pending (i.e. read
+        before a restart or a connection loss, but not acknowledged), then the new ones.
+        """
+        stream_ids = {stream: "0" for stream in self._stream_handlers}
+        last_trim_time = time.monotonic()
+        max_read_ahead = min(self.max_read_ahead,
+                             self.event_dispatcher.max_queue_size or self.max_read_ahead)
+        while not self._stop_reading.is_set():
+            # Once max_read_ahead events are queued, wait for half of them to be handled
+            capacity = self.event_dispatcher.wait_for_capacity(
+                max_read_ahead, min_capacity=max(max_read_ahead // 2, 1),
+                timeout=STREAM_BLOCK_MILLISECONDS / 1000)
+            if not capacity:
+                if self.event_dispatcher.is_shut_down:
+                    break
+                continue
+            # Each stream can return up to count entries
+            count = max(min(self.batch_size, capacity // len(stream_ids)), 1)
+            try:
+                response = self.redis_db.xreadgroup(
+                    self.consumer_group, self.consumer_name, stream_ids,
+                    count=count, block=STREAM_BLOCK_MILLISECONDS)
+                self._handle_stream_entries(response or [], stream_ids, count)
+                if (self.trim_interval is not None and
+                        time.monotonic() - last_trim_time >= self.trim_interval):
+                    last_trim_time = time.monotonic()
+                    self._trim_streams()
+            except (RedisConnectionError, RedisTimeoutError) as ex:
+                LOGGER.warning("Lost the connection to the Redis streams (%s), reconnecting.", ex)
+                stream_ids = {stream: "0" for stream in self._stream_handlers}
+                self._stop_reading.wait(STREAM_RECONNECT_DELAY_SECONDS)
+        if self.trim_interval is not None:
+            self._trim_streams()
+
+    def _handle_stream_entries(self, response: List, stream_ids: Dict[str, str], count: int):
+        """Dispatch the entries read from each stream, then acknowledge them in one round trip.
+        """
+        acknowledged_entries = []
+        for stream, entries in response:
+            stream = stream.decode() if isinstance(stream, bytes) else stream
+            if stream_ids[stream] != ">" and len(entries) < count:
+                stream_ids[stream] = ">"  # All pending entries are read
+            if not entries:
+                continue
+            handler = self._stream_handlers[stream]
+            for _, fields in entries:
+                # The fields of pending entries that were deleted meanwhile are empty
+                data = (fields.get(b"data") or fields.get("data")) if fields else None
+                if data is not None:
+                    execute_function_util(function=partial(handler, {"data": data}),
+                                          function_name=handler.__name__)
+            acknowledged_entries.append((stream, [entry_id for entry_id, _ in entries]))
+            self.metrics.increment("stream_entries", "read", len(entries))
+        if acknowledged_entries:
+            pipeline = self.redis_db.pipeline(transaction=False)
+            for stream, entry_ids in acknowledged_entries:
+                pipeline.xack(stream, self.consumer_group, *entry_ids)
+            pipeline.execute()
+
+    def _trim_streams(self):
+        """Delete the entries of the streams that all their consumer groups have acknowledged.
+        """
+        for stream in self._stream_handlers:
+            first_id = self._get_first_unacknowledged_id(stream)
+            if first_id is not None:
+                trimmed_count = self.redis_db.xtrim(stream, minid=first_id, approximate=False)
+                self.metrics.increment("stream_entries", "trimmed", trimmed_count)
+
+    def _get_first_unacknowledged_id(self, stream: str) -> Optional[str]:
+        """Return the id of the oldest entry that a consumer group of the stream still needs."""
+        first_ids = []
+        for group in self.redis_db.xinfo_groups(stream):
+            pending = self.redis_db.xpending(stream, group["name"])
+            if pending["pending"]:
+                first_ids.append(_parse_stream_id(pending["min"]))
+            else:
+                milliseconds, sequence = _parse_stream_id(group["last-delivered-id"])
+                first_ids.append((milliseconds, sequence + 1))
+        if not first_ids:
+            return None
+        return "-".join(str(part) for part in min(first_ids))
+
+    def _on_finish(self, data: Dict):
+        try:
+            super()._on_finish(data)
+        finally:
+            self._stop_reading.set()
@@ -1,69 +1,197 @@
 # pylint: disable=too-many-instance-attributes
 import logging
 from concurrent.futures.thread import ThreadPoolExecutor
-from typing import Dict
+from threading import Thread
+from typing import Dict, Union
 
+import requests
 from gsy_framework.client_connections.utils import (
     RestCommunicationMixin, retrieve_jwt_key_from_server)
-from gsy_framework.client_connections.websocket_connection import WebsocketThread
 
-from gsy_matching_engine_sdk.constants import MAX_WORKER_THREADS
+from gsy_matching_engine_sdk.http_session import (
+    REQUEST_TIMEOUT, compress_body, create_http_session)
+from gsy_matching_engine_sdk.matchers.connection_bootstrap import (
+    AUTHENTICATION_HANDSHAKE, WEBSOCKET_HANDSHAKE, ConnectionBootstrap)
+from gsy_matching_engine_sdk.matchers.event_dispatcher import EventDispatcher
 from gsy_matching_engine_sdk.matchers.matching_engine_matcher_client_interface import (
     MatchingEngineMatcherClientInterface)
 from gsy_matching_engine_sdk.matchers.matching_engine_matcher_logger import (
     MatchingEngineMatcherLogger)
+from gsy_matching_engine_sdk.matchers.order_book import OrderBook
+from gsy_matching_engine_sdk.recorder import OUTBOUND
+from gsy_matching_engine_sdk.serializers import get_serializer
 from gsy_matching_engine_sdk.utils import (
-    domain_name_from_env, simulation_id_from_env, websocket_domain_name_from_env)
+    domain_name_from_env, gzip_min_bytes_from_env, http_max_retries_from_env,
+    http_pool_size_from_env, max_worker_threads_from_env, simulation_id_from_env,
+    websocket_domain_name_from_env)
+from gsy_matching_engine_sdk.websocket_connection import WebsocketThread
 from gsy_matching_engine_sdk.websocket_device import WebsocketMessageReceiver
 
 
 LOGGER = logging.getLogger(__name__)
 
+# Number of recommendations messages that are posted concurrently
+MAX_CONCURRENT_BATCHES = 4
+
 
 class RestBaseMatcher(MatchingEngineMatcherClientInterface, RestCommunicationMixin):
     """Handle order matching via rest connection."""
-    def __init__(self, simulation_id=None, domain_name=None, websocket_domain_name=None):
+    def __init__(self, simulation_id=None, domain_name=None, websocket_domain_name=None,
+                 serializer=None, max_workers=None, record_path=None, metrics_port=None,
+                 stats_log_interval=None, http_pool_size=None, http_max_retries=None,
+                 gzip_min_bytes=None):
+        # pylint: disable=too-many-arguments
+        # Events received before the matcher is authenticated are handled once it is
+        self.bootstrap = ConnectionBootstrap(
+            handshakes=(AUTHENTICATION_HANDSHAKE, WEBSOCKET_HANDSHAKE))
+        self.serializer = get_serializer(serializer)
+        self.max_workers = max_workers if max_workers else max_worker_threads_from_env()
         self.simulation_id = simulation_id if simulation_id else simulation_id_from_env()
         self.domain_name = domain_name if domain_name else domain_name_from_env()
         self.websocket_domain_name = (
             websocket_domain_name if websocket_domain_name else websocket_domain_name_from_env())
-        self.dispatcher = self.websocket_thread = self.callback_thread = None
-        self.jwt_token = retrieve_jwt_key_from_server(self.domain_name)
-        self._create_jwt_refresh_timer(self.domain_name)
         self.url_prefix = f"{self.domain_name}/external-connection/api/{self.simulation_id}"
+        # Keep-alive connections, enough for the concurrent batches and the other requests
+        self.session = create_http_session(
+            pool_size=http_pool_size if http_pool_size else http_pool_size_from_env(),
+            max_retries=(
+                http_max_retries if http_max_retries is not None
+                else http_max_retries_from_env()))
+        # Request bodies of at least this size are gzipped (None: never)
+        self.gzip_min_bytes = gzip_min_bytes if gzip_min_bytes else gzip_min_bytes_from_env()
+        self.websocket_thread = self.jwt_token = None
+        self._batches_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_BATCHES)
+        # Events are handled off the websocket thread, serially per event type
+        self.callback_thread = EventDispatcher(
+            self, max_workers=self.max_workers, **self._get_event_queues_options())
+        self.dispatcher = WebsocketMessageReceiver(self)
 
         self._logger_helper = MatchingEngineMatcherLogger
         self._markets_cache = None  # Cached information about markets and time slots
+        # Reverse index of the markets cache, mapping each time slot to its market type name
+        self._market_type_names_by_time_slot = {}
+        self.order_book = OrderBook()  # Open bids/offers, updated on every offers_bids_response
+        self._start_recording(record_path)
+        self._start_metrics(self.callback_thread, metrics_port, stats_log_interval)
+        self._start_memory_report()
+
+        self._update_handled_events()
+        self._connect_to_simulation()
+
+    @property
+    def jwt_token(self):
+        """JWT of the agent, refreshed periodically by RestCommunicationMixin."""
+        return self._jwt_token
+
+    @jwt_token.setter
+    def jwt_token(self, jwt_token):
+        self._jwt_token = jwt_token  # pylint: disable=attribute-defined-outside-init
+        # The session sends the header with every request
+        if jwt_token is None:
+            self.session.headers.pop("Authorization", None)
+        else:
+            self.session.headers["Authorization"] = f"JWT {jwt_token}"
+
+    def _connect_to_simulation(self):
+        """Authenticate to GSy Exchange while the websocket connects, without blocking.
+
+        The events received before the JWT of the requests is retrieved are handled once it is
+        (see self.bootstrap).
+        """
         self._start_websocket_connection()
+        Thread(target=self._authenticate, daemon=True).start()
+
+    def _authenticate(self):
+        try:
+            self.jwt_token = retrieve_jwt_key_from_server(self.domain_name)
+            self._create_jwt_refresh_timer(self.domain_name)
+        except Exception as ex:  # pylint: disable=broad-except
+            LOGGER.exception("Authentication to %s failed.", self.domain_name)
+            self.bootstrap.set_failed(ex)
+            return
+        self.bootstrap.complete_handshake(AUTHENTICATION_HANDSHAKE, self.simulation_id)
 
     def _start_websocket_connection(self):
-        self.dispatcher = WebsocketMessageReceiver(self)
         websocket_uri = f"{self.websocket_domain_name}/{self.simulation_id}/matching-engine/"
-        self.websocket_thread = WebsocketThread(websocket_uri, self.domain_name,
-                                                self.dispatcher)
+        self.websocket_thread = WebsocketThread(
+            websocket_uri, self.domain_name, self.dispatcher,
+            on_connected=self._on_websocket_connected)
         self.websocket_thread.start()
-        self.callback_thread = ThreadPoolExecutor(max_workers=MAX_WORKER_THREADS)
+
+    def _on_websocket_connected(self):
         LOGGER.info(
             "Connection to gsy-e has been established (simulation_id: %s).", self.simulation_id)
+        self.bootstrap.complete_handshake(WEBSOCKET_HANDSHAKE, self.simulation_id)
 
     def submit_matches(self, recommended_matches):
+        """Post the recommendations, split into bounded messages that are posted concurrently.
+
+        The exchange responds to each message with a matched_recommendations_response event.
+        """
+        if self._is_submission_cancelled(recommended_matches):
+            return
         if recommended_matches:
             LOGGER.debug("Sending recommendations %s.", recommended_matches)
-            data = {"recommended_matches": recommended_matches}
-            self._post_request(f"{self.url_prefix}/recommendations", data)
+            endpoint = f"{self.url_prefix}/recommendations"
+            with self.metrics.time_stage("submit_matches"):
+                batches = self._split_recommendations(recommended_matches)
+                if len(batches) == 1:
+                    self._send_encoded_request("POST", endpoint, batches[0].payload)
+                else:
+                    list(self._batches_executor.map(
+                        lambda batch: self._send_encoded_request("POST", endpoint, batch.payload),
+                        batches))
 
     def request_offers_bids(self, filters: Dict = None):
+        self._record_message(OUTBOUND, "offers_bids", {"filters": filters})
         self._get_request(f"{self.url_prefix}/offers-bids", {"filters": filters})
 
+    def _send_request(self, method: str, endpoint: str, data: Dict) -> bool:
+        """Send the request with its body encoded by the configured serializer."""
+        return self._send_encoded_request(method, endpoint, self.serializer.dumps(data))
+
+    def _send_encoded_request(self, method: str, endpoint: str, body: Union[str, bytes]) -> bool:
+        """Send the request with an already encoded body over the keep-alive session."""
+        # The kind of request is the last part of the endpoint, e.g. offers-bids -> offers_bids
+        request_kind = endpoint.rstrip("/").rsplit("/", 1)[-1].replace("-", "_")
+        self._track_sent_message(request_kind, len(body))
+        body, headers = compress_body(body, self.gzip_min_bytes)
+        try:
+            response = self.session.request(
+                method, endpoint, data=body, headers=headers, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as ex:
+            LOGGER.error("Request to %s failed: %s.", endpoint, ex)
+            return False
+        if not response.ok:
+            LOGGER.error("Request to %s failed with status code %s: %s.",
+                         endpoint, response.status_code, response.text)
+        return response.ok
+
+    def _post_request(self, endpoint, data):
+        return self._send_request("POST", endpoint, data)
+
+    def _get_request(self, endpoint, data):
+        return self._send_request("GET", endpoint, data)
+
     def _on_offers_bids_response(self, data: Dict):
-        self.on_offers_bids_response(data)
+        self.order_book.apply_snapshot(data.get("bids_offers") or {})
+        with self._track_matching_deadline() as deadline:
+            if deadline is not None and deadline.is_expired:
+                LOGGER.debug("Skipping the matching of the response of an expired tick.")
+                return
+            with self.metrics.time_stage("matching"):
+                if self._is_streaming_recommendations():
+                    self._submit_streamed_recommendations(data)
+                else:
+                    self.on_offers_bids_response(data)
 
     def on_offers_bids_response(self, data: Dict):
         recommendations = []
         self.submit_matches(recommendations)
 
     def _on_match(self, data):
-        self._logger_helper.log_recommendations_response(self._markets_cache, data)
+        self._logger_helper.log_recommendations_response_by_time_slot(
+            self._market_type_names_by_time_slot, data)
         self.on_matched_recommendations_response(data)
 
     def on_matched_recommendations_response(self, data):
@@ -71,10 +199,15 @@ class RestBaseMatcher(MatchingEngineMatcherClientInterface, RestCommunicationMix
 
     def _on_tick(self, data):
         self._cache_markets_information(data)
+        self.order_book.retain_time_slots(self._markets_cache)
         self.on_tick(data)
 
     def _on_market_cycle(self, data):
+        self._cancel_matching()
         self.on_market_cycle(data)
+        self._report_memory()
 
     def _on_finish(self, data):
+        if self.recorder is not None:
+            self.recorder.flush()
         self.on_finish(data)
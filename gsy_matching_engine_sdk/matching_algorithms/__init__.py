@@ -0,0 +1,8 @@
+__all__ = [
+    "IndexedAttributedMatchingAlgorithm",
+    "VectorizedPayAsClearMatchingAlgorithm",
+    "WelfareMaximizingMatchingAlgorithm"
+]
+from .indexed_attributed_matching_algorithm import IndexedAttributedMatchingAlgorithm
+from .pay_as_clear_matching_algorithm import VectorizedPayAsClearMatchingAlgorithm
+from .welfare_maximizing_matching_algorithm import WelfareMaximizingMatchingAlgorithm
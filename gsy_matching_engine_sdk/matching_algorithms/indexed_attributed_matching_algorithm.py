@@ -0,0 +1,154 @@
+"""Module for the attributed matching algorithm that indexes the orders by their attributes."""
+
+from typing import Dict, List, Optional, Union
+
+from gsy_framework.constants_limits import FLOATING_POINT_TOLERANCE
+from gsy_framework.data_classes import BidOfferMatch
+from gsy_framework.matching_algorithms import BaseMatchingAlgorithm
+
+from gsy_matching_engine_sdk.matchers.columnar_order_book import ColumnarOrderBook
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matchers.recommendations_stream import iter_partitions
+from gsy_matching_engine_sdk.matching_algorithms.order_index import (
+    SortedOrders, get_stage_requirements)
+
+
+class _AttributedPartitionMatcher:
+    """Match the orders of one market / time slot, one stage after the other."""
+
+    def __init__(self, market_id: str, time_slot: str, bids: List[Dict], offers: List[Dict]):
+        self.market_id = market_id
+        self.time_slot = time_slot
+        self.payload_bids = bids
+        self.payload_offers = offers
+        self.bids = SortedOrders(bids, "buyer", descending=True)
+        self.offers = SortedOrders(offers, "seller", descending=False)
+        self.recommendations: List[Dict] = []
+
+    def match(self) -> List[Dict]:
+        """Return the recommendations of the trading partners, energy type and residual stages.
+        """
+        for position, bid in enumerate(self.payload_bids):
+            requirements = get_stage_requirements(bid, with_trading_partners=True)
+            if requirements:
+                self._match_bid(self.bids.ranks[position], requirements)
+        for position, offer in enumerate(self.payload_offers):
+            requirements = get_stage_requirements(offer, with_trading_partners=True)
+            if requirements:
+                self._match_offer(self.offers.ranks[position], requirements)
+        for position, bid in enumerate(self.payload_bids):
+            requirements = get_stage_requirements(bid, with_trading_partners=False)
+            if requirements:
+                self._match_bid(self.bids.ranks[position], requirements)
+        self._match_residual_orders()
+        return self.recommendations
+
+    def _match_bid(self, bid_rank: int, requirements: List[Dict]):
+        for offer_rank, requirement in self.offers.get_candidates(requirements):
+            if self.bids.energies[bid_rank] <= FLOATING_POINT_TOLERANCE:
+                break
+            if self.offers.energies[offer_rank] <= FLOATING_POINT_TOLERANCE:
+                continue
+            if not self._is_tradable(bid_rank, offer_rank):
+                break
+            self._add_match(bid_rank, offer_rank, {"bid_requirement": requirement})
+
+    def _match_offer(self, offer_rank: int, requirements: List[Dict]):
+        for bid_rank, requirement in self.bids.get_candidates(requirements):
+            if self.offers.energies[offer_rank] <= FLOATING_POINT_TOLERANCE:
+                break
+            if self.bids.energies[bid_rank] <= FLOATING_POINT_TOLERANCE:
+                continue
+            if not self._is_tradable(bid_rank, offer_rank):
+                break
+            self._add_match(bid_rank, offer_rank, {"offer_requirement": requirement})
+
+    def _match_residual_orders(self):
+        """Match the remaining energy of all orders with the pay-as-bid algorithm.
+
+        Since the offers are consumed in priority order, the bids are matched in a single pass
+        over the offers.
+        """
+        offer_rank = 0
+        offers_count = len(self.offers.orders)
+        for bid_rank in range(len(self.bids.orders)):
+            while self.bids.energies[bid_rank] > FLOATING_POINT_TOLERANCE:
+                while (offer_rank < offers_count and
+                       self.offers.energies[offer_rank] <= FLOATING_POINT_TOLERANCE):
+                    offer_rank += 1
+                if offer_rank == offers_count or not self._is_tradable(bid_rank, offer_rank):
+                    break
+                self._add_match(bid_rank, offer_rank, None)
+
+    def _is_tradable(self, bid_rank: int, offer_rank: int) -> bool:
+        """Return True if the bid rate covers the offer rate."""
+        return (self.offers.rates[offer_rank] - self.bids.rates[bid_rank] <=
+                FLOATING_POINT_TOLERANCE)
+
+    def _add_match(self, bid_rank: int, offer_rank: int, matching_requirements: Optional[Dict]):
+        selected_energy = min(self.bids.energies[bid_rank], self.offers.energies[offer_rank])
+        self.bids.energies[bid_rank] -= selected_energy
+        self.offers.energies[offer_rank] -= selected_energy
+        self.recommendations.append(
+            BidOfferMatch(
+                market_id=self.market_id,
+                time_slot=self.time_slot,
+                bid=self.bids.orders[bid_rank],
+                offer=self.offers.orders[offer_rank],
+                selected_energy=selected_energy,
+                trade_rate=self.bids.rates[bid_rank],
+                matching_requirements=matching_requirements).serializable_dict())
+
+
+class IndexedAttributedMatchingAlgorithm(BaseMatchingAlgorithm):
+    """Attributed pay-as-bid matching, that looks up the counterparts of the orders with
+    requirements in indexes instead of checking them against every order of the time slot.
+
+    The orders of each market / time slot are matched in stages, each one of them matching the
+    energy left by the previous ones:
+        1. bids with trading partners requirements, then offers with trading partners
+           requirements, against the orders of these partners;
+        2. bids with energy type requirements, against the offers with these energy types;
+        3. all the orders (with or without requirements), with the pay-as-bid algorithm.
+    In stages 1 and 2 the orders are processed in arrival order, each one of them matching its
+    candidate counterparts in price priority order. The requirement that a pair satisfies is
+    set in the matching requirements of its recommendation.
+
+    The offers are indexed per seller id and energy type, and the bids per buyer id, therefore
+    the matching is linear in the number of orders and matched candidates, instead of quadratic
+    for books with many requirements.
+    """
+
+    @classmethod
+    def get_matches_recommendations(
+            cls, matching_data: Union[Dict, ColumnarOrderBook],
+            deadline: Optional[MatchingDeadline] = None) -> List[Dict]:
+        """Calculate and return the attributed recommendations.
+
+        Args:
+            matching_data: bids and offers of each market and time slot, either as a
+                ColumnarOrderBook (whose partitions are converted to dicts one at a time) or in
+                the format: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+            deadline: if set, the markets / time slots are matched nearest delivery time slots
+                first, and the matching stops once the deadline expires
+
+        Returns: list of BidOfferMatch.serializable_dict() recommendations
+        """
+        if isinstance(matching_data, ColumnarOrderBook):
+            partitions = matching_data.iter_matching_data(nearest_first=deadline is not None)
+        elif deadline is not None:
+            partitions = iter_partitions(matching_data)
+        else:
+            partitions = ((market_id, time_slot, data)
+                          for market_id, time_slot_data in matching_data.items()
+                          for time_slot, data in time_slot_data.items())
+
+        recommendations = []
+        for market_id, time_slot, data in partitions:
+            if deadline is not None and deadline.is_expired:
+                break
+            bids, offers = data.get("bids") or [], data.get("offers") or []
+            if bids and offers:
+                recommendations.extend(
+                    _AttributedPartitionMatcher(market_id, time_slot, bids, offers).match())
+        return recommendations
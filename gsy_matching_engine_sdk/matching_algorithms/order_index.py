@@ -0,0 +1,130 @@
+"""Module for the indexes of the orders by the attributes that requirements refer to.
+
+Bids can require trading partners (seller ids) and energy types (attributes of the offers), and
+offers can require trading partners (buyer ids). The indexes retrieve the counterparts that
+satisfy a requirement without checking every order of the market / time slot.
+"""
+
+import heapq
+from collections import defaultdict
+from itertools import islice, repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from gsy_framework.constants_limits import FLOATING_POINT_TOLERANCE
+
+TRADING_PARTNERS = "trading_partners"
+ENERGY_TYPE = "energy_type"
+TRADER_ID = "trader_id"
+
+
+def get_trader_ids(order: Dict, trader_key: str) -> Set[str]:
+    """Return the ids of the trader of the order, i.e. of the seller or buyer and its origin."""
+    trader_ids = {order.get(f"{trader_key}_id"), order.get(f"{trader_key}_origin_id")}
+    trader = order.get(trader_key)
+    if isinstance(trader, dict):
+        trader_ids.update((trader.get("uuid"), trader.get("origin_uuid")))
+    trader_ids.discard(None)
+    return trader_ids
+
+
+def get_energy_types(requirement: Dict) -> Set[str]:
+    """Return the energy types required by the requirement."""
+    energy_types = requirement.get(ENERGY_TYPE) or []
+    return {energy_types} if isinstance(energy_types, str) else set(energy_types)
+
+
+def get_stage_requirements(order: Dict, with_trading_partners: bool) -> List[Dict]:
+    """Return the requirements of the order that restrict its counterparts to trading partners
+    (or only to energy types if with_trading_partners is False)."""
+    return [requirement for requirement in order.get("requirements") or []
+            if (bool(requirement.get(TRADING_PARTNERS)) if with_trading_partners else
+                not requirement.get(TRADING_PARTNERS) and bool(get_energy_types(requirement)))]
+
+
+def satisfies_requirement(order: Dict, trader_key: str, requirement: Dict) -> bool:
+    """Return True if the order satisfies the requirement of a counterpart order.
+
+    Args:
+        order: the order, whose trader is its "seller" or "buyer" as set by trader_key
+        requirement: requirement that sets trading partners and/or energy types
+    """
+    trading_partners = requirement.get(TRADING_PARTNERS)
+    if trading_partners and get_trader_ids(order, trader_key).isdisjoint(trading_partners):
+        return False
+    energy_types = get_energy_types(requirement)
+    if energy_types and (order.get("attributes") or {}).get(ENERGY_TYPE) not in energy_types:
+        return False
+    return bool(trading_partners or energy_types)
+
+
+class SortedOrders:
+    """Bids or offers of a market / time slot, sorted by priority and indexed by attributes.
+
+    The orders are referred to by their rank in the priority order (descending energy rate for
+    the bids, ascending for the offers, in arrival order for equal rates). The indexes map each
+    trader id and energy type to the ascending ranks of its orders, therefore the candidates of
+    a requirement are retrieved in priority order without scanning the other orders.
+    """
+
+    def __init__(self, orders: List[Dict], trader_key: str, descending: bool):
+        positions = sorted(range(len(orders)),
+                           key=lambda position: orders[position]["energy_rate"],
+                           reverse=descending)
+        self.orders = [orders[position] for position in positions]
+        self.ranks = [0] * len(orders)  # Rank of the order at each position of the payload
+        for rank, position in enumerate(positions):
+            self.ranks[position] = rank
+        self.rates = [order["energy_rate"] for order in self.orders]
+        self.energies = [order["energy"] for order in self.orders]  # Remaining energies
+        # Ranks of the orders per (TRADER_ID or ENERGY_TYPE, value)
+        self._index: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        self.energy_types: List[Optional[str]] = []
+        for rank, order in enumerate(self.orders):
+            for trader_id in get_trader_ids(order, trader_key):
+                self._index[(TRADER_ID, trader_id)].append(rank)
+            energy_type = (order.get("attributes") or {}).get(ENERGY_TYPE)
+            self.energy_types.append(energy_type)
+            if energy_type is not None:
+                self._index[(ENERGY_TYPE, energy_type)].append(rank)
+        # Position of the first order with remaining energy in each list of the index. Orders
+        # are mostly consumed in priority order, therefore the exhausted ones are skipped once.
+        self._index_starts: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def get_candidates(self, requirements: List[Dict]) -> Iterator[Tuple[int, Dict]]:
+        """Yield the ranks of the orders that satisfy any of the requirements of a counterpart
+        order, in ascending order, together with the first requirement that they satisfy.
+
+        An order satisfies a requirement if its trader is one of the trading partners and if its
+        energy type is one of the required ones (for each of these keys that is set).
+        """
+        candidates = heapq.merge(*(
+            zip(self._get_requirement_candidates(requirement), repeat(requirement_index))
+            for requirement_index, requirement in enumerate(requirements)))
+        previous_rank = None
+        for rank, requirement_index in candidates:
+            if rank != previous_rank:
+                previous_rank = rank
+                yield rank, requirements[requirement_index]
+
+    def _get_requirement_candidates(self, requirement: Dict) -> Iterable[int]:
+        trading_partners = set(requirement.get(TRADING_PARTNERS) or [])
+        energy_types = get_energy_types(requirement)
+        if not trading_partners:
+            return heapq.merge(*(self._get_remaining_ranks((ENERGY_TYPE, energy_type))
+                                 for energy_type in energy_types))
+        candidates = heapq.merge(*(self._get_remaining_ranks((TRADER_ID, trader_id))
+                                   for trader_id in trading_partners))
+        if energy_types:
+            candidates = (rank for rank in candidates if self.energy_types[rank] in energy_types)
+        return candidates
+
+    def _get_remaining_ranks(self, key: Tuple[str, str]) -> Iterable[int]:
+        """Return the ranks of the orders of the index key, after its exhausted first orders."""
+        ranks = self._index.get(key)
+        if not ranks:
+            return ()
+        start = self._index_starts[key]
+        while start < len(ranks) and self.energies[ranks[start]] <= FLOATING_POINT_TOLERANCE:
+            start += 1
+        self._index_starts[key] = start
+        return islice(ranks, start, None)
@@ -0,0 +1,165 @@
+"""Module for the vectorized pay-as-clear (uniform price) matching algorithm."""
+
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+from gsy_framework.constants_limits import FLOATING_POINT_TOLERANCE
+from gsy_framework.data_classes import BidOfferMatch
+from gsy_framework.matching_algorithms import BaseMatchingAlgorithm
+
+from gsy_matching_engine_sdk.matchers.columnar_order_book import (
+    ColumnarOrderBook, ColumnarPartition)
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matchers.recommendations_stream import iter_partitions
+
+
+class VectorizedPayAsClearMatchingAlgorithm(BaseMatchingAlgorithm):
+    """Uniform price matching, computed on NumPy arrays instead of Python dicts.
+
+    For every market / time slot partition the bids are sorted by descending and the offers by
+    ascending energy rate. The cumulative energies of both sorted lists form the demand and
+    supply merit-order curves. The union of their breakpoints splits the traded energy in
+    segments, each one of them belonging to exactly one bid and one offer. Segments are matched
+    as long as the bid rate covers the offer rate, and all of them are cleared at the same
+    rate: the rate of the marginal (last matched) offer.
+
+    NOTE: Bid requirements and offer attributes are not taken into account.
+    """
+
+    @classmethod
+    def get_matches_recommendations(
+            cls, matching_data: Union[Dict, ColumnarOrderBook],
+            deadline: Optional[MatchingDeadline] = None) -> List[Dict]:
+        """Calculate and return the pay-as-clear recommendations.
+
+        Args:
+            matching_data: bids and offers of each market and time slot, either as a
+                ColumnarOrderBook or in the format:
+                {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+            deadline: if set, the markets / time slots are matched nearest delivery time slots
+                first, and the matching stops once the deadline expires
+
+        Returns: list of BidOfferMatch.serializable_dict() recommendations
+        """
+        if isinstance(matching_data, ColumnarOrderBook):
+            partitions = [
+                (partition.market_id, partition.time_slot, partition)
+                for partition in matching_data]
+            if deadline is not None:
+                partitions.sort(key=lambda partition: partition[1])
+        elif deadline is not None:
+            partitions = iter_partitions(matching_data)
+        else:
+            partitions = ((market_id, time_slot, data)
+                          for market_id, time_slot_data in matching_data.items()
+                          for time_slot, data in time_slot_data.items())
+
+        recommendations = []
+        for market_id, time_slot, data in partitions:
+            if deadline is not None and deadline.is_expired:
+                break
+            if isinstance(data, ColumnarPartition):
+                if data.bids and data.offers:
+                    recommendations.extend(cls._get_matches_for_arrays(
+                        market_id, time_slot,
+                        data.bids.energy_rates, data.bids.energies, data.bids.get_order,
+                        data.offers.energy_rates, data.offers.energies, data.offers.get_order))
+            else:
+                recommendations.extend(
+                    cls._get_matches_for_time_slot(
+                        market_id, time_slot, data.get("bids") or [], data.get("offers") or []))
+        return recommendations
+
+    @staticmethod
+    def _get_rates_and_energies(orders: List[Dict]):
+        rates = np.fromiter((order["energy_rate"] for order in orders),
+                            dtype=np.float64, count=len(orders))
+        energies = np.fromiter((order["energy"] for order in orders),
+                               dtype=np.float64, count=len(orders))
+        return rates, energies
+
+    @staticmethod
+    def _get_sorted_arrays(rates: np.ndarray, energies: np.ndarray, descending: bool):
+        """Return indices, rates and cumulative energies of the orders sorted by energy rate."""
+        valid_indices = np.flatnonzero(energies > FLOATING_POINT_TOLERANCE)
+        sort_keys = -rates[valid_indices] if descending else rates[valid_indices]
+        sorted_indices = valid_indices[np.argsort(sort_keys, kind="stable")]
+        return sorted_indices, rates[sorted_indices], np.cumsum(energies[sorted_indices])
+
+    @classmethod
+    def _get_matches_for_time_slot(
+            cls, market_id: str, time_slot: str, bids: List[Dict], offers: List[Dict]
+    ) -> List[Dict]:
+        if not bids or not offers:
+            return []
+        return cls._get_matches_for_arrays(
+            market_id, time_slot, *cls._get_rates_and_energies(bids), bids.__getitem__,
+            *cls._get_rates_and_energies(offers), offers.__getitem__)
+
+    @classmethod
+    def _get_matches_for_arrays(
+            cls, market_id: str, time_slot: str,
+            bid_rates: np.ndarray, bid_energies: np.ndarray, get_bid: Callable[[int], Dict],
+            offer_rates: np.ndarray, offer_energies: np.ndarray, get_offer: Callable[[int], Dict]
+    ) -> List[Dict]:
+        """Match the orders of one market / time slot, given as arrays of rates and energies.
+
+        The dicts of the orders are only retrieved (via get_bid/get_offer) for the matched ones.
+        """
+        # pylint: disable=too-many-arguments,too-many-locals
+        bid_indices, bid_rates, demand_curve = cls._get_sorted_arrays(
+            bid_rates, bid_energies, descending=True)
+        offer_indices, offer_rates, supply_curve = cls._get_sorted_arrays(
+            offer_rates, offer_energies, descending=False)
+        if bid_indices.size == 0 or offer_indices.size == 0:
+            return []
+
+        # Every breakpoint of any of the two curves starts a new (bid, offer) segment
+        segment_ends = np.union1d(demand_curve, supply_curve)
+        segment_starts = np.concatenate(([0.], segment_ends[:-1]))
+        segment_bids = np.searchsorted(demand_curve, segment_starts, side="right")
+        segment_offers = np.searchsorted(supply_curve, segment_starts, side="right")
+
+        # Segments after the end of any of the curves have no counterpart
+        is_tradable = (segment_bids < bid_indices.size) & (segment_offers < offer_indices.size)
+        segment_bids = np.minimum(segment_bids, bid_indices.size - 1)
+        segment_offers = np.minimum(segment_offers, offer_indices.size - 1)
+        is_tradable &= (
+            bid_rates[segment_bids] + FLOATING_POINT_TOLERANCE >= offer_rates[segment_offers])
+
+        # Bid rates only decrease and offer rates only increase along the curves, therefore the
+        # tradable segments are always a prefix of all the segments
+        matched_segments_count = (
+            int(np.argmin(is_tradable)) if not is_tradable.all() else is_tradable.size)
+        if matched_segments_count == 0:
+            return []
+
+        segment_energies = (
+            segment_ends[:matched_segments_count] - segment_starts[:matched_segments_count])
+        # Near-equal breakpoints of the two curves produce negligible segments
+        is_significant = segment_energies > FLOATING_POINT_TOLERANCE
+        segment_energies = segment_energies[is_significant]
+        segment_bids = segment_bids[:matched_segments_count][is_significant]
+        segment_offers = segment_offers[:matched_segments_count][is_significant]
+        if segment_energies.size == 0:
+            return []
+        clearing_rate = float(offer_rates[segment_offers[-1]])
+
+        # An order matched in several segments is retrieved only once
+        bid_positions = bid_indices[segment_bids].tolist()
+        offer_positions = offer_indices[segment_offers].tolist()
+        bids = {position: get_bid(position) for position in set(bid_positions)}
+        offers = {position: get_offer(position) for position in set(offer_positions)}
+        recommendations = []
+        for bid_position, offer_position, energy in zip(
+                bid_positions, offer_positions, segment_energies.tolist()):
+            recommendations.append(
+                BidOfferMatch(
+                    market_id=market_id,
+                    time_slot=time_slot,
+                    bid=bids[bid_position],
+                    offer=offers[offer_position],
+                    selected_energy=energy,
+                    trade_rate=clearing_rate,
+                    matching_requirements=None).serializable_dict())
+        return recommendations
@@ -0,0 +1,455 @@
+"""Module for the matching algorithm that maximizes the total surplus of the trades.
+
+The HiGHS solver (highspy library) is imported on first use, since it is an optional dependency.
+"""
+
+import heapq
+import importlib
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from gsy_framework.constants_limits import FLOATING_POINT_TOLERANCE
+from gsy_framework.data_classes import BidOfferMatch
+from gsy_framework.matching_algorithms import BaseMatchingAlgorithm
+
+from gsy_matching_engine_sdk.matchers.columnar_order_book import ColumnarOrderBook
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matchers.recommendations_stream import iter_partitions
+from gsy_matching_engine_sdk.matching_algorithms.order_index import (
+    TRADING_PARTNERS, SortedOrders, get_energy_types, get_stage_requirements, get_trader_ids,
+    satisfies_requirement)
+
+LOGGER = logging.getLogger(__name__)
+
+# Keys of the nodes of the flow network, besides the ("bid", id) / ("offer", id) ones
+SELLER_HUB = "seller"  # (SELLER_HUB, seller ids, energy type): offers of a seller and type
+BUYER_HUB = "buyer"  # (BUYER_HUB, buyer ids): bids without requirements of a buyer
+ENERGY_TYPE_HUB = "energy_type"  # (ENERGY_TYPE_HUB, energy type): offers of an energy type
+MARKET_HUB = ("market",)  # All offers without requirements
+
+
+def _import_highspy():
+    try:
+        return importlib.import_module("highspy")
+    except ImportError as ex:
+        raise ImportError("The WelfareMaximizingMatchingAlgorithm needs the HiGHS solver, "
+                          "install it with the welfare extra of the SDK, or with: "
+                          "pip install highspy") from ex
+
+
+class _FlowNetwork:
+    # pylint: disable=too-many-instance-attributes
+    """Sparse flow network of the orders of a market / time slot.
+
+    Energy flows from the offers to the bids, whose energies bound the outflow / inflow of their
+    nodes. Instead of one edge per compatible bid/offer pair, the offers without requirements
+    flow through a tree of hubs: per seller and energy type, per energy type, then the whole
+    market. Bids without requirements are fed by the market hub, bids that require trading
+    partners or energy types by the hubs of these partners or types. Offers that require
+    trading partners flow to the hubs of the bids without requirements of these partners (one
+    per buyer), and directly to the bids with requirements of these partners that accept them.
+
+    Each edge from an offer costs its energy rate, and each edge to a bid earns its energy rate,
+    therefore the minimum cost flow maximizes the total surplus.
+    """
+
+    def __init__(self, bids: List[Dict], offers: List[Dict]):
+        self.bids = SortedOrders(bids, "buyer", descending=True)
+        self.offers = SortedOrders(offers, "seller", descending=False)
+        self.bids_requirements = [
+            get_stage_requirements(bid, with_trading_partners=True) +
+            get_stage_requirements(bid, with_trading_partners=False)
+            for bid in self.bids.orders]
+        self.row_keys: List[Tuple] = []
+        self.row_upper_bounds: List[float] = []
+        self._rows: Dict[Tuple, int] = {}
+        self.column_keys: List[Tuple] = []
+        self.column_rows: List[Tuple[int, int]] = []  # Rows of the tail and head of each edge
+        self.column_costs: List[float] = []
+        self.column_requirements: List[Optional[Dict]] = []
+        self._columns: Dict[Tuple, int] = {}
+        self.hub_parents: Dict[Tuple, Tuple] = {}  # Parent of the seller and energy type hubs
+        self.buyer_hubs: List[Tuple] = []
+        self._seller_hubs_by_trader: Dict[str, List[Tuple]] = defaultdict(list)
+        # Tradable bids of each buyer: ranks of the ones without requirements per buyer ids, and
+        # of the ones with requirements per buyer id
+        self._buyer_bid_ranks: Dict[Tuple, List[int]] = defaultdict(list)
+        self._buyers_ids_by_trader: Dict[str, List[Tuple]] = defaultdict(list)
+        self._restricted_bid_ranks_by_trader: Dict[str, List[int]] = defaultdict(list)
+        self._index_bids()
+        self._add_offers()
+        self._add_bids()
+
+    def _add_row(self, key: Tuple, upper_bound: float = 0.) -> int:
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self.row_keys)
+            self.row_keys.append(key)
+            self.row_upper_bounds.append(upper_bound)
+        return row
+
+    def _add_column(self, tail_key: Tuple, head_key: Tuple, cost: float,
+                    requirements: Optional[Dict] = None):
+        key = (tail_key, head_key)
+        if key in self._columns:
+            return
+        self._columns[key] = len(self.column_keys)
+        self.column_keys.append(key)
+        self.column_rows.append((self._rows[tail_key], self._rows[head_key]))
+        self.column_costs.append(cost)
+        self.column_requirements.append(requirements)
+
+    def _add_hub(self, key: Tuple, parent_key: Optional[Tuple]):
+        if key in self._rows:
+            return
+        self._add_row(key)
+        if parent_key is not None:
+            self.hub_parents[key] = parent_key
+            self._add_column(key, parent_key, 0.)
+
+    def _add_bid_row(self, bid_rank: int) -> Tuple:
+        bid_key = ("bid", self.bids.orders[bid_rank]["id"])
+        self._add_row(bid_key, self.bids.energies[bid_rank])
+        return bid_key
+
+    def _is_tradable(self, bid_rank: int, offer_rank: int) -> bool:
+        return (self.offers.rates[offer_rank] - self.bids.rates[bid_rank] <=
+                FLOATING_POINT_TOLERANCE)
+
+    def _is_bid_tradable(self, bid_rank: int) -> bool:
+        """Return True if the bid has energy and covers the rate of the cheapest offer."""
+        return (self.bids.energies[bid_rank] > FLOATING_POINT_TOLERANCE and
+                bool(self.offers.orders) and self._is_tradable(bid_rank, 0))
+
+    def _index_bids(self):
+        """Index the tradable bids per buyer, for the offers that require trading partners."""
+        for bid_rank, bid in enumerate(self.bids.orders):
+            if not self._is_bid_tradable(bid_rank):
+                continue
+            trader_ids = get_trader_ids(bid, "buyer")
+            if self.bids_requirements[bid_rank]:
+                for trader_id in trader_ids:
+                    self._restricted_bid_ranks_by_trader[trader_id].append(bid_rank)
+                continue
+            buyer_ids = tuple(sorted(trader_ids))
+            if buyer_ids not in self._buyer_bid_ranks:
+                for trader_id in buyer_ids:
+                    self._buyers_ids_by_trader[trader_id].append(buyer_ids)
+            self._buyer_bid_ranks[buyer_ids].append(bid_rank)
+
+    def _add_offers(self):
+        """Add the offers, either to their hubs or with edges to the bids that they require."""
+        if not self.bids.orders:
+            return
+        for offer_rank, offer in enumerate(self.offers.orders):
+            if (self.offers.energies[offer_rank] <= FLOATING_POINT_TOLERANCE or
+                    not self._is_tradable(0, offer_rank)):
+                continue
+            offer_key = ("offer", offer["id"])
+            self._add_row(offer_key, self.offers.energies[offer_rank])
+            requirements = get_stage_requirements(offer, with_trading_partners=True)
+            if requirements:
+                for requirement in requirements:
+                    self._add_required_bids(offer_rank, offer_key, requirement)
+                continue
+            energy_type = self.offers.energy_types[offer_rank]
+            trader_ids = tuple(sorted(get_trader_ids(offer, "seller")))
+            seller_hub_key = (SELLER_HUB, trader_ids, energy_type)
+            if seller_hub_key not in self._rows:
+                for trader_id in trader_ids:
+                    self._seller_hubs_by_trader[trader_id].append(seller_hub_key)
+            self._add_hub(MARKET_HUB, None)
+            self._add_hub((ENERGY_TYPE_HUB, energy_type), MARKET_HUB)
+            self._add_hub(seller_hub_key, (ENERGY_TYPE_HUB, energy_type))
+            self._add_column(offer_key, seller_hub_key, self.offers.rates[offer_rank])
+
+    def _add_required_bids(self, offer_rank: int, offer_key: Tuple, requirement: Dict):
+        """Add the edges from an offer to the bids of the trading partners that it requires."""
+        if get_energy_types(requirement):
+            # The bids must have energy types too, each candidate bid is connected directly
+            bid_ranks = (rank for rank, _ in self.bids.get_candidates([requirement]))
+        else:
+            self._add_buyer_hubs(offer_rank, offer_key, requirement)
+            bid_ranks = heapq.merge(*(
+                self._restricted_bid_ranks_by_trader.get(trader_id, ())
+                for trader_id in set(requirement[TRADING_PARTNERS])))
+        offer = self.offers.orders[offer_rank]
+        for bid_rank in bid_ranks:
+            if not self._is_tradable(bid_rank, offer_rank):
+                break
+            if self.bids.energies[bid_rank] <= FLOATING_POINT_TOLERANCE:
+                continue
+            bid_requirements = self.bids_requirements[bid_rank]
+            bid_requirement = next((
+                bid_requirement for bid_requirement in bid_requirements
+                if satisfies_requirement(offer, "seller", bid_requirement)), None)
+            if bid_requirements and bid_requirement is None:
+                continue
+            matching_requirements = {"offer_requirement": requirement}
+            if bid_requirement is not None:
+                matching_requirements["bid_requirement"] = bid_requirement
+            self._add_column(offer_key, self._add_bid_row(bid_rank),
+                             self.offers.rates[offer_rank] - self.bids.rates[bid_rank],
+                             matching_requirements)
+
+    def _add_buyer_hubs(self, offer_rank: int, offer_key: Tuple, requirement: Dict):
+        """Add the edges from an offer to the hubs of the bids without requirements of the
+        trading partners that it requires."""
+        for trader_id in set(requirement[TRADING_PARTNERS]):
+            for buyer_ids in self._buyers_ids_by_trader.get(trader_id, ()):
+                bid_ranks = self._buyer_bid_ranks[buyer_ids]
+                if not self._is_tradable(bid_ranks[0], offer_rank):
+                    continue
+                hub_key = (BUYER_HUB, buyer_ids)
+                if hub_key not in self._rows:
+                    self._add_row(hub_key)
+                    self.buyer_hubs.append(hub_key)
+                    for bid_rank in bid_ranks:
+                        self._add_column(hub_key, self._add_bid_row(bid_rank),
+                                         -self.bids.rates[bid_rank])
+                self._add_column(offer_key, hub_key, self.offers.rates[offer_rank],
+                                 {"offer_requirement": requirement})
+
+    def _add_bids(self):
+        """Add the edges from the hubs of the offers that the bids accept."""
+        for bid_rank in range(len(self.bids.orders)):
+            if not self._is_bid_tradable(bid_rank):
+                continue
+            cost = -self.bids.rates[bid_rank]
+            requirements = self.bids_requirements[bid_rank]
+            if not requirements:
+                if MARKET_HUB in self._rows:
+                    self._add_column(MARKET_HUB, self._add_bid_row(bid_rank), cost)
+                continue
+            for requirement in requirements:
+                for hub_key in self._get_required_hubs(requirement):
+                    self._add_column(hub_key, self._add_bid_row(bid_rank), cost,
+                                     {"bid_requirement": requirement})
+
+    def _get_required_hubs(self, requirement: Dict) -> List[Tuple]:
+        energy_types = get_energy_types(requirement)
+        trading_partners = requirement.get(TRADING_PARTNERS)
+        if not trading_partners:
+            return [(ENERGY_TYPE_HUB, energy_type) for energy_type in energy_types
+                    if (ENERGY_TYPE_HUB, energy_type) in self._rows]
+        return [hub_key for trader_id in trading_partners
+                for hub_key in self._seller_hubs_by_trader.get(trader_id, ())
+                if not energy_types or hub_key[2] in energy_types]
+
+    def solve(self, highspy, basis: Optional[Dict], time_limit: Optional[float]):
+        """Solve the minimum cost flow, starting from the basis of the previous solution.
+
+        Returns: the flow of each edge, the basis of the solution and the number of simplex
+            iterations, or None if the solver did not find the optimal solution (e.g. before the
+            time limit)
+        """
+        columns_count, rows_count = len(self.column_keys), len(self.row_keys)
+        model = highspy.HighsLp()
+        model.num_col_ = columns_count
+        model.num_row_ = rows_count
+        model.col_cost_ = np.array(self.column_costs, dtype=np.float64)
+        model.col_lower_ = np.zeros(columns_count)
+        model.col_upper_ = np.full(columns_count, highspy.kHighsInf)
+        # Hub rows balance their inflow and outflow, order rows bound the energy of the order
+        is_hub = np.array([key[0] not in ("bid", "offer") for key in self.row_keys])
+        model.row_lower_ = np.zeros(rows_count)
+        model.row_upper_ = np.array(self.row_upper_bounds, dtype=np.float64)
+        column_rows = np.array(self.column_rows, dtype=np.int32).reshape(-1, 2)
+        # Edges leave their tail (-1 for hubs, +1 for offers) and enter their head (+1)
+        tail_values = np.where(is_hub[column_rows[:, 0]], -1., 1.)
+        model.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        model.a_matrix_.start_ = np.arange(0, 2 * columns_count + 1, 2, dtype=np.int32)
+        model.a_matrix_.index_ = column_rows.ravel()
+        model.a_matrix_.value_ = np.column_stack(
+            (tail_values, np.ones(columns_count))).ravel()
+
+        solver = highspy.Highs()
+        solver.setOptionValue("output_flag", False)
+        if time_limit is not None:
+            solver.setOptionValue("time_limit", max(time_limit, 0.))
+        solver.passModel(model)
+        if basis:
+            solver.setBasis(self._get_initial_basis(highspy, basis))
+        solver.run()
+        if solver.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            return None
+        solution_basis = solver.getBasis()
+        return np.asarray(solver.getSolution().col_value), {
+            "columns": dict(zip(self.column_keys, solution_basis.col_status)),
+            "rows": dict(zip(self.row_keys, solution_basis.row_status)),
+        }, solver.getInfo().simplex_iteration_count
+
+    def _get_initial_basis(self, highspy, basis: Dict):
+        """Map the basis of the previous solution to the edges and nodes of the network.
+
+        New edges start at zero and new nodes with a basic slack; the solver repairs the basis
+        if the orders that were removed leave it invalid.
+        """
+        initial_basis = highspy.HighsBasis()
+        initial_basis.col_status = [
+            basis["columns"].get(key, highspy.HighsBasisStatus.kLower)
+            for key in self.column_keys]
+        initial_basis.row_status = [
+            basis["rows"].get(key, highspy.HighsBasisStatus.kBasic) for key in self.row_keys]
+        initial_basis.valid = True
+        initial_basis.alien = True
+        return initial_basis
+
+    def get_trades(self, flows: np.ndarray) -> Dict[Tuple[int, int], Tuple[float, Dict]]:
+        """Decompose the flows into the energy traded by each (bid rank, offer rank) pair.
+
+        The hubs are processed from the leaves to the market hub: the cheapest energy that
+        enters a hub is paired with the highest bids that it feeds, and the rest is forwarded to
+        the parent hub. At the optimum, all orders whose energy passes through a hub are
+        compatible (the offers rates are below the price of the hub, and the bids rates above).
+        """
+        bid_ranks = {bid["id"]: rank for rank, bid in enumerate(self.bids.orders)}
+        offer_ranks = {offer["id"]: rank for rank, offer in enumerate(self.offers.orders)}
+        trades: Dict[Tuple[int, int], List] = {}
+        # [offer rank, energy, requirements] entering each hub
+        hub_supplies: Dict[Tuple, List[List]] = defaultdict(list)
+        # (bid rank, energy, requirements) leaving each hub to the bids, and to the parent hub
+        hub_demands: Dict[Tuple, List[Tuple]] = defaultdict(list)
+        hub_outflows: Dict[Tuple, float] = {}
+        for column in np.flatnonzero(flows > FLOATING_POINT_TOLERANCE).tolist():
+            (tail_key, head_key), flow = self.column_keys[column], float(flows[column])
+            requirements = self.column_requirements[column]
+            if tail_key[0] == "offer" and head_key[0] == "bid":
+                self._add_trade(trades, bid_ranks[head_key[1]], offer_ranks[tail_key[1]], flow,
+                                requirements)
+            elif tail_key[0] == "offer":
+                hub_supplies[head_key].append([offer_ranks[tail_key[1]], flow, requirements])
+            elif head_key[0] == "bid":
+                hub_demands[tail_key].append((bid_ranks[head_key[1]], flow, requirements))
+            else:
+                hub_outflows[tail_key] = flow
+
+        hubs = (self.buyer_hubs + sorted(self.hub_parents, key=lambda key: key[0] != SELLER_HUB) +
+                [MARKET_HUB])
+        for hub_key in hubs:
+            supplies = sorted(hub_supplies.pop(hub_key, ()), key=lambda supply: supply[0])
+            demands = sorted(hub_demands.pop(hub_key, ()), key=lambda demand: demand[0])
+            if hub_key in hub_outflows:
+                demands.append((None, hub_outflows[hub_key], None))
+            supply_index = 0
+            for bid_rank, demand, requirements in demands:
+                while demand > FLOATING_POINT_TOLERANCE and supply_index < len(supplies):
+                    offer_rank, supply, offer_requirements = supplies[supply_index]
+                    energy = min(demand, supply)
+                    if bid_rank is None:
+                        hub_supplies[self.hub_parents[hub_key]].append(
+                            [offer_rank, energy, offer_requirements])
+                    else:
+                        self._add_trade(trades, bid_rank, offer_rank, energy,
+                                        offer_requirements or requirements)
+                    demand -= energy
+                    supplies[supply_index][1] -= energy
+                    if supplies[supply_index][1] <= FLOATING_POINT_TOLERANCE:
+                        supply_index += 1
+        return {pair: (energy, requirements) for pair, (energy, requirements) in trades.items()
+                if energy > FLOATING_POINT_TOLERANCE and self._is_tradable(*pair)}
+
+    @staticmethod
+    def _add_trade(trades: Dict, bid_rank: int, offer_rank: int, energy: float,
+                   requirements: Optional[Dict]):
+        trade = trades.setdefault((bid_rank, offer_rank), [0., requirements])
+        trade[0] += energy
+
+
+class WelfareMaximizingMatchingAlgorithm(BaseMatchingAlgorithm):
+    """Match the orders of each market / time slot so that the total surplus is maximal.
+
+    The surplus of a trade is its energy times the difference of the bid and offer rates. Unlike
+    the greedy algorithms, that match the bids one after the other, the energy of each order is
+    allocated by solving a minimum cost flow (as a linear program) on a sparse network of the
+    compatible orders (see _FlowNetwork). Orders with trading partners or energy type
+    requirements are only matched with counterparts that satisfy one of them.
+
+    Each market / time slot is solved starting from the basis of its solution in the previous
+    call (i.e. the previous tick), therefore the solver only pivots over the orders that
+    changed. The trades are recommended at the bid rate (pay-as-bid).
+
+    Being stateful, the algorithm is used as an instance:
+
+        algorithm = WelfareMaximizingMatchingAlgorithm()
+        recommendations = algorithm.get_matches_recommendations(data.get("bids_offers"))
+    """
+
+    def __init__(self, warm_start: bool = True):
+        """
+        Args:
+            warm_start: if False, each market / time slot is solved from scratch
+        """
+        self.warm_start = warm_start
+        # Basis of the latest solution of each (market_id, time_slot)
+        self._bases: Dict[Tuple[str, str], Dict] = {}
+        self.last_iterations_count = 0  # Simplex iterations of the latest call
+
+    def get_matches_recommendations(  # pylint: disable=arguments-differ
+            self, matching_data: Union[Dict, ColumnarOrderBook],
+            deadline: Optional[MatchingDeadline] = None) -> List[Dict]:
+        """Calculate and return the recommendations that maximize the surplus.
+
+        Args:
+            matching_data: bids and offers of each market and time slot, either as a
+                ColumnarOrderBook (whose partitions are converted to dicts one at a time) or in
+                the format: {market_id: {time_slot: {"bids": [...], "offers": [...]}}}
+            deadline: if set, the markets / time slots are matched nearest delivery time slots
+                first, and the matching stops once the deadline expires (the solver of the
+                market / time slot in progress is stopped too)
+
+        Returns: list of BidOfferMatch.serializable_dict() recommendations
+        """
+        highspy = _import_highspy()
+        if isinstance(matching_data, ColumnarOrderBook):
+            partitions = matching_data.iter_matching_data(nearest_first=deadline is not None)
+        elif deadline is not None:
+            partitions = iter_partitions(matching_data)
+        else:
+            partitions = ((market_id, time_slot, data)
+                          for market_id, time_slot_data in matching_data.items()
+                          for time_slot, data in time_slot_data.items())
+
+        # Only the bases of the current markets / time slots are kept
+        previous_bases, self._bases = self._bases, {}
+        self.last_iterations_count = 0
+        recommendations = []
+        for market_id, time_slot, data in partitions:
+            if deadline is not None and deadline.is_expired:
+                break
+            bids, offers = data.get("bids") or [], data.get("offers") or []
+            if not (bids and offers):
+                continue
+            network = _FlowNetwork(bids, offers)
+            if not network.column_keys:
+                continue
+            result = network.solve(
+                highspy, previous_bases.get((market_id, time_slot)) if self.warm_start else None,
+                deadline.remaining if deadline is not None else None)
+            if result is None:
+                LOGGER.debug("No optimal matching was found for market %s, time slot %s.",
+                             market_id, time_slot)
+                continue
+            flows, self._bases[(market_id, time_slot)], iterations_count = result
+            self.last_iterations_count += iterations_count
+            recommendations.extend(
+                self._get_recommendations(market_id, time_slot, network, flows))
+        return recommendations
+
+    @staticmethod
+    def _get_recommendations(market_id: str, time_slot: str, network: _FlowNetwork,
+                             flows: np.ndarray) -> List[Dict]:
+        return [
+            BidOfferMatch(
+                market_id=market_id,
+                time_slot=time_slot,
+                bid=network.bids.orders[bid_rank],
+                offer=network.offers.orders[offer_rank],
+                selected_energy=min(energy, network.bids.energies[bid_rank],
+                                    network.offers.energies[offer_rank]),
+                trade_rate=network.bids.rates[bid_rank],
+                matching_requirements=requirements).serializable_dict()
+            for (bid_rank, offer_rank), (energy, requirements)
+            in network.get_trades(flows).items()]
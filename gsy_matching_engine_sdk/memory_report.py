@@ -0,0 +1,75 @@
+"""Report of the memory allocated by a matcher process, traced with tracemalloc.
+
+Long simulations should keep the memory of the matchers flat across market cycles: the report
+logs the traced memory on every market cycle, with the source lines whose allocations grew the
+most since the previous report, so that a leak points to the code that causes it. Tracing slows
+down every allocation of the process, therefore it is only enabled on demand.
+"""
+import logging
+import tracemalloc
+from typing import Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+MEBIBYTE = 1024 * 1024
+# Number of source lines listed in each report, among the ones whose allocations grew the most
+MEMORY_REPORT_TOP_LINES = 10
+# Allocations of the tracing itself and of the import machinery are left out of the reports
+IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryReport:
+    """Trace the memory allocations, and log their growth whenever report is called.
+
+    Only the previous snapshot of the traces is kept, to compare the next one to. The tracing is
+    started with the first MemoryReport of the process, and shared by the other ones (e.g. the
+    matchers of a MultiSimulationRedisHost).
+    """
+
+    def __init__(self, top_lines: int = MEMORY_REPORT_TOP_LINES):
+        """
+        Args:
+            top_lines: number of source lines listed in each report
+        """
+        self.top_lines = top_lines
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.reports_count = 0
+        self.initial_memory, _ = tracemalloc.get_traced_memory()
+        self._previous_memory = self.initial_memory
+        self._previous_snapshot = self._take_snapshot()
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+
+    def report(self, label: Optional[str] = None) -> Dict[str, int]:
+        """Log the traced memory and the source lines whose allocations grew the most.
+
+        Args:
+            label: identifies the report in the logs (defaults to its sequence number)
+
+        Returns: the "current" traced memory in bytes, its "peak" since the previous report and
+            its "growth" since the first one
+        """
+        self.reports_count += 1
+        snapshot = self._take_snapshot()
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+            tracemalloc.reset_peak()
+        growth = current_memory - self.initial_memory
+        top_statistics = snapshot.compare_to(self._previous_snapshot, "lineno")[:self.top_lines]
+        LOGGER.info(
+            "Memory report %s: %.2f MiB traced (peak %.2f MiB), %+.2f MiB since the previous "
+            "report, %+.2f MiB since the first one. Largest growths:\n%s",
+            label or self.reports_count, current_memory / MEBIBYTE, peak_memory / MEBIBYTE,
+            (current_memory - self._previous_memory) / MEBIBYTE, growth / MEBIBYTE,
+            "\n".join(f"    {statistic}" for statistic in top_statistics))
+        self._previous_snapshot = snapshot
+        self._previous_memory = current_memory
+        return {"current": current_memory, "peak": peak_memory, "growth": growth}
@@ -0,0 +1,248 @@
+"""Instrumentation of the matchers: per-stage latency histograms, counters and message sizes.
+
+The metrics can be exported in the Prometheus text format via a local HTTP endpoint, or logged
+periodically as a stats line. When disabled, recording a metric is a single attribute check.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10.)  # seconds
+SIZE_BUCKETS = tuple(2 ** exponent for exponent in range(10, 28, 2))  # bytes, 1 KiB - 128 MiB
+METRICS_PREFIX = "gsy_matching_engine"
+# Name of the label of each metric in the Prometheus format (the default one is "event")
+LABEL_NAMES = {"stage_duration_seconds": "stage", "message_size_bytes": "direction",
+               "deadline_misses": "reason", "cancelled_recommendations": "reason",
+               "stream_entries": "state"}
+# Description of each metric in the Prometheus format
+METRIC_HELPS = {
+    "stage_duration_seconds": "Duration of the stages of the matching process.",
+    "message_size_bytes": "Size of the received (in) and sent (out) messages.",
+    "skipped_events": "Events skipped before decoding them, since the matcher ignores them.",
+    "deadline_misses": "Matchings that missed the deadline of their tick.",
+    "cancelled_recommendations": "Recommendations dropped since their market cycle ended.",
+    "stream_entries": "Entries read and trimmed from the Redis streams.",
+    "events_queue_depths": "Events waiting in the queues of the dispatcher.",
+    "events_processed": "Events processed by the callbacks of the matcher.",
+    "events_coalesced": "Queued events superseded by newer events of the same type.",
+    "events_dropped": "Events dropped since their queue was full.",
+}
+# Metrics of the collectors that are gauges, the other ones are counters
+GAUGE_METRICS = {"events_queue_depths"}
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_family_header(metric_name: str, name: str, metric_type: str) -> List[str]:
+    metric_help = METRIC_HELPS.get(name, name.replace("_", " ").capitalize() + ".")
+    return [f"# HELP {metric_name} {metric_help}", f"# TYPE {metric_name} {metric_type}"]
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, as defined by Prometheus."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # The last one is the +Inf bucket
+        self.count = 0
+        self.sum = 0.
+        self.max = 0.
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram."""
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """Return the (upper bound, cumulative count) pairs of the buckets."""
+        cumulative_counts = []
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.bucket_counts):
+            total += count
+            cumulative_counts.append((str(bound), total))
+        return cumulative_counts
+
+
+class MatcherMetrics:
+    """Collection of the metrics of a matcher.
+
+    Histograms and counters are identified by their name and a single label value (e.g. the stage
+    of the matching process). Collectors are callables that return extra metrics computed when
+    exported, in the format of EventDispatcher.get_metrics: {metric_name: {label_value: value}}.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Dict[str, float]]]] = {}
+        self._http_server = None
+        self._stop_stats_logger = Event()
+
+    def observe(self, name: str, label: str, value: float,
+                buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """Add a value to the histogram of the given name and label."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get((name, label))
+            if histogram is None:
+                histogram = self._histograms[(name, label)] = Histogram(buckets)
+            histogram.observe(value)
+
+    def observe_stage_duration(self, stage: str, duration: float) -> None:
+        """Add the duration (in seconds) of a stage of the matching process."""
+        self.observe("stage_duration_seconds", stage, duration)
+
+    def observe_message_size(self, direction: str, size: int) -> None:
+        """Add the size (in bytes) of a received ("in") or sent ("out") message."""
+        self.observe("message_size_bytes", direction, size, buckets=SIZE_BUCKETS)
+
+    def increment(self, name: str, label: str, value: float = 1) -> None:
+        """Increment the counter of the given name and label."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(name, label)] = self._counters.get((name, label), 0) + value
+
+    def time_stage(self, stage: str):
+        """Return a context manager that records the duration of the stage of its block."""
+        if not self.enabled:
+            return nullcontext()
+        return self._time_stage(stage)
+
+    @contextmanager
+    def _time_stage(self, stage: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage_duration(stage, time.perf_counter() - start_time)
+
+    def register_collector(
+            self, name: str, collector: Callable[[], Dict[str, Dict[str, float]]]) -> None:
+        """Register a callable whose metrics are collected every time the metrics are exported."""
+        self._collectors[name] = collector
+
+    def _collect(self) -> Dict[Tuple[str, str], float]:
+        collected = {}
+        for collector_name, collector in self._collectors.items():
+            for metric_name, values in collector().items():
+                for label, value in values.items():
+                    collected[(f"{collector_name}_{metric_name}", label)] = value
+        return collected
+
+    def render_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format.
+
+        Every metric family is preceded by its HELP and TYPE lines, and the names of the counters
+        end with "_total".
+        """
+        lines = []
+        previous_name = None
+        with self._lock:
+            for (name, label), histogram in sorted(self._histograms.items()):
+                metric_name = f"{METRICS_PREFIX}_{name}"
+                if name != previous_name:
+                    lines.extend(_render_family_header(metric_name, name, "histogram"))
+                    previous_name = name
+                labels = f'{LABEL_NAMES.get(name, "event")}="{_escape_label_value(label)}"'
+                for bound, count in histogram.cumulative_counts():
+                    lines.append(f'{metric_name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{metric_name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{metric_name}_count{{{labels}}} {histogram.count}")
+            counters = dict(self._counters)
+        counters.update(self._collect())
+        for (name, label), value in sorted(counters.items()):
+            if name in GAUGE_METRICS:
+                metric_name, metric_type = f"{METRICS_PREFIX}_{name}", "gauge"
+            else:
+                metric_name, metric_type = f"{METRICS_PREFIX}_{name}_total", "counter"
+            if name != previous_name:
+                lines.extend(_render_family_header(metric_name, name, metric_type))
+                previous_name = name
+            labels = f'{LABEL_NAMES.get(name, "event")}="{_escape_label_value(label)}"'
+            lines.append(f"{metric_name}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def format_stats_line(self) -> str:
+        """Return a one-line summary of the metrics, meant to be logged."""
+        parts = []
+        with self._lock:
+            for (name, label), histogram in sorted(self._histograms.items()):
+                if name == "stage_duration_seconds":
+                    parts.append(
+                        f"{label}: n={histogram.count} "
+                        f"mean={histogram.sum / histogram.count * 1000:.1f}ms "
+                        f"max={histogram.max * 1000:.1f}ms")
+                else:
+                    parts.append(f"{name}[{label}]: n={histogram.count} max={histogram.max:.0f}")
+            counters = dict(self._counters)
+        counters.update(self._collect())
+        parts.extend(f"{name}[{label}]={value}" for (name, label), value in sorted(
+            counters.items()))
+        return " | ".join(parts)
+
+    def start_http_server(self, port: int, host: str = "127.0.0.1") -> None:
+        """Serve the metrics in the Prometheus format on http://<host>:<port>/metrics."""
+        metrics = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            """Handler that returns the rendered metrics."""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Return the metrics."""
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                LOGGER.debug(format, *args)
+
+        self._http_server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self._http_server.daemon_threads = True
+        Thread(target=self._http_server.serve_forever, daemon=True).start()
+        LOGGER.info("Serving metrics on http://%s:%s/metrics.", host, port)
+
+    def start_stats_logger(self, interval: float) -> None:
+        """Log the stats line every interval seconds."""
+        def log_stats():
+            while not self._stop_stats_logger.wait(interval):
+                LOGGER.info("Matcher stats: %s", self.format_stats_line())
+
+        Thread(target=log_stats, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop the HTTP server and the stats logger."""
+        self._stop_stats_logger.set()
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server = None
+
+
+def create_matcher_metrics(metrics_port: Optional[int] = None,
+                           stats_log_interval: Optional[float] = None) -> MatcherMetrics:
+    """Create the metrics of a matcher, enabled only if they are exported in any way."""
+    metrics = MatcherMetrics(enabled=bool(metrics_port or stats_log_interval))
+    if metrics_port:
+        metrics.start_http_server(metrics_port)
+    if stats_log_interval:
+        metrics.start_stats_logger(stats_log_interval)
+    return metrics
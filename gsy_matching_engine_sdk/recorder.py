@@ -0,0 +1,66 @@
+"""Recording of the messages that a matcher exchanges with GSy Exchange.
+
+Recordings are line-delimited JSON files (optionally gzip-compressed if the file name ends with
+.gz), with one compact record per message:
+    {"t": <unix timestamp>, "d": "in" | "out", "k": <event or request kind>, "p": <payload>}
+"""
+import gzip
+import json
+import time
+from threading import Lock
+from typing import Any, Dict, Iterator
+
+INBOUND = "in"
+OUTBOUND = "out"
+
+
+def _open_recording(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    return open(path, mode)  # pylint: disable=consider-using-with,unspecified-encoding
+
+
+class EventRecorder:
+    """Append the inbound events and outbound requests of a matcher to a recording file."""
+
+    def __init__(self, path: str, serializer=None):
+        self.path = path
+        self._serializer = serializer
+        self._file = _open_recording(path, "ab")
+        self._lock = Lock()
+
+    def record(self, direction: str, kind: str, payload: Any) -> None:
+        """Append one message to the recording.
+
+        Args:
+            direction: INBOUND for received events/responses, OUTBOUND for sent requests
+            kind: event name of inbound messages / request name of outbound ones
+            payload: the decoded message
+        """
+        record = {"t": time.time(), "d": direction, "k": kind, "p": payload}
+        if self._serializer is not None:
+            line = self._serializer.dumps(record)
+        else:
+            line = json.dumps(record, separators=(",", ":"))
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        with self._lock:
+            self._file.write(line + b"\n")
+
+    def flush(self) -> None:
+        """Write the buffered records to the file."""
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the recording file."""
+        with self._lock:
+            self._file.close()
+
+
+def read_recording(path: str) -> Iterator[Dict]:
+    """Yield the records of a recording file in the order they were recorded."""
+    with _open_recording(path, "rb") as recording_file:
+        for line in recording_file:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,206 @@
+"""Offline replay of recorded matcher sessions, used to profile and benchmark matchers.
+
+The replayed matcher exchanges no messages with GSy Exchange: its connection is replaced by an
+in-process fake transport, that feeds it the inbound events of the recording and collects the
+requests that it sends.
+"""
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Type
+
+from gsy_matching_engine_sdk.matchers import RedisBaseMatcher, RestBaseMatcher
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import AREA_MAP_RESPONSE
+from gsy_matching_engine_sdk.recorder import INBOUND, read_recording
+
+RECOMMENDATIONS = "recommendations"
+
+
+class _FakeRedisConnection:
+    """Replacement of the Redis connection that hands the published messages to a callback."""
+
+    def __init__(self, on_publish):
+        self._on_publish = on_publish
+
+    def publish(self, channel: str, payload) -> int:
+        """Pass the message to the callback instead of publishing it."""
+        self._on_publish(channel, payload)
+        return 1
+
+    def pipeline(self, transaction: bool = True):  # pylint: disable=unused-argument
+        """Return the connection itself, whose commands are not buffered."""
+        return self
+
+    def execute(self) -> List:
+        """Nothing to execute, since the commands are not buffered."""
+        return []
+
+
+class _ReplayTransportMixin(ABC):
+    """Base of the fake transports, collecting the kind and time of the sent messages."""
+
+    sent_messages: List[Tuple[float, str]]
+
+    def _connect_to_simulation(self):
+        self.sent_messages = []
+        self.bootstrap.set_ready(self.simulation_id)
+
+    def _on_sent_message(self, kind: str) -> None:
+        self.sent_messages.append((time.perf_counter(), kind))
+
+    @abstractmethod
+    def replay_inbound_message(self, kind: str, payload: bytes) -> None:
+        """Handle an inbound message as if it was received from the connection."""
+
+    @abstractmethod
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until the matcher has handled all replayed messages."""
+
+
+class _RedisReplayTransportMixin(_ReplayTransportMixin):
+
+    def _connect_to_simulation(self):
+        self.simulation_id = ""
+        self.redis_db = _FakeRedisConnection(self._on_published_message)
+        super()._connect_to_simulation()
+
+    def _on_published_message(self, channel: str, _payload) -> None:
+        self._on_sent_message(
+            RECOMMENDATIONS if channel.rstrip("/").endswith(RECOMMENDATIONS) else channel)
+
+    def replay_inbound_message(self, kind: str, payload: bytes) -> None:
+        if kind == AREA_MAP_RESPONSE:
+            self._on_area_map_response({"data": payload})
+        else:
+            self._on_event_or_response({"data": payload})
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        return self.event_dispatcher.wait_until_idle(timeout)
+
+
+class _RestReplayTransportMixin(_ReplayTransportMixin):
+
+    def _send_encoded_request(self, method: str, endpoint: str, body) -> bool:
+        del method, body  # The request is only counted, not sent
+        self._on_sent_message(
+            RECOMMENDATIONS if endpoint.rstrip("/").endswith(RECOMMENDATIONS) else endpoint)
+        return True
+
+    def replay_inbound_message(self, kind: str, payload: bytes) -> None:
+        self.dispatcher.received_message(payload)
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        return self.callback_thread.wait_until_idle(timeout)
+
+
+def create_replay_matcher_class(matcher_class: Type) -> Type:
+    """Return a subclass of the matcher class that uses the fake transport of the replay."""
+    if issubclass(matcher_class, RedisBaseMatcher):
+        transport_mixin = _RedisReplayTransportMixin
+    elif issubclass(matcher_class, RestBaseMatcher):
+        transport_mixin = _RestReplayTransportMixin
+    else:
+        raise TypeError(
+            f"{matcher_class.__name__} is neither a RedisBaseMatcher nor a RestBaseMatcher.")
+    return type(f"Replay{matcher_class.__name__}", (transport_mixin, matcher_class), {})
+
+
+@dataclass
+class ReplayReport:
+    """Performance metrics of a replay."""
+    events_count: int
+    duration: float  # seconds
+    sent_messages_count: int
+    tick_to_submit_latencies: List[float] = field(default_factory=list)  # seconds
+    peak_memory: Optional[int] = None  # bytes, only measured if memory tracing is enabled
+
+    @property
+    def events_per_second(self) -> float:
+        """Number of inbound events handled per second."""
+        return self.events_count / self.duration if self.duration else 0.
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Return the given percentile (0-100) of the tick -> submission latencies."""
+        if not self.tick_to_submit_latencies:
+            return None
+        latencies = sorted(self.tick_to_submit_latencies)
+        index = round(percentile / 100 * (len(latencies) - 1))
+        return latencies[index]
+
+
+class ReplayDriver:
+    """Feed the inbound events of a recording to a matcher class.
+
+    By default the events are replayed at full speed: every event is fed as soon as the matcher
+    has handled the previous ones. With realtime=True, events are fed with the same pace as in the
+    recorded session, regardless of the matcher's progress.
+    """
+
+    def __init__(self, matcher_class: Type, recording_path: str, realtime: bool = False,
+                 trace_memory: bool = False, matcher_kwargs: Optional[Dict] = None):
+        self.matcher_class = matcher_class
+        self.recording_path = recording_path
+        self.realtime = realtime
+        self.trace_memory = trace_memory
+        self.matcher_kwargs = matcher_kwargs or {}
+        self.matcher = None
+
+    def _load_inbound_messages(self, serializer) -> List[Tuple[float, str, bytes]]:
+        messages = []
+        for record in read_recording(self.recording_path):
+            if record["d"] != INBOUND:
+                continue
+            payload = serializer.dumps(record["p"])
+            messages.append((record["t"], record["k"],
+                             payload.encode("utf-8") if isinstance(payload, str) else payload))
+        return messages
+
+    def run(self) -> ReplayReport:
+        """Replay the recording and return the performance metrics of the matcher."""
+        if self.trace_memory:
+            tracemalloc.start()
+        self.matcher = create_replay_matcher_class(self.matcher_class)(**self.matcher_kwargs)
+        messages = self._load_inbound_messages(self.matcher.serializer)
+
+        tick_times = []
+        start_time = time.perf_counter()
+        first_recorded_time = messages[0][0] if messages else 0.
+        for recorded_time, kind, payload in messages:
+            if self.realtime:
+                delay = (recorded_time - first_recorded_time) - (time.perf_counter() - start_time)
+                if delay > 0:
+                    time.sleep(delay)
+            if kind == "tick":
+                tick_times.append(time.perf_counter())
+            self.matcher.replay_inbound_message(kind, payload)
+            if not self.realtime:
+                self.matcher.wait_until_idle()
+        self.matcher.wait_until_idle()
+        duration = time.perf_counter() - start_time
+
+        peak_memory = None
+        if self.trace_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        return ReplayReport(
+            events_count=len(messages), duration=duration,
+            sent_messages_count=len(self.matcher.sent_messages),
+            tick_to_submit_latencies=self._get_tick_to_submit_latencies(tick_times),
+            peak_memory=peak_memory)
+
+    def _get_tick_to_submit_latencies(self, tick_times: List[float]) -> List[float]:
+        """Latency between each tick and the first recommendations submitted after it."""
+        submit_times = [sent_time for sent_time, kind in self.matcher.sent_messages
+                        if kind == RECOMMENDATIONS]
+        latencies = []
+        submit_index = 0
+        for tick_index, tick_time in enumerate(tick_times):
+            next_tick_time = (
+                tick_times[tick_index + 1] if tick_index + 1 < len(tick_times) else float("inf"))
+            while submit_index < len(submit_times) and submit_times[submit_index] < tick_time:
+                submit_index += 1
+            if submit_index < len(submit_times) and submit_times[submit_index] < next_tick_time:
+                latencies.append(submit_times[submit_index] - tick_time)
+        return latencies
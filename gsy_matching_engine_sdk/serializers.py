@@ -0,0 +1,153 @@
+"""Serializers used to encode/decode the payloads exchanged with GSy Exchange.
+
+The offers/bids responses can be several megabytes long, therefore the faster orjson or msgspec
+libraries are used when they are installed, falling back to the json module of the stdlib.
+These libraries are only imported by the selected serializer.
+"""
+import importlib
+import importlib.util
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Union
+
+from gsy_matching_engine_sdk.utils import serializer_name_from_env
+
+LOGGER = logging.getLogger(__name__)
+
+# Number of characters at the end of a payload searched for its event type
+EVENT_TYPE_TAIL_LENGTH = 256
+_EVENT_TYPE_HEAD_REGEXES = {
+    str: re.compile(r'\s*\{\s*"event"\s*:\s*"([^"\\]*)"'),
+    bytes: re.compile(rb'\s*\{\s*"event"\s*:\s*"([^"\\]*)"'),
+}
+_EVENT_TYPE_TAIL_REGEXES = {
+    str: re.compile(r'"event"\s*:\s*"([^"\\]*)"\s*\}\s*\Z'),
+    bytes: re.compile(rb'"event"\s*:\s*"([^"\\]*)"\s*\}\s*\Z'),
+}
+
+
+class BaseSerializer(ABC):
+    """Interface for the serializers of the Matching Engine payloads."""
+
+    name: str
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Return True if the library needed by the serializer is installed."""
+        return True
+
+    @abstractmethod
+    def dumps(self, data: Any) -> Union[str, bytes]:
+        """Encode the data as a JSON document."""
+
+    @abstractmethod
+    def loads(self, payload: Union[str, bytes]) -> Any:
+        """Decode a JSON document."""
+
+
+class JSONSerializer(BaseSerializer):
+    """Serializer based on the json module of the stdlib."""
+
+    name = "json"
+
+    def dumps(self, data: Any) -> str:
+        return json.dumps(data)
+
+    def loads(self, payload: Union[str, bytes]) -> Any:
+        return json.loads(payload)
+
+
+class OrjsonSerializer(BaseSerializer):
+    """Serializer based on the orjson library."""
+
+    name = "orjson"
+
+    def __init__(self):
+        orjson = importlib.import_module("orjson")
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return importlib.util.find_spec("orjson") is not None
+
+    def dumps(self, data: Any) -> bytes:
+        return self._dumps(data)
+
+    def loads(self, payload: Union[str, bytes]) -> Any:
+        return self._loads(payload)
+
+
+class MsgspecSerializer(BaseSerializer):
+    """Serializer based on the msgspec library."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        msgspec_json = importlib.import_module("msgspec.json")
+        self._encoder = msgspec_json.Encoder()
+        self._decoder = msgspec_json.Decoder()
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return importlib.util.find_spec("msgspec") is not None
+
+    def dumps(self, data: Any) -> bytes:
+        return self._encoder.encode(data)
+
+    def loads(self, payload: Union[str, bytes]) -> Any:
+        return self._decoder.decode(payload)
+
+
+# Ordered by preference, used when the serializer is selected automatically
+SERIALIZERS: Dict[str, type] = {
+    serializer.name: serializer
+    for serializer in (OrjsonSerializer, MsgspecSerializer, JSONSerializer)
+}
+AUTO_SERIALIZER_NAME = "auto"
+
+
+def get_serializer(name: Optional[str] = None) -> BaseSerializer:
+    """Return an instance of the requested serializer.
+
+    Args:
+        name: one of SERIALIZERS' keys or "auto" to select the fastest installed serializer.
+            If not provided, the serializer is selected via the MATCHING_ENGINE_SERIALIZER
+            environment variable.
+    """
+    name = name or serializer_name_from_env()
+    if name == AUTO_SERIALIZER_NAME:
+        return next(serializer() for serializer in SERIALIZERS.values()
+                    if serializer.is_available())
+
+    if name not in SERIALIZERS:
+        raise ValueError(
+            f"Unknown serializer {name}, available serializers: {', '.join(SERIALIZERS)}.")
+    serializer = SERIALIZERS[name]
+    if not serializer.is_available():
+        LOGGER.warning("The %s library is not installed, falling back to the json module.", name)
+        return JSONSerializer()
+    return serializer()
+
+
+def peek_event_type(payload: Union[str, bytes]) -> Optional[str]:
+    """Return the event type of an encoded event, without decoding the whole payload.
+
+    The type is only read if "event" is the first or the last key of the payload, since these
+    positions can only belong to the top level object.
+
+    Returns: None if the event type is not found at these positions
+    """
+    payload_type = type(payload)
+    if payload_type not in _EVENT_TYPE_HEAD_REGEXES:
+        return None
+    match = _EVENT_TYPE_HEAD_REGEXES[payload_type].match(payload)
+    if match is None:
+        match = _EVENT_TYPE_TAIL_REGEXES[payload_type].search(
+            payload, max(len(payload) - EVENT_TYPE_TAIL_LENGTH, 0))
+        if match is None:
+            return None
+    event_type = match.group(1)
+    return event_type.decode() if payload_type is bytes else event_type
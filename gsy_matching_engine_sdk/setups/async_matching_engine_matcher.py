@@ -0,0 +1,39 @@
+import asyncio
+import logging
+import os
+
+from gsy_framework.matching_algorithms import AttributedMatchingAlgorithm
+
+# Only import the stack of the used transport
+if os.environ["MATCHING_ENGINE_RUN_ON_REDIS"] == "true":
+    from gsy_matching_engine_sdk.matchers.async_redis_base_matcher import (
+        AsyncRedisBaseMatcher as AsyncBaseMatcher)
+else:
+    from gsy_matching_engine_sdk.matchers.async_rest_base_matcher import (
+        AsyncRestBaseMatcher as AsyncBaseMatcher)
+
+
+class AsyncMatchingEngineMatcher(AsyncBaseMatcher):
+    """
+    Class that demonstrates how to override and add functionality
+    to the asyncio MatchingEngine Matcher.
+    """
+
+    async def on_tick(self, data):
+        await self.request_offers_bids(filters={})
+
+    async def on_offers_bids_response(self, data):
+        matching_data = self.order_book.get_matching_data()
+        if not matching_data:
+            return
+        recommendations = AttributedMatchingAlgorithm.get_matches_recommendations(matching_data)
+        if recommendations:
+            await self.submit_matches(recommendations)
+
+    async def on_matched_recommendations_response(self, data):
+        logging.info("Trades recommendations response returned %s", data)
+
+
+def main():
+    """Run the matcher until the simulation finishes."""
+    asyncio.run(AsyncMatchingEngineMatcher().run())
@@ -4,13 +4,20 @@ from time import sleep
 
 from gsy_framework.matching_algorithms import AttributedMatchingAlgorithm
 
-from gsy_matching_engine_sdk.matchers import RedisBaseMatcher
-from gsy_matching_engine_sdk.matchers.rest_base_matcher import RestBaseMatcher
-
-if os.environ["MATCHING_ENGINE_RUN_ON_REDIS"] == "true":
-    BaseMatcher = RedisBaseMatcher
+from gsy_matching_engine_sdk.matchers.matching_results_cache import MatchingResultsCache
+from gsy_matching_engine_sdk.matchers.parallel_matching_runner import ParallelMatchingRunner
+from gsy_matching_engine_sdk.utils import (
+    cache_matching_results_from_env, match_changed_only_from_env, matching_processes_from_env,
+    redis_streams_from_env, simulation_ids_from_env)
+
+# Only import the stack of the used transport
+if os.environ["MATCHING_ENGINE_RUN_ON_REDIS"] == "true" and redis_streams_from_env():
+    from gsy_matching_engine_sdk.matchers.redis_streams_base_matcher import (
+        RedisStreamsBaseMatcher as BaseMatcher)
+elif os.environ["MATCHING_ENGINE_RUN_ON_REDIS"] == "true":
+    from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher as BaseMatcher
 else:
-    BaseMatcher = RestBaseMatcher
+    from gsy_matching_engine_sdk.matchers.rest_base_matcher import RestBaseMatcher as BaseMatcher
 
 
 class MatchingEngineMatcher(BaseMatcher):
@@ -20,45 +27,75 @@ class MatchingEngineMatcher(BaseMatcher):
     """
 
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        # Set before connecting, since the events can be handled as soon as the matcher is ready
         self.is_finished = False
-        self.request_area_id_name_map()
+        self.matching_runner = ParallelMatchingRunner(
+            AttributedMatchingAlgorithm, max_workers=matching_processes_from_env())
+        self.matching_results_cache = (
+            MatchingResultsCache(self.matching_runner)
+            if cache_matching_results_from_env() else None)
+        self.match_changed_only = match_changed_only_from_env()
         self.id_list = []
+        # Connects in the background, the area map is requested once the simulation id is known
+        super().__init__(*args, **kwargs)
 
     def on_area_map_response(self, data):
         market_list = ["Community"]
-        for market in market_list:
-            for market_id, name in data["area_mapping"].items():
-                if name == market:
-                    self.id_list.append(market_id)
+        # Replaced instead of extended, since every response maps all the areas
+        self.id_list = [market_id for market in market_list
+                        for market_id, name in data["area_mapping"].items() if name == market]
 
     def on_market_cycle(self, data):
-        pass
+        if self.matching_results_cache is not None:
+            self.matching_results_cache.clear()
 
     def on_tick(self, data):
         self.request_offers_bids(filters={"markets": self.id_list})
 
     def on_offers_bids_response(self, data):
-        matching_data = data.get("bids_offers")
-        if not matching_data:
-            return
-        recommendations = AttributedMatchingAlgorithm.get_matches_recommendations(
-            matching_data
-        )
+        if self.matching_results_cache is not None:
+            # Reuse the recommendations of the unchanged markets / time slots, except the ones
+            # that were rejected by the exchange
+            recommendations = self.matching_results_cache.get_matches_recommendations(
+                data.get("bids_offers") or {}, deadline=self.deadline)
+        else:
+            # Unless only the markets / time slots whose orders changed since the previous
+            # response are matched, the whole book is matched, so that the partitions left
+            # unmatched at the deadline or rejected by the exchange are matched again
+            matching_data = (self.order_book.changed_matching_data if self.match_changed_only
+                             else self.order_book.get_matching_data())
+            if not matching_data:
+                return
+            # Nearest time slots first, stopping at the deadline of the tick
+            recommendations = self.matching_runner.get_matches_recommendations(
+                matching_data, deadline=self.deadline)
         if recommendations:
             self.submit_matches(recommendations)
 
     def on_matched_recommendations_response(self, data):
         logging.info("Trades recommendations response returned %s", data)
-
-    def on_event_or_response(self, data):
-        pass
+        if self.matching_results_cache is not None:
+            self.matching_results_cache.register_recommendations_response(data)
 
     def on_finish(self, data):
+        self.matching_runner.shutdown(wait=False)
         self.is_finished = True
 
 
-matcher = MatchingEngineMatcher()
+def main():
+    """Run the matcher until the simulation finishes."""
+    simulation_ids = simulation_ids_from_env()
+    if simulation_ids:
+        # pylint: disable=import-outside-toplevel
+        from gsy_matching_engine_sdk.matchers.multi_simulation_host import (
+            MultiSimulationRedisHost)
+        # One matcher per simulation, sharing the Redis connection and the worker threads
+        host = MultiSimulationRedisHost(MatchingEngineMatcher, simulation_ids)
+        host.wait_until_finished()
+        host.shutdown()
+        return
+
+    matcher = MatchingEngineMatcher()
 
-while not matcher.is_finished:
-    sleep(0.5)
+    while not matcher.is_finished:
+        sleep(0.5)
@@ -1,7 +1,10 @@
 import os
 
 from gsy_matching_engine_sdk.constants import (
-    DEFAULT_DOMAIN_NAME, DEFAULT_WEBSOCKET_DOMAIN, MATCHING_ENGINE_SIMULATION_ID)
+    DEFAULT_DOMAIN_NAME, DEFAULT_WEBSOCKET_DOMAIN, MATCHING_ENGINE_SIMULATION_ID,
+    DEFAULT_HTTP_MAX_RETRIES, DEFAULT_HTTP_POOL_SIZE, DEFAULT_MAX_BATCH_BYTES,
+    DEFAULT_MAX_BATCH_RECOMMENDATIONS, DEFAULT_MAX_QUEUE_SIZE, DEFAULT_SERIALIZER,
+    DROP_OLDEST_POLICY, MAX_WORKER_THREADS)
 
 
 def domain_name_from_env():
@@ -20,3 +23,114 @@ def simulation_id_from_env():
     should target from the env variables.
     """
     return os.environ.get("MATCHING_ENGINE_SIMULATION_ID", MATCHING_ENGINE_SIMULATION_ID)
+
+
+def serializer_name_from_env():
+    """Retrieve the name of the serializer used for the payloads from the env variables."""
+    return os.environ.get("MATCHING_ENGINE_SERIALIZER", DEFAULT_SERIALIZER)
+
+
+def max_worker_threads_from_env():
+    """Retrieve the number of threads that handle the received events from the env variables."""
+    return int(os.environ.get("MATCHING_ENGINE_MAX_WORKER_THREADS", MAX_WORKER_THREADS))
+
+
+def max_queue_size_from_env():
+    """Retrieve the maximum number of queued events per event type from the env variables."""
+    return int(os.environ.get("MATCHING_ENGINE_MAX_QUEUE_SIZE", DEFAULT_MAX_QUEUE_SIZE))
+
+
+def queue_overflow_policy_from_env():
+    """Retrieve the policy applied to the events dispatched to a full queue from the env vars."""
+    return os.environ.get("MATCHING_ENGINE_QUEUE_OVERFLOW_POLICY", DROP_OLDEST_POLICY)
+
+
+def matching_processes_from_env():
+    """Retrieve the number of processes that run the matching algorithm from the env variables."""
+    return int(os.environ.get("MATCHING_ENGINE_MATCHING_PROCESSES", 1))
+
+
+def record_path_from_env():
+    """Retrieve the path of the file that records the exchanged messages from the env variables."""
+    return os.environ.get("MATCHING_ENGINE_RECORD_PATH")
+
+
+def metrics_port_from_env():
+    """Retrieve the port of the Prometheus metrics endpoint from the env variables."""
+    port = os.environ.get("MATCHING_ENGINE_METRICS_PORT")
+    return int(port) if port else None
+
+
+def stats_log_interval_from_env():
+    """Retrieve the interval (in seconds) between logged stats lines from the env variables."""
+    interval = os.environ.get("MATCHING_ENGINE_STATS_LOG_INTERVAL")
+    return float(interval) if interval else None
+
+
+def memory_report_from_env():
+    """Retrieve whether the memory allocations are reported on every market cycle from the env
+    variables.
+    """
+    return os.environ.get("MATCHING_ENGINE_MEMORY_REPORT") == "true"
+
+
+def cache_matching_results_from_env():
+    """Retrieve whether the recommendations of unchanged markets are reused from the env vars."""
+    return os.environ.get("MATCHING_ENGINE_CACHE_MATCHING_RESULTS") == "true"
+
+
+def match_changed_only_from_env():
+    """Retrieve whether only the markets / time slots whose orders changed since the previous
+    response are matched from the env variables.
+    """
+    return os.environ.get("MATCHING_ENGINE_MATCH_CHANGED_ONLY") == "true"
+
+
+def simulation_ids_from_env():
+    """Retrieve the ids of the simulations matched by one process from the env variables."""
+    simulation_ids = os.environ.get("MATCHING_ENGINE_SIMULATION_IDS")
+    return [simulation_id.strip() for simulation_id in simulation_ids.split(",")
+            if simulation_id.strip()] if simulation_ids else []
+
+
+def redis_streams_from_env():
+    """Retrieve whether the Redis matchers read the events from streams from the env variables."""
+    return os.environ.get("MATCHING_ENGINE_REDIS_STREAMS") == "true"
+
+
+def shard_group_from_env():
+    """Retrieve the group of workers that share the markets of a simulation from the env vars."""
+    return os.environ.get("MATCHING_ENGINE_SHARD_GROUP")
+
+
+def max_batch_recommendations_from_env():
+    """Retrieve the maximum number of recommendations per message from the env variables."""
+    return int(os.environ.get(
+        "MATCHING_ENGINE_MAX_BATCH_RECOMMENDATIONS", DEFAULT_MAX_BATCH_RECOMMENDATIONS))
+
+
+def max_batch_bytes_from_env():
+    """Retrieve the maximum size (in bytes) of a recommendations message from the env variables."""
+    return int(os.environ.get("MATCHING_ENGINE_MAX_BATCH_BYTES", DEFAULT_MAX_BATCH_BYTES))
+
+
+def matching_deadline_from_env():
+    """Retrieve the time budget (in seconds) of the matching of a tick from the env variables."""
+    deadline = os.environ.get("MATCHING_ENGINE_MATCHING_DEADLINE")
+    return float(deadline) if deadline else None
+
+
+def http_pool_size_from_env():
+    """Retrieve the number of keep-alive connections of the REST matchers from the env vars."""
+    return int(os.environ.get("MATCHING_ENGINE_HTTP_POOL_SIZE", DEFAULT_HTTP_POOL_SIZE))
+
+
+def http_max_retries_from_env():
+    """Retrieve the maximum number of retries of the REST requests from the env variables."""
+    return int(os.environ.get("MATCHING_ENGINE_HTTP_MAX_RETRIES", DEFAULT_HTTP_MAX_RETRIES))
+
+
+def gzip_min_bytes_from_env():
+    """Retrieve the size (in bytes) from which REST bodies are gzipped from the env variables."""
+    gzip_min_bytes = os.environ.get("MATCHING_ENGINE_GZIP_MIN_BYTES")
+    return int(gzip_min_bytes) if gzip_min_bytes else None
@@ -0,0 +1,71 @@
+"""Websocket connection to GSy Exchange that hands the raw received frames to a receiver.
+
+Unlike the WebsocketThread of gsy_framework, frames are not decoded here, so that the receiver
+can decode them with the serializer configured for the matcher.
+"""
+import asyncio
+import logging
+from threading import Thread
+from typing import Callable, Optional
+
+import websockets
+from gsy_framework.client_connections.utils import retrieve_jwt_key_from_server
+
+LOGGER = logging.getLogger(__name__)
+
+WEBSOCKET_MAX_CONNECTION_RETRIES = 10
+WEBSOCKET_WAIT_BEFORE_RETRY_SECONDS = 5
+
+
+class WebsocketConnection:
+    """Read the websocket frames and forward them to the receiver, reconnecting on failures."""
+
+    def __init__(self, websocket_uri: str, domain_name: str, message_receiver,
+                 on_connected: Optional[Callable[[], None]] = None):
+        self.websocket_uri = websocket_uri
+        self.domain_name = domain_name
+        self.message_receiver = message_receiver
+        self.on_connected = on_connected  # Called every time the websocket (re)connects
+
+    async def _receive_messages(self):
+        jwt_token = await asyncio.to_thread(retrieve_jwt_key_from_server, self.domain_name)
+        async with websockets.connect(
+                self.websocket_uri,
+                extra_headers={"Authorization": f"JWT {jwt_token}"}) as websocket:
+            LOGGER.debug("Connected to websocket %s.", self.websocket_uri)
+            if self.on_connected is not None:
+                self.on_connected()
+            async for message in websocket:
+                self.message_receiver.received_message(message)
+
+    async def receive_messages(self):
+        """Receive the messages until the connection fails more than the allowed retries."""
+        retry_count = 0
+        while True:
+            try:
+                await self._receive_messages()
+                retry_count = 0
+            except Exception:  # pylint: disable=broad-except
+                if retry_count >= WEBSOCKET_MAX_CONNECTION_RETRIES:
+                    LOGGER.exception("Websocket connection to %s failed, giving up.",
+                                     self.websocket_uri)
+                    raise
+                retry_count += 1
+                LOGGER.warning(
+                    "Websocket connection to %s failed, retrying in %s seconds (%s/%s).",
+                    self.websocket_uri, WEBSOCKET_WAIT_BEFORE_RETRY_SECONDS,
+                    retry_count, WEBSOCKET_MAX_CONNECTION_RETRIES)
+            await asyncio.sleep(WEBSOCKET_WAIT_BEFORE_RETRY_SECONDS)
+
+
+class WebsocketThread(Thread):
+    """Daemon thread that runs a WebsocketConnection in its own event loop."""
+
+    def __init__(self, websocket_uri: str, domain_name: str, message_receiver,
+                 on_connected: Optional[Callable[[], None]] = None):
+        super().__init__(daemon=True)
+        self.connection = WebsocketConnection(
+            websocket_uri, domain_name, message_receiver, on_connected=on_connected)
+
+    def run(self):
+        asyncio.run(self.connection.receive_messages())
@@ -2,6 +2,8 @@ import logging
 
 from gsy_framework.client_connections.utils import log_market_progression
 
+from gsy_matching_engine_sdk.recorder import INBOUND
+
 
 class WebsocketMessageReceiver:
     """WebsocketMessageReceiver"""
@@ -13,21 +15,37 @@ class WebsocketMessageReceiver:
         """Available events: market, tick, finish, offers_bids_response,
            matched_recommendations_response.
 
+        The event handlers are called by the event dispatcher of the client on its worker threads,
+        so that the websocket thread can keep reading frames while they run.
+
         Args:
             message: Received websocket message
 
         Returns: None
 
         """
-        event = message.get("event")
         log_market_progression(message)
-        if event and hasattr(self.client, f"_on_{event}"):
-            getattr(self.client, f"_on_{event}")(message)
+        self.client.callback_thread.dispatch(message)
 
     def received_message(self, message):
-        """Handle received message."""
+        """Handle received message, decoding it first if it is a raw websocket frame.
+
+        Raw frames of the events that the client does not handle are dropped before decoding.
+
+        The messages received before the client is ready are handled once it is.
+        """
+        if self.client.bootstrap.defer(self.received_message, message):
+            return
         try:
+            # pylint: disable=protected-access
+            if isinstance(message, (str, bytes)):
+                if self.client._is_unhandled_event(message):
+                    return
+                message_size = len(message)
+                with self.client.metrics.time_stage("decode"):
+                    message = self.client.serializer.loads(message)
+                self.client._track_received_message(message.get("event"), message_size)
+            self.client._record_message(INBOUND, message.get("event") or "", message)
             self._handle_event_message(message)
-            self.client.on_event_or_response(message)
         except Exception:
             logging.exception("Error while processing incoming message %s.", message)
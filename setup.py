@@ -39,6 +39,8 @@ setup(
     package_dir={"gsy_matching_engine_sdk": "gsy_matching_engine_sdk"},
     package_data={},
     install_requires=REQUIREMENTS,
+    # Solver of the WelfareMaximizingMatchingAlgorithm
+    extras_require={"welfare": ["highspy"]},
     entry_points={
         "console_scripts": [
             "gsy-matching-engine-sdk = gsy_matching_engine_sdk.cli:main",
@@ -0,0 +1,49 @@
+"""Orders and payloads shared by the tests of the matching algorithms."""
+
+import pytest
+
+MARKET_ID = "market"
+TIME_SLOT = "2022-03-15T00:00"
+
+
+def create_bid(bid_id: str, energy: float, energy_rate: float, buyer_id: str = "buyer",
+               requirements=None) -> dict:
+    """Return a serialized bid of TIME_SLOT."""
+    return {"type": "Bid", "id": bid_id, "time_slot": TIME_SLOT, "energy": energy,
+            "energy_rate": energy_rate, "original_price": energy * energy_rate,
+            "buyer": {"name": buyer_id, "uuid": buyer_id, "origin": buyer_id,
+                      "origin_uuid": buyer_id},
+            "buyer_id": buyer_id, "buyer_origin_id": buyer_id, "requirements": requirements}
+
+
+def create_offer(  # pylint: disable=too-many-arguments
+        offer_id: str, energy: float, energy_rate: float, seller_id: str = "seller",
+        energy_type: str = None, requirements=None) -> dict:
+    """Return a serialized offer of TIME_SLOT."""
+    return {"type": "Offer", "id": offer_id, "time_slot": TIME_SLOT, "energy": energy,
+            "energy_rate": energy_rate, "original_price": energy * energy_rate,
+            "seller": {"name": seller_id, "uuid": seller_id, "origin": seller_id,
+                       "origin_uuid": seller_id},
+            "seller_id": seller_id, "seller_origin_id": seller_id,
+            "attributes": {"energy_type": energy_type} if energy_type else None,
+            "requirements": requirements}
+
+
+def create_matching_data(bids, offers) -> dict:
+    """Return the payload of the bids and offers of TIME_SLOT in MARKET_ID."""
+    return {MARKET_ID: {TIME_SLOT: {"bids": bids, "offers": offers}}}
+
+
+def get_trades(recommendations):
+    """Return the (bid id, offer id, energy, rate) of the recommendations."""
+    return [(recommendation["bid"]["id"], recommendation["offer"]["id"],
+             pytest.approx(recommendation["selected_energy"]),
+             pytest.approx(recommendation["trade_rate"]))
+            for recommendation in recommendations]
+
+
+def get_surplus(recommendations) -> float:
+    """Return the total surplus of the recommendations, traded at the rates of the orders."""
+    return sum(recommendation["selected_energy"] * (
+        recommendation["bid"]["energy_rate"] - recommendation["offer"]["energy_rate"])
+        for recommendation in recommendations)
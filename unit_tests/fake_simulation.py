@@ -0,0 +1,22 @@
+"""Stand-in for the simulation side of the Redis handshakes, shared by the matcher tests."""
+
+import json
+from threading import Thread
+
+from gsy_framework.redis_channels import MatchingEngineChannels
+
+
+def answer_simulation_id_request(redis_db, simulation_id: str) -> Thread:
+    """Answer the next simulation id request published on redis_db with simulation_id."""
+    pubsub = redis_db.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(MatchingEngineChannels(None).simulation_id)
+
+    def answer():
+        while pubsub.get_message(timeout=0.1) is None:
+            pass
+        redis_db.publish(MatchingEngineChannels(None).simulation_id_response,
+                         json.dumps({"simulation_id": simulation_id}))
+        pubsub.close()
+    thread = Thread(target=answer, daemon=True)
+    thread.start()
+    return thread
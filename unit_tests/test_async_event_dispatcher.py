@@ -0,0 +1,178 @@
+# pylint: disable=missing-function-docstring
+
+import asyncio
+
+import pytest
+
+from gsy_matching_engine_sdk.constants import (
+    BLOCK_POLICY, DROP_NEWEST_POLICY, DROP_OLDEST_POLICY)
+from gsy_matching_engine_sdk.matchers.async_event_dispatcher import AsyncEventDispatcher
+
+TIMEOUT = 5
+
+
+class _Client:
+    """Matcher that records the handled events, and waits to be released before handling them.
+
+    Created on the event loop of the test, since the asyncio events are bound to it.
+    """
+
+    def __init__(self):
+        self.handling = asyncio.Event()
+        self.released = asyncio.Event()
+        self.started_events = []
+        self.handled_events = []
+        self.ticks = []
+        self.market_cycles = []
+
+    async def on_event_or_response(self, data):
+        self.handling.set()
+        self.started_events.append((data["event"], data["number"]))
+        await asyncio.wait_for(self.released.wait(), TIMEOUT)
+        self.handled_events.append((data["event"], data["number"]))
+
+    def _on_tick(self, data):
+        self.ticks.append(data["number"])
+
+    async def _on_market_cycle(self, data):
+        self.market_cycles.append(data["number"])
+
+
+def _get_handled_numbers(client, event_type):
+    return [number for handled_type, number in client.handled_events
+            if handled_type == event_type]
+
+
+async def _dispatch_queued_events(dispatcher, client, event_type, count):
+    """Dispatch the events while the first one is being handled, so that the others are queued."""
+    dispatcher.dispatch({"event": event_type, "number": 1})
+    await asyncio.wait_for(client.handling.wait(), TIMEOUT)
+    for number in range(2, count + 1):
+        dispatcher.dispatch({"event": event_type, "number": number})
+
+
+def test_dispatch_handles_the_events_of_a_type_in_order():
+    async def dispatch():
+        client = _Client()
+        client.released.set()
+        dispatcher = AsyncEventDispatcher(client)
+        for number in range(1, 21):
+            dispatcher.dispatch({"event": "market_cycle", "number": number})
+        assert await dispatcher.wait_until_idle(TIMEOUT)
+        return client
+
+    client = asyncio.run(dispatch())
+
+    assert _get_handled_numbers(client, "market_cycle") == list(range(1, 21))
+    # Both plain functions and coroutine functions are called
+    assert client.market_cycles == list(range(1, 21))
+
+
+def test_dispatch_handles_the_event_types_concurrently():
+    async def dispatch():
+        client = _Client()
+        dispatcher = AsyncEventDispatcher(client)
+        await _dispatch_queued_events(dispatcher, client, "offer", 1)
+        dispatcher.dispatch({"event": "tick", "number": 1})
+        await asyncio.sleep(0.05)
+        # The tick is being handled while the offer still is
+        assert client.started_events == [("offer", 1), ("tick", 1)]
+        client.released.set()
+        assert await dispatcher.wait_until_idle(TIMEOUT)
+        return client
+
+    client = asyncio.run(dispatch())
+
+    assert client.ticks == [1]
+    assert sorted(client.handled_events) == [("offer", 1), ("tick", 1)]
+
+
+def test_dispatch_coalesces_the_queued_events():
+    async def dispatch():
+        client = _Client()
+        dispatcher = AsyncEventDispatcher(client)
+        await _dispatch_queued_events(dispatcher, client, "tick", 5)
+        client.released.set()
+        assert await dispatcher.wait_until_idle(TIMEOUT)
+        return client, dispatcher.get_metrics()
+
+    client, metrics = asyncio.run(dispatch())
+
+    # The queued ticks are superseded by the last one
+    assert client.ticks == [1, 5]
+    assert metrics["coalesced"] == {"tick": 3}
+
+
+@pytest.mark.parametrize("overflow_policy, expected_numbers", [
+    (DROP_OLDEST_POLICY, [1, 5, 6]),
+    (DROP_NEWEST_POLICY, [1, 2, 3]),
+])
+def test_dispatch_drops_the_events_of_a_full_queue(overflow_policy, expected_numbers):
+    async def dispatch():
+        client = _Client()
+        dispatcher = AsyncEventDispatcher(
+            client, max_queue_size=2, overflow_policy=overflow_policy)
+        await _dispatch_queued_events(dispatcher, client, "offer", 6)
+        client.released.set()
+        assert await dispatcher.wait_until_idle(TIMEOUT)
+        return client, dispatcher.get_metrics()
+
+    client, metrics = asyncio.run(dispatch())
+
+    assert _get_handled_numbers(client, "offer") == expected_numbers
+    assert metrics["dropped"] == {"offer": 3}
+
+
+@pytest.mark.parametrize("event_type", ["market_cycle", "finish", "match"])
+def test_dispatch_never_drops_the_lossless_events(event_type):
+    async def dispatch():
+        client = _Client()
+        dispatcher = AsyncEventDispatcher(client, max_queue_size=2)
+        await _dispatch_queued_events(dispatcher, client, event_type, 10)
+        client.released.set()
+        assert await dispatcher.wait_until_idle(TIMEOUT)
+        return client, dispatcher.get_metrics()
+
+    client, metrics = asyncio.run(dispatch())
+
+    assert _get_handled_numbers(client, event_type) == list(range(1, 11))
+    assert not metrics["dropped"]
+
+
+def test_the_block_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AsyncEventDispatcher(object(), overflow_policy=BLOCK_POLICY)
+
+
+def test_shutdown_waits_for_the_events_being_handled_and_drops_the_queued_ones():
+    async def dispatch():
+        client = _Client()
+        dispatcher = AsyncEventDispatcher(client)
+        await _dispatch_queued_events(dispatcher, client, "offer", 3)
+        shutdown_task = asyncio.create_task(dispatcher.shutdown())
+        await asyncio.sleep(0.05)
+        assert not shutdown_task.done()
+        client.released.set()
+        await asyncio.wait_for(shutdown_task, TIMEOUT)
+        dispatcher.dispatch({"event": "offer", "number": 4})
+        assert await dispatcher.wait_until_idle(TIMEOUT)
+        return client
+
+    client = asyncio.run(dispatch())
+
+    assert client.handled_events == [("offer", 1)]
+
+
+def test_shutdown_without_waiting_cancels_the_events_being_handled():
+    async def dispatch():
+        client = _Client()
+        dispatcher = AsyncEventDispatcher(client)
+        await _dispatch_queued_events(dispatcher, client, "offer", 3)
+        await asyncio.wait_for(dispatcher.shutdown(wait=False), TIMEOUT)
+        assert await dispatcher.wait_until_idle(TIMEOUT)
+        return client, dispatcher.queue_depths
+
+    client, queue_depths = asyncio.run(dispatch())
+
+    assert not client.handled_events
+    assert queue_depths == {"offer": 2}
@@ -0,0 +1,92 @@
+# pylint: disable=missing-function-docstring
+
+import asyncio
+import json
+
+import fakeredis
+import pytest
+from fakeredis import aioredis
+from gsy_framework.redis_channels import MatchingEngineChannels
+
+from gsy_matching_engine_sdk.matchers import async_redis_base_matcher
+from gsy_matching_engine_sdk.matchers.async_redis_base_matcher import AsyncRedisBaseMatcher
+
+SIMULATION_ID = "simulation"
+TIMEOUT = 5
+
+
+class _Matcher(AsyncRedisBaseMatcher):
+    """Matcher that keeps the handled ticks and matched recommendations responses."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ticks = []
+        self.match_responses = []
+
+    async def on_tick(self, data):
+        self.ticks.append(data["number"])
+
+    async def on_matched_recommendations_response(self, data):
+        self.match_responses.append(data["number"])
+
+
+@pytest.fixture(name="server")
+def server_fixture(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(async_redis_base_matcher.Redis, "from_url",
+                        lambda url: aioredis.FakeRedis(server=server))
+    return server
+
+
+async def _answer_simulation_id_request(redis_db):
+    pubsub = redis_db.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(MatchingEngineChannels(None).simulation_id)
+    while await pubsub.get_message(timeout=0.1) is None:
+        pass
+    await redis_db.publish(MatchingEngineChannels(None).simulation_id_response,
+                           json.dumps({"simulation_id": SIMULATION_ID}))
+    await pubsub.aclose()
+
+
+async def _publish_events(redis_db, events):
+    for event in events:
+        await redis_db.publish(MatchingEngineChannels(SIMULATION_ID).events, json.dumps(event))
+
+
+def test_run_handles_the_events_until_the_simulation_finishes(server):
+    async def run():
+        redis_db = aioredis.FakeRedis(server=server)
+        matcher = _Matcher()
+        answer_task = asyncio.create_task(_answer_simulation_id_request(redis_db))
+        await asyncio.sleep(0)  # Subscribed before the matcher requests the id
+        run_task = asyncio.create_task(matcher.run())
+        await asyncio.wait_for(answer_task, TIMEOUT)
+        assert await asyncio.wait_for(
+            asyncio.wrap_future(matcher.bootstrap.ready), TIMEOUT) == SIMULATION_ID
+        await _publish_events(redis_db, [
+            {"event": "tick", "markets_info": {}, "number": 1},
+            {"event": "match", "recommendations": [], "status": "success", "number": 1},
+            {"event": "finish"}])
+        await asyncio.wait_for(run_task, TIMEOUT)
+        await redis_db.aclose()
+        return matcher
+
+    matcher = asyncio.run(run())
+
+    assert matcher.is_finished
+    assert matcher.ticks == [1]
+    assert matcher.match_responses == [1]
+
+
+@pytest.mark.usefixtures("server")
+def test_run_raises_the_error_of_the_connection(monkeypatch):
+    async def fail(*_args, **_kwargs):
+        raise ConnectionError("connection lost")
+    monkeypatch.setattr(async_redis_base_matcher.PubSub, "run", fail)
+
+    async def run():
+        matcher = _Matcher()
+        await asyncio.wait_for(matcher.run(), TIMEOUT)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(run())
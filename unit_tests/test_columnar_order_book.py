@@ -0,0 +1,107 @@
+# pylint: disable=missing-function-docstring
+
+import pytest
+
+from gsy_matching_engine_sdk.matchers.columnar_order_book import (
+    ColumnarOrderBook, ColumnarOrders)
+from gsy_matching_engine_sdk.matching_algorithms import (
+    IndexedAttributedMatchingAlgorithm, VectorizedPayAsClearMatchingAlgorithm)
+from unit_tests.factories import (
+    MARKET_ID, create_bid, create_matching_data, create_offer, get_trades)
+
+NEXT_TIME_SLOT = "2022-03-15T00:15"
+
+
+def _create_two_time_slots_data() -> dict:
+    matching_data = create_matching_data(
+        bids=[create_bid("bid-1", 5, 30)], offers=[create_offer("offer-1", 4, 20)])
+    matching_data[MARKET_ID] = {
+        NEXT_TIME_SLOT: {"bids": [create_bid("bid-2", 2, 25)], "offers": []},
+        **matching_data[MARKET_ID]}
+    return matching_data
+
+
+def test_the_orders_are_rebuilt_from_their_columns():
+    orders = [create_bid("bid-1", 5, 30), create_bid("bid-2", 2, 25)]
+
+    columnar_orders = ColumnarOrders(orders)
+
+    assert len(columnar_orders) == 2
+    assert columnar_orders.ids == ["bid-1", "bid-2"]
+    assert columnar_orders.energies.tolist() == [5, 2]
+    assert columnar_orders.energy_rates.tolist() == [30, 25]
+    assert columnar_orders.to_dicts() == orders
+
+
+def test_the_traders_of_the_orders_are_shared_but_rebuilt_as_copies():
+    columnar_orders = ColumnarOrders([create_bid("bid-1", 5, 30), create_bid("bid-2", 2, 25)])
+
+    first_order = columnar_orders.get_order(0)
+    first_order["buyer"]["name"] = "other-buyer"
+
+    assert columnar_orders.get_order(1)["buyer"]["name"] == "buyer"
+
+
+def test_orders_without_a_numerical_energy_cannot_be_matched():
+    columnar_orders = ColumnarOrders([{"id": "bid", "energy": None}])
+
+    with pytest.raises(ValueError):
+        columnar_orders.energies  # pylint: disable=pointless-statement
+    assert not ColumnarOrders([]).energies.size
+
+
+def test_the_view_is_converted_back_to_the_payload():
+    matching_data = _create_two_time_slots_data()
+
+    order_book = ColumnarOrderBook.from_bids_offers(matching_data)
+
+    assert len(order_book) == 3
+    assert order_book.to_matching_data() == matching_data
+    assert order_book.get_partition(MARKET_ID, "unknown time slot") is None
+
+
+def test_iter_matching_data_yields_the_nearest_time_slots_first():
+    order_book = ColumnarOrderBook.from_bids_offers(_create_two_time_slots_data())
+
+    assert [time_slot for _, time_slot, _ in order_book.iter_matching_data()] == [
+        NEXT_TIME_SLOT, "2022-03-15T00:00"]
+    assert [(market_id, time_slot, data["bids"][0]["id"]) for market_id, time_slot, data in
+            order_book.iter_matching_data(nearest_first=True)] == [
+        (MARKET_ID, "2022-03-15T00:00", "bid-1"), (MARKET_ID, NEXT_TIME_SLOT, "bid-2")]
+
+
+def test_update_replaces_the_partitions_of_the_payload():
+    order_book = ColumnarOrderBook.from_bids_offers(_create_two_time_slots_data())
+
+    order_book.update({MARKET_ID: {NEXT_TIME_SLOT: {"bids": [], "offers": []}}})
+
+    assert len(order_book) == 2
+    assert len(order_book.get_partition(MARKET_ID, NEXT_TIME_SLOT)) == 0
+    order_book.clear()
+    assert not list(order_book)
+
+
+def test_the_pay_as_clear_algorithm_matches_the_view_like_the_payload():
+    matching_data = create_matching_data(
+        bids=[create_bid("bid-1", 5, 30), create_bid("bid-2", 2, 25)],
+        offers=[create_offer("offer-1", 4, 20), create_offer("offer-2", 4, 22)])
+    get_matches = VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations
+
+    trades = sorted(get_trades(get_matches(ColumnarOrderBook.from_bids_offers(matching_data))))
+
+    assert trades
+    assert trades == sorted(get_trades(get_matches(matching_data)))
+
+
+def test_the_attributed_algorithm_matches_the_view_like_the_payload():
+    matching_data = create_matching_data(
+        bids=[create_bid("bid-1", 2, 30, requirements=[{"energy_type": ["Wind"]}]),
+              create_bid("bid-2", 2, 25)],
+        offers=[create_offer("offer-1", 1, 20, energy_type="PV"),
+                create_offer("offer-2", 2, 22, energy_type="Wind")])
+    get_matches = IndexedAttributedMatchingAlgorithm.get_matches_recommendations
+
+    trades = get_trades(get_matches(ColumnarOrderBook.from_bids_offers(matching_data)))
+
+    assert trades
+    assert trades == get_trades(get_matches(matching_data))
@@ -0,0 +1,136 @@
+# pylint: disable=missing-function-docstring
+
+from threading import Thread
+
+import pytest
+
+from gsy_matching_engine_sdk.matchers.connection_bootstrap import (
+    AUTHENTICATION_HANDSHAKE, WEBSOCKET_HANDSHAKE, ConnectionBootstrap,
+    SimulationChannelPatterns)
+
+
+@pytest.fixture(name="bootstrap")
+def bootstrap_fixture():
+    return ConnectionBootstrap()
+
+
+def test_set_ready_handles_the_deferred_messages_in_order(bootstrap):
+    handled_messages = []
+    for message in range(3):
+        assert bootstrap.defer(handled_messages.append, message)
+    assert not handled_messages
+
+    bootstrap.set_ready("simulation")
+
+    assert handled_messages == [0, 1, 2]
+    assert bootstrap.is_ready
+    assert bootstrap.ready.result(0) == "simulation"
+
+
+def test_defer_returns_false_once_ready(bootstrap):
+    bootstrap.set_ready("simulation")
+    assert not bootstrap.defer(print, "message")
+
+
+def test_messages_deferred_while_replaying_are_handled_right_away(bootstrap):
+    handled_messages = []
+
+    def handle(message):
+        # The handlers of the replayed messages can receive messages themselves
+        if not bootstrap.defer(handled_messages.append, f"{message}-nested"):
+            handled_messages.append(f"{message}-nested")
+        handled_messages.append(message)
+
+    bootstrap.defer(handle, "message")
+    bootstrap.set_ready("simulation")
+
+    assert handled_messages == ["message-nested", "message"]
+
+
+def test_messages_deferred_by_other_threads_while_replaying_wait_for_the_replay(bootstrap):
+    handled_messages = []
+    threads = []
+
+    def handle(message):
+        thread = Thread(target=lambda: bootstrap.defer(handled_messages.append, "other") or
+                        handled_messages.append("other"))
+        thread.start()
+        threads.append(thread)
+        thread.join(0.05)
+        handled_messages.append(message)
+
+    bootstrap.defer(handle, "message")
+    bootstrap.set_ready("simulation")
+    threads[0].join(5)
+
+    assert handled_messages == ["message", "other"]
+
+
+def test_the_oldest_messages_are_dropped_beyond_the_buffer_size():
+    bootstrap = ConnectionBootstrap(max_buffered_messages=2)
+    handled_messages = []
+    for message in range(4):
+        bootstrap.defer(handled_messages.append, message)
+
+    bootstrap.set_ready("simulation")
+
+    assert handled_messages == [2, 3]
+
+
+def test_errors_of_the_deferred_messages_do_not_stop_the_replay(bootstrap):
+    handled_messages = []
+    bootstrap.defer(lambda: 1 / 0)
+    bootstrap.defer(handled_messages.append, "message")
+
+    bootstrap.set_ready("simulation")
+
+    assert handled_messages == ["message"]
+
+
+def test_ready_once_all_handshakes_are_completed():
+    bootstrap = ConnectionBootstrap(handshakes=(AUTHENTICATION_HANDSHAKE, WEBSOCKET_HANDSHAKE))
+    handled_messages = []
+    bootstrap.defer(handled_messages.append, "message")
+
+    bootstrap.complete_handshake(WEBSOCKET_HANDSHAKE, "simulation")
+    assert not bootstrap.is_ready and not handled_messages
+
+    bootstrap.complete_handshake(AUTHENTICATION_HANDSHAKE, "simulation")
+    assert bootstrap.is_ready
+    assert handled_messages == ["message"]
+
+
+def test_set_failed_drops_the_deferred_messages(bootstrap):
+    handled_messages = []
+    bootstrap.defer(handled_messages.append, "message")
+
+    bootstrap.set_failed(ConnectionError("failed"))
+    bootstrap.set_ready("simulation")
+
+    assert not handled_messages
+    assert not bootstrap.is_ready
+    with pytest.raises(ConnectionError):
+        bootstrap.ready.result(0)
+
+
+def _get_channel_handlers(simulation_id):
+    if not simulation_id:
+        return {"events/": "events_handler", "area-map/response": "area_map_handler"}
+    return {f"{simulation_id}/events/": "events_handler",
+            f"{simulation_id}/area-map/response": "area_map_handler"}
+
+
+@pytest.mark.parametrize("pattern, channel, expected_simulation_id", [
+    ("*/events/", "simulation/events/", "simulation"),
+    ("*/area-map/response", "simulation/area-map/response", "simulation"),
+    ("events/", "events/", ""),
+    ("*/events/", "simulation/area-map/response", None),
+])
+def test_simulation_channel_patterns_attribute_the_messages_to_their_simulation(
+        pattern, channel, expected_simulation_id):
+    channel_patterns = SimulationChannelPatterns(_get_channel_handlers)
+
+    assert set(channel_patterns.patterns) == {
+        "*/events/", "*/area-map/response", "events/", "area-map/response"}
+    assert channel_patterns.get_simulation_id(pattern, channel) == expected_simulation_id
+    assert channel_patterns.get_handler("*/events/") == "events_handler"
@@ -0,0 +1,146 @@
+# pylint: disable=missing-function-docstring
+
+from threading import Event, Thread
+
+import pytest
+
+from gsy_matching_engine_sdk.constants import (
+    BLOCK_POLICY, DROP_NEWEST_POLICY, DROP_OLDEST_POLICY)
+from gsy_matching_engine_sdk.matchers.event_dispatcher import EventDispatcher
+
+TIMEOUT = 5
+
+
+class _Client:
+    """Matcher that records the handled events, and waits to be released before handling them."""
+
+    def __init__(self):
+        self.handling = Event()
+        self.released = Event()
+        self.handled_events = []
+        self.ticks = []
+
+    def on_event_or_response(self, data):
+        self.handling.set()
+        self.released.wait(TIMEOUT)
+        self.handled_events.append((data["event"], data["number"]))
+
+    def _on_tick(self, data):
+        self.ticks.append(data["number"])
+
+
+@pytest.fixture(name="client")
+def client_fixture():
+    return _Client()
+
+
+def _dispatch_events(dispatcher, event_type, count):
+    for number in range(1, count + 1):
+        dispatcher.dispatch({"event": event_type, "number": number})
+
+
+def _get_handled_numbers(client, event_type):
+    return [number for handled_type, number in client.handled_events
+            if handled_type == event_type]
+
+
+def test_dispatch_handles_the_events_of_a_type_in_order(client):
+    dispatcher = EventDispatcher(client, max_workers=2)
+    client.released.set()
+    _dispatch_events(dispatcher, "market_cycle", 20)
+
+    assert dispatcher.wait_until_idle(TIMEOUT)
+    assert _get_handled_numbers(client, "market_cycle") == list(range(1, 21))
+    dispatcher.shutdown()
+
+
+def test_dispatch_calls_the_callback_of_the_event_type(client):
+    dispatcher = EventDispatcher(client, max_workers=2)
+    client.released.set()
+    dispatcher.dispatch({"event": "tick", "number": 1})
+
+    assert dispatcher.wait_until_idle(TIMEOUT)
+    assert client.ticks == [1]
+    dispatcher.shutdown()
+
+
+def _dispatch_queued_events(dispatcher, client, event_type, count):
+    """Dispatch the events while the first one is being handled, so that the others are queued."""
+    dispatcher.dispatch({"event": event_type, "number": 1})
+    assert client.handling.wait(TIMEOUT)
+    for number in range(2, count + 1):
+        dispatcher.dispatch({"event": event_type, "number": number})
+
+
+def test_dispatch_coalesces_the_queued_events(client):
+    dispatcher = EventDispatcher(client, max_workers=1)
+    _dispatch_queued_events(dispatcher, client, "tick", 5)
+    client.released.set()
+
+    assert dispatcher.wait_until_idle(TIMEOUT)
+    # The queued ticks are superseded by the last one
+    assert client.ticks == [1, 5]
+    assert dispatcher.get_metrics()["coalesced"] == {"tick": 3}
+    dispatcher.shutdown()
+
+
+@pytest.mark.parametrize("overflow_policy, expected_numbers", [
+    (DROP_OLDEST_POLICY, [1, 5, 6]),
+    (DROP_NEWEST_POLICY, [1, 2, 3]),
+])
+def test_dispatch_drops_the_events_of_a_full_queue(client, overflow_policy, expected_numbers):
+    dispatcher = EventDispatcher(
+        client, max_workers=1, max_queue_size=2, overflow_policy=overflow_policy)
+    _dispatch_queued_events(dispatcher, client, "offer", 6)
+    client.released.set()
+
+    assert dispatcher.wait_until_idle(TIMEOUT)
+    assert _get_handled_numbers(client, "offer") == expected_numbers
+    assert dispatcher.get_metrics()["dropped"] == {"offer": 3}
+    dispatcher.shutdown()
+
+
+def test_dispatch_blocks_until_the_full_queue_has_room(client):
+    dispatcher = EventDispatcher(
+        client, max_workers=1, max_queue_size=2, overflow_policy=BLOCK_POLICY)
+    _dispatch_queued_events(dispatcher, client, "offer", 3)
+    dispatching_thread = Thread(
+        target=dispatcher.dispatch, args=({"event": "offer", "number": 4},))
+    dispatching_thread.start()
+    dispatching_thread.join(0.1)
+    assert dispatching_thread.is_alive()
+
+    client.released.set()
+    dispatching_thread.join(TIMEOUT)
+    assert dispatcher.wait_until_idle(TIMEOUT)
+    assert _get_handled_numbers(client, "offer") == [1, 2, 3, 4]
+    dispatcher.shutdown()
+
+
+@pytest.mark.parametrize("event_type", ["market_cycle", "finish", "match"])
+@pytest.mark.parametrize("overflow_policy", [DROP_OLDEST_POLICY, DROP_NEWEST_POLICY])
+def test_dispatch_never_drops_the_lossless_events(client, event_type, overflow_policy):
+    dispatcher = EventDispatcher(
+        client, max_workers=1, max_queue_size=2, overflow_policy=overflow_policy)
+    _dispatch_queued_events(dispatcher, client, event_type, 10)
+    client.released.set()
+
+    assert dispatcher.wait_until_idle(TIMEOUT)
+    assert _get_handled_numbers(client, event_type) == list(range(1, 11))
+    assert not dispatcher.get_metrics()["dropped"]
+    dispatcher.shutdown()
+
+
+def test_unknown_overflow_policy_is_rejected(client):
+    with pytest.raises(ValueError):
+        EventDispatcher(client, overflow_policy="unknown")
+
+
+def test_shutdown_stops_dispatching(client):
+    dispatcher = EventDispatcher(client, max_workers=1)
+    client.released.set()
+    dispatcher.shutdown()
+    dispatcher.dispatch({"event": "tick", "number": 1})
+
+    assert dispatcher.is_shut_down
+    assert not client.handled_events
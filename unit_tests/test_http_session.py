@@ -0,0 +1,113 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import gzip
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from gsy_matching_engine_sdk.http_session import compress_body, create_http_session
+from gsy_matching_engine_sdk.matchers.rest_base_matcher import RestBaseMatcher
+
+MAX_RETRIES = 2
+
+
+class _ExchangeServer(ThreadingHTTPServer):
+    """Local HTTP server that keeps the received requests, and answers them with status_code."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _ExchangeRequestHandler)
+        self.status_code = 503
+        self.requests = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def get_methods(self):
+        return [method for method, _, _ in self.requests]
+
+
+class _ExchangeRequestHandler(BaseHTTPRequestHandler):
+    """Keep the method, headers and body of the request in the requests of the server."""
+
+    def _handle(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.command, dict(self.headers), body))
+        self.send_response(self.server.status_code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_POST = _handle
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name="server")
+def server_fixture():
+    server = _ExchangeServer()
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name="matcher")
+def matcher_fixture(server, monkeypatch):
+    monkeypatch.setattr(RestBaseMatcher, "_connect_to_simulation", lambda self: None)
+    matcher = RestBaseMatcher(simulation_id="simulation", domain_name=server.url,
+                              http_max_retries=MAX_RETRIES, gzip_min_bytes=100)
+    yield matcher
+    matcher.callback_thread.shutdown()
+    matcher.session.close()
+
+
+def test_the_requests_that_fail_with_a_server_error_are_retried_if_idempotent(server):
+    session = create_http_session(pool_size=1, max_retries=MAX_RETRIES, backoff_factor=0)
+
+    assert session.post(server.url, data="{}").status_code == 503
+    assert server.get_methods() == ["POST"]
+    assert session.get(server.url).status_code == 503
+    assert server.get_methods() == ["POST"] + ["GET"] * (MAX_RETRIES + 1)
+
+
+@pytest.mark.parametrize("body", ["x" * 100, b"x" * 100, b"x" * 1000])
+def test_compress_body_gzips_the_bodies_from_the_threshold(body):
+    compressed_body, headers = compress_body(body, gzip_min_bytes=100)
+
+    assert headers == {"Content-Encoding": "gzip"}
+    assert gzip.decompress(compressed_body) == (
+        body.encode() if isinstance(body, str) else body)
+
+
+@pytest.mark.parametrize("body, gzip_min_bytes", [("x" * 99, 100), (b"x" * 1000, None)])
+def test_compress_body_keeps_the_other_bodies(body, gzip_min_bytes):
+    assert compress_body(body, gzip_min_bytes) == (body, {})
+
+
+def test_the_recommendations_are_posted_once(server, matcher):
+    recommendations = [{"market_id": "market", "bid": {"id": f"bid-{index}"},
+                        "offer": {"id": f"offer-{index}"}} for index in range(10)]
+
+    matcher.submit_matches(recommendations)
+
+    assert server.get_methods() == ["POST"]
+    _, headers, body = server.requests[0]
+    # The body is above the gzip threshold of the matcher
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == {"recommended_matches": recommendations}
+
+
+def test_the_offers_bids_requests_are_retried(server, matcher):
+    # Without waits between the retries
+    matcher.session.close()
+    matcher.session = create_http_session(pool_size=1, max_retries=MAX_RETRIES, backoff_factor=0)
+    matcher.request_offers_bids(filters={})
+
+    assert server.get_methods() == ["GET"] * (MAX_RETRIES + 1)
+    # The small body of the request is sent as is
+    assert "Content-Encoding" not in server.requests[0][1]
+    server.status_code = 200
+    assert matcher._send_request("GET", server.url, {"filters": {}})
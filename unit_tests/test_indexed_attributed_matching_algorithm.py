@@ -0,0 +1,148 @@
+# pylint: disable=missing-function-docstring
+
+import json
+import random
+
+import pytest
+from gsy_framework.matching_algorithms import AttributedMatchingAlgorithm
+
+from gsy_matching_engine_sdk.matching_algorithms import IndexedAttributedMatchingAlgorithm
+from unit_tests.factories import (
+    TIME_SLOT, create_bid, create_matching_data, create_offer, get_trades)
+
+# Few distinct values, so that the random books have many orders with equal rates
+RATES = (10, 15, 20, 25, 30)
+ENERGIES = (0.5, 1, 2, 3)
+ENERGY_TYPES = ("PV", "Wind", "Hydro")
+
+
+def _create_random_matching_data(seed: int) -> dict:
+    """Return random books whose orders have one or several requirements (or none)."""
+    rng = random.Random(seed)
+    buyer_ids = [f"buyer-{index}" for index in range(4)]
+    seller_ids = [f"seller-{index}" for index in range(4)]
+    bid_requirements = [
+        None,
+        lambda: [{"trading_partners": rng.sample(seller_ids, rng.randint(1, 2))}],
+        lambda: [{"energy_type": rng.sample(ENERGY_TYPES, rng.randint(1, 2))}],
+        lambda: [{"energy_type": [rng.choice(ENERGY_TYPES)]},
+                 {"trading_partners": rng.sample(seller_ids, 2),
+                  "energy_type": rng.sample(ENERGY_TYPES, 2)}],
+        lambda: [{"trading_partners": [rng.choice(seller_ids)]},
+                 {"trading_partners": [rng.choice(seller_ids)]}],
+    ]
+    matching_data = {}
+    for market_index in range(rng.randint(1, 2)):
+        bids = []
+        for index in range(rng.randint(1, 15)):
+            create_requirements = rng.choice(bid_requirements)
+            bids.append(create_bid(
+                f"bid-{market_index}-{index}", rng.choice(ENERGIES), rng.choice(RATES),
+                buyer_id=rng.choice(buyer_ids),
+                requirements=create_requirements() if create_requirements else None))
+        offers = []
+        for index in range(rng.randint(1, 15)):
+            offers.append(create_offer(
+                f"offer-{market_index}-{index}", rng.choice(ENERGIES), rng.choice(RATES),
+                seller_id=rng.choice(seller_ids), energy_type=rng.choice(ENERGY_TYPES + (None,)),
+                requirements=([{"trading_partners": [rng.choice(buyer_ids)]}]
+                              if rng.random() < 0.2 else None)))
+        matching_data[f"market-{market_index}"] = {
+            TIME_SLOT: {"bids": bids, "offers": offers}}
+    return matching_data
+
+
+def _get_comparable_trades(recommendations):
+    return sorted(
+        (recommendation["market_id"], recommendation["time_slot"],
+         recommendation["bid"]["id"], recommendation["offer"]["id"],
+         round(recommendation["selected_energy"], 6), round(recommendation["trade_rate"], 6),
+         json.dumps(recommendation["matching_requirements"], sort_keys=True))
+        for recommendation in recommendations)
+
+
+def _get_matches(matching_data):
+    return IndexedAttributedMatchingAlgorithm.get_matches_recommendations(matching_data)
+
+
+def test_orders_without_requirements_are_matched_pay_as_bid():
+    matching_data = create_matching_data(
+        bids=[create_bid("bid-1", 5, 30), create_bid("bid-2", 5, 15)],
+        offers=[create_offer("offer-2", 4, 20), create_offer("offer-1", 3, 10)])
+
+    recommendations = _get_matches(matching_data)
+
+    assert get_trades(recommendations) == [
+        ("bid-1", "offer-1", 3, 30), ("bid-1", "offer-2", 2, 30)]
+    assert all(recommendation["matching_requirements"] is None
+               for recommendation in recommendations)
+
+
+def test_bids_are_matched_with_their_trading_partners_first():
+    requirement = {"trading_partners": ["seller-b"]}
+    matching_data = create_matching_data(
+        bids=[create_bid("bid", 2, 30, requirements=[requirement])],
+        offers=[create_offer("offer-a", 2, 10, seller_id="seller-a"),
+                create_offer("offer-b", 1, 20, seller_id="seller-b")])
+
+    recommendations = _get_matches(matching_data)
+
+    assert get_trades(recommendations) == [
+        ("bid", "offer-b", 1, 30), ("bid", "offer-a", 1, 30)]
+    assert recommendations[0]["matching_requirements"] == {"bid_requirement": requirement}
+    assert recommendations[1]["matching_requirements"] is None
+
+
+def test_bids_are_matched_with_their_energy_types_first():
+    requirement = {"energy_type": ["Wind", "Hydro"]}
+    matching_data = create_matching_data(
+        bids=[create_bid("bid", 1, 30, requirements=[requirement])],
+        offers=[create_offer("offer-pv", 1, 10, energy_type="PV"),
+                create_offer("offer-wind", 1, 20, energy_type="Wind")])
+
+    recommendations = _get_matches(matching_data)
+
+    assert get_trades(recommendations) == [("bid", "offer-wind", 1, 30)]
+    assert recommendations[0]["matching_requirements"] == {"bid_requirement": requirement}
+
+
+def test_matches_are_attributed_to_the_requirement_that_they_satisfy():
+    requirements = [{"trading_partners": ["seller-a"]}, {"trading_partners": ["seller-b"]}]
+    matching_data = create_matching_data(
+        bids=[create_bid("bid", 1, 30, requirements=requirements)],
+        offers=[create_offer("offer-a", 1, 20, seller_id="seller-a")])
+
+    recommendations = _get_matches(matching_data)
+
+    assert get_trades(recommendations) == [("bid", "offer-a", 1, 30)]
+    assert recommendations[0]["matching_requirements"] == {
+        "bid_requirement": requirements[0]}
+
+
+def test_offers_are_matched_with_their_trading_partners_first():
+    requirement = {"trading_partners": ["buyer-b"]}
+    matching_data = create_matching_data(
+        bids=[create_bid("bid-a", 1, 30, buyer_id="buyer-a"),
+              create_bid("bid-b", 1, 25, buyer_id="buyer-b")],
+        offers=[create_offer("offer", 1, 20, requirements=[requirement])])
+
+    recommendations = _get_matches(matching_data)
+
+    assert get_trades(recommendations) == [("bid-b", "offer", 1, 25)]
+    assert recommendations[0]["matching_requirements"] == {"offer_requirement": requirement}
+
+
+def test_unsatisfied_requirements_fall_back_to_the_residual_matching():
+    matching_data = create_matching_data(
+        bids=[create_bid("bid", 1, 30, requirements=[{"energy_type": ["Wind"]}])],
+        offers=[create_offer("offer", 1, 20, energy_type="PV")])
+
+    assert get_trades(_get_matches(matching_data)) == [("bid", "offer", 1, 30)]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_recommendations_are_the_ones_of_the_attributed_algorithm(seed):
+    matching_data = _create_random_matching_data(seed)
+
+    assert _get_comparable_trades(_get_matches(matching_data)) == _get_comparable_trades(
+        AttributedMatchingAlgorithm.get_matches_recommendations(matching_data))
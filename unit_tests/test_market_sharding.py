@@ -0,0 +1,91 @@
+# pylint: disable=missing-function-docstring
+
+import fakeredis
+import pytest
+
+from gsy_matching_engine_sdk.matchers.market_sharding import MarketSharding, assign_markets
+
+MARKET_IDS = [f"market-{index}" for index in range(100)]
+WORKER_IDS = ["worker-a", "worker-b", "worker-c"]
+
+
+def test_assign_markets_assigns_every_market_to_a_worker():
+    assignment = assign_markets(MARKET_IDS, WORKER_IDS)
+
+    assert set(assignment) == set(MARKET_IDS)
+    assert set(assignment.values()) == set(WORKER_IDS)
+
+
+def test_assign_markets_does_not_depend_on_the_order_of_the_workers():
+    assert assign_markets(MARKET_IDS, WORKER_IDS) == assign_markets(
+        MARKET_IDS, reversed(WORKER_IDS))
+
+
+def test_assign_markets_only_reassigns_the_markets_of_the_leaving_worker():
+    assignment = assign_markets(MARKET_IDS, WORKER_IDS)
+    new_assignment = assign_markets(MARKET_IDS, WORKER_IDS[:-1])
+
+    for market_id, worker_id in assignment.items():
+        if worker_id != WORKER_IDS[-1]:
+            assert new_assignment[market_id] == worker_id
+
+
+def test_assign_markets_without_workers_assigns_nothing():
+    assert assign_markets(MARKET_IDS, []) == {}
+
+
+@pytest.fixture(name="redis_db")
+def redis_db_fixture():
+    return fakeredis.FakeRedis()
+
+
+def _create_sharding(redis_db, worker_id):
+    sharding = MarketSharding(redis_db, "group", worker_id=worker_id)
+    sharding.set_markets(MARKET_IDS)
+    sharding.renew_lease()
+    return sharding
+
+
+def test_the_workers_of_a_group_claim_disjoint_shards(redis_db):
+    shardings = [_create_sharding(redis_db, worker_id) for worker_id in WORKER_IDS]
+    for sharding in shardings:
+        sharding.renew_lease()
+
+    shards = [sharding.shard for sharding in shardings]
+    assert all(shards)
+    assert sum(len(shard) for shard in shards) == len(MARKET_IDS)
+    assert frozenset().union(*shards) == set(MARKET_IDS)
+    assert shardings[0].worker_ids == sorted(WORKER_IDS)
+
+
+def test_the_markets_of_a_stopped_worker_are_taken_over(redis_db):
+    sharding = _create_sharding(redis_db, "worker-a")
+    other_sharding = _create_sharding(redis_db, "worker-b")
+    sharding.renew_lease()
+    assert len(sharding.shard) < len(MARKET_IDS)
+
+    other_sharding.stop()
+    sharding.renew_lease()
+
+    assert sharding.shard == set(MARKET_IDS)
+
+
+def test_a_single_worker_claims_all_markets_before_renewing_its_lease(redis_db):
+    sharding = MarketSharding(redis_db, "group", worker_id="worker-a")
+    sharding.set_markets(MARKET_IDS)
+
+    assert sharding.shard == set(MARKET_IDS)
+
+
+def test_the_requests_and_recommendations_are_restricted_to_the_shard(redis_db):
+    sharding = _create_sharding(redis_db, "worker-a")
+    _create_sharding(redis_db, "worker-b")
+    sharding.renew_lease()
+    shard = sharding.shard
+
+    assert sharding.filter_request_filters(None)["markets"] == sorted(shard)
+    assert set(sharding.filter_request_filters(
+        {"markets": MARKET_IDS[:10]})["markets"]) == shard & set(MARKET_IDS[:10])
+    recommendations = [{"market_id": market_id} for market_id in MARKET_IDS]
+    assert {recommendation["market_id"] for recommendation in sharding.filter_recommendations(
+        recommendations)} == shard
@@ -0,0 +1,125 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import math
+import time
+
+import fakeredis
+import pytest
+from gsy_framework.redis_channels import MatchingEngineChannels
+
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+from unit_tests.fake_simulation import answer_simulation_id_request
+
+SIMULATION_ID = "simulation"
+TIMEOUT_SECONDS = 10
+RECOMMENDATION = {"market_id": "market", "time_slot": "2022-03-15T00:00", "bid": {"id": "bid"},
+                  "offer": {"id": "offer"}, "selected_energy": 1, "trade_rate": 20,
+                  "matching_requirements": None}
+
+
+class _Matcher(RedisBaseMatcher):
+    """Matcher that keeps the deadlines of its matchings, and can outlive their market cycle."""
+
+    def __init__(self, *args, **kwargs):
+        self.deadlines = []
+        self.ends_market_cycle = False
+        super().__init__(*args, **kwargs)
+
+    def on_offers_bids_response(self, data):
+        self.deadlines.append(self.deadline)
+        if self.ends_market_cycle:
+            self._on_market_cycle({})
+        self.submit_matches([RECOMMENDATION])
+
+
+def test_a_deadline_without_budget_only_expires_once_cancelled():
+    deadline = MatchingDeadline()
+
+    assert not deadline.is_expired
+    assert deadline.remaining == math.inf
+    deadline.cancel()
+    assert deadline.is_expired
+    assert deadline.remaining == 0
+
+
+def test_a_deadline_expires_once_its_budget_is_exhausted():
+    assert 0 < MatchingDeadline(budget=60).remaining <= 60
+    deadline = MatchingDeadline(budget=1, start_time=time.perf_counter() - 2)
+    assert deadline.is_expired
+    assert deadline.remaining == 0
+    assert not deadline.is_cancelled
+
+
+@pytest.fixture(name="redis_db")
+def redis_db_fixture():
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture(name="matcher")
+def matcher_fixture(redis_db):
+    answer_simulation_id_request(redis_db, SIMULATION_ID)
+    matcher = _Matcher(redis_db=redis_db)
+    matcher.wait_until_ready(timeout=TIMEOUT_SECONDS)
+    yield matcher
+    matcher.pubsub_thread.stop()
+    matcher.event_dispatcher.shutdown()
+
+
+@pytest.fixture(name="recommendations_pubsub")
+def recommendations_pubsub_fixture(redis_db):
+    pubsub = redis_db.pubsub()
+    pubsub.subscribe(MatchingEngineChannels(SIMULATION_ID).recommendations)
+    assert pubsub.get_message(timeout=TIMEOUT_SECONDS)["type"] == "subscribe"
+    yield pubsub
+    pubsub.close()
+
+
+def _get_submissions_count(pubsub) -> int:
+    count = 0
+    while pubsub.get_message(timeout=0.1) is not None:
+        count += 1
+    return count
+
+
+def test_the_matching_has_no_deadline_without_a_budget(matcher, recommendations_pubsub):
+    matcher._on_offers_bids_response({"bids_offers": {}})
+
+    assert matcher.deadlines == [None]
+    assert _get_submissions_count(recommendations_pubsub) == 1
+    assert matcher.deadline_misses == 0
+
+
+def test_the_matching_has_the_deadline_of_the_budget(matcher):
+    matcher.matching_deadline = 60
+    matcher._last_tick_received_at = time.perf_counter()
+
+    matcher._on_offers_bids_response({"bids_offers": {}})
+
+    assert isinstance(matcher.deadlines[0], MatchingDeadline)
+    assert matcher.deadlines[0].remaining > 0
+    assert matcher.deadline is None
+
+
+def test_responses_are_not_matched_after_the_deadline(matcher):
+    matcher.matching_deadline = 1
+    matcher._last_tick_received_at = time.perf_counter() - 2
+
+    matcher._on_offers_bids_response({"bids_offers": {}})
+
+    assert not matcher.deadlines
+    assert matcher.deadline_misses == 1
+
+
+@pytest.mark.parametrize("budget", [None, 60])
+def test_the_recommendations_of_an_ended_market_cycle_are_dropped(
+        matcher, recommendations_pubsub, budget):
+    matcher.matching_deadline = budget
+    matcher._last_tick_received_at = time.perf_counter()
+    matcher.ends_market_cycle = True
+
+    matcher._on_offers_bids_response({"bids_offers": {}})
+
+    assert _get_submissions_count(recommendations_pubsub) == 0
+    assert matcher.deadline_misses == 1
+    assert not matcher._is_matching_cancelled()
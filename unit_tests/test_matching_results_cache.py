@@ -0,0 +1,113 @@
+# pylint: disable=missing-function-docstring
+
+import pytest
+
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matchers.matching_results_cache import MatchingResultsCache
+from gsy_matching_engine_sdk.matching_algorithms import VectorizedPayAsClearMatchingAlgorithm
+from unit_tests.factories import create_bid, create_offer, get_trades
+
+TIME_SLOTS = ("2022-03-15T00:00", "2022-03-15T00:15")
+
+
+class _CountingAlgorithm:
+    """Pay-as-clear algorithm that keeps the partitions that it matched."""
+
+    def __init__(self):
+        self.matched_partitions = []
+
+    def get_matches_recommendations(self, matching_data, deadline=None):
+        self.matched_partitions.extend(
+            (market_id, time_slot) for market_id, time_slot_data in matching_data.items()
+            for time_slot in time_slot_data)
+        return VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations(
+            matching_data, deadline=deadline)
+
+
+def _create_matching_data(markets_count: int = 1, bid_rate: float = 30) -> dict:
+    return {f"market-{market_index}": {time_slot: {
+        "bids": [create_bid(f"bid-{market_index}-{time_slot}", 2, bid_rate)],
+        "offers": [create_offer(f"offer-{market_index}-{time_slot}", 1, 20)]}
+        for time_slot in TIME_SLOTS} for market_index in range(markets_count)}
+
+
+@pytest.fixture(name="algorithm")
+def algorithm_fixture():
+    return _CountingAlgorithm()
+
+
+@pytest.fixture(name="cache")
+def cache_fixture(algorithm):
+    return MatchingResultsCache(algorithm)
+
+
+def test_unchanged_partitions_reuse_their_recommendations(cache, algorithm):
+    first_recommendations = cache.get_matches_recommendations(_create_matching_data())
+    algorithm.matched_partitions.clear()
+
+    recommendations = cache.get_matches_recommendations(_create_matching_data())
+
+    assert not algorithm.matched_partitions
+    assert get_trades(recommendations) == get_trades(first_recommendations)
+    assert len(recommendations) == 2
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+@pytest.mark.parametrize("field, value", [("energy", 1.5), ("energy_rate", 25)])
+def test_partitions_are_matched_again_once_an_order_changes(cache, algorithm, field, value):
+    cache.get_matches_recommendations(_create_matching_data())
+    algorithm.matched_partitions.clear()
+    matching_data = _create_matching_data()
+    matching_data["market-0"][TIME_SLOTS[1]]["bids"][0][field] = value
+
+    recommendations = cache.get_matches_recommendations(matching_data)
+
+    assert algorithm.matched_partitions == [("market-0", TIME_SLOTS[1])]
+    assert len(recommendations) == 2
+
+
+def test_rejected_recommendations_are_not_submitted_again(cache):
+    recommendations = cache.get_matches_recommendations(_create_matching_data())
+    rejected_recommendation = dict(recommendations[0], status="fail")
+    cache.register_recommendations_response({"recommendations": [
+        rejected_recommendation, dict(recommendations[1], status="success")]})
+
+    assert get_trades(cache.get_matches_recommendations(_create_matching_data())) == (
+        get_trades(recommendations[1:]))
+    # Once the bid changes, the recommendation of its partition is a new one
+    matching_data = _create_matching_data(bid_rate=35)
+    assert len(cache.get_matches_recommendations(matching_data)) == 2
+
+
+def test_results_are_not_cached_after_an_expired_deadline(cache, algorithm):
+    deadline = MatchingDeadline()
+    deadline.cancel()
+    assert not cache.get_matches_recommendations(_create_matching_data(), deadline=deadline)
+    algorithm.matched_partitions.clear()
+
+    recommendations = cache.get_matches_recommendations(_create_matching_data())
+
+    assert len(algorithm.matched_partitions) == 2
+    assert len(recommendations) == 2
+
+
+def test_the_least_recently_used_partitions_are_evicted(algorithm):
+    cache = MatchingResultsCache(algorithm, max_cached_partitions=2)
+    cache.get_matches_recommendations(_create_matching_data(markets_count=2))
+    algorithm.matched_partitions.clear()
+
+    cache.get_matches_recommendations(_create_matching_data(markets_count=2))
+
+    # Only the partitions of market-1 were kept, the ones of market-0 are matched again
+    assert algorithm.matched_partitions == [
+        ("market-0", TIME_SLOTS[0]), ("market-0", TIME_SLOTS[1])]
+
+
+def test_clear_forgets_the_cached_results(cache, algorithm):
+    cache.get_matches_recommendations(_create_matching_data())
+    cache.clear()
+    algorithm.matched_partitions.clear()
+
+    cache.get_matches_recommendations(_create_matching_data())
+
+    assert len(algorithm.matched_partitions) == 2
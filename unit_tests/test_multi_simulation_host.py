@@ -0,0 +1,145 @@
+# pylint: disable=missing-function-docstring
+
+import json
+import logging
+import time
+
+import fakeredis
+import pytest
+from gsy_framework.redis_channels import MatchingEngineChannels
+
+from gsy_matching_engine_sdk.matchers import multi_simulation_host
+from gsy_matching_engine_sdk.matchers.multi_simulation_host import (
+    DISCOVER_SIMULATIONS, MultiSimulationRedisHost)
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+
+TIMEOUT_SECONDS = 5
+
+
+class _Matcher(RedisBaseMatcher):
+    """Matcher that keeps the numbers of the handled ticks."""
+
+    def __init__(self, *args, **kwargs):
+        self.ticks = []
+        super().__init__(*args, **kwargs)
+
+    def on_tick(self, data):
+        self.ticks.append(data["number"])
+
+
+def _wait_for(condition) -> bool:
+    end_time = time.monotonic() + TIMEOUT_SECONDS
+    while not condition():
+        if time.monotonic() > end_time:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture(name="redis_db")
+def redis_db_fixture(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(multi_simulation_host.Redis, "from_url",
+                        lambda url: fakeredis.FakeRedis(server=server))
+    return fakeredis.FakeRedis(server=server)
+
+
+@pytest.fixture(name="create_host")
+def create_host_fixture():
+    hosts = []
+
+    def create_host(simulation_ids, **kwargs):
+        host = MultiSimulationRedisHost(_Matcher, simulation_ids, **kwargs)
+        hosts.append(host)
+        return host
+
+    yield create_host
+    for host in hosts:
+        host.shutdown()
+
+
+def _publish_event(redis_db, simulation_id, event):
+    redis_db.publish(MatchingEngineChannels(simulation_id).events, json.dumps(event))
+
+
+def _publish_tick(redis_db, simulation_id, number):
+    _publish_event(redis_db, simulation_id,
+                   {"event": "tick", "markets_info": {}, "number": number})
+
+
+def test_messages_are_routed_to_the_matcher_of_their_simulation(redis_db, create_host):
+    host = create_host(["simulation-a", "simulation-b"])
+    _publish_tick(redis_db, "simulation-a", 1)
+    _publish_tick(redis_db, "simulation-b", 2)
+    _publish_tick(redis_db, "simulation-a", 3)
+
+    assert _wait_for(lambda: len(host.matchers["simulation-a"].ticks) == 2)
+    assert _wait_for(lambda: len(host.matchers["simulation-b"].ticks) == 1)
+    assert host.matchers["simulation-a"].ticks == [1, 3]
+    assert host.matchers["simulation-b"].ticks == [2]
+
+
+def test_messages_of_unknown_simulations_are_ignored(redis_db, create_host):
+    host = create_host(["simulation-a"])
+    _publish_tick(redis_db, "simulation-b", 1)
+    _publish_tick(redis_db, "simulation-a", 2)
+
+    assert _wait_for(lambda: host.matchers["simulation-a"].ticks == [2])
+    assert set(host.matchers) == {"simulation-a"}
+
+
+def test_the_simulations_are_discovered_from_their_events(redis_db, create_host):
+    host = create_host([DISCOVER_SIMULATIONS])
+    assert not host.matchers
+    _publish_tick(redis_db, "simulation-a", 1)
+
+    assert _wait_for(lambda: "simulation-a" in host.matchers)
+    # The event that revealed the simulation is handled by its new matcher
+    assert _wait_for(lambda: host.matchers["simulation-a"].ticks == [1])
+    assert not host.wait_until_finished(timeout=0.1)
+
+
+def test_the_host_finishes_with_its_simulations(redis_db, create_host):
+    host = create_host(["simulation-a", "simulation-b"])
+    _publish_event(redis_db, "simulation-a", {"event": "finish"})
+
+    assert _wait_for(lambda: set(host.matchers) == {"simulation-b"})
+    assert not host.wait_until_finished(timeout=0.1)
+    _publish_event(redis_db, "simulation-b", {"event": "finish"})
+    assert host.wait_until_finished(timeout=TIMEOUT_SECONDS)
+
+
+def test_late_messages_of_finished_simulations_are_ignored(redis_db, create_host):
+    host = create_host([DISCOVER_SIMULATIONS, "simulation-a"])
+    _publish_event(redis_db, "simulation-a", {"event": "finish"})
+    assert _wait_for(lambda: not host.matchers)
+
+    _publish_tick(redis_db, "simulation-a", 1)
+    _publish_tick(redis_db, "simulation-b", 2)
+
+    assert _wait_for(lambda: "simulation-b" in host.matchers)
+    assert set(host.matchers) == {"simulation-b"}
+
+
+@pytest.mark.usefixtures("redis_db")
+def test_only_the_latest_finished_simulations_are_remembered(create_host, monkeypatch):
+    monkeypatch.setattr(multi_simulation_host, "MAX_FINISHED_SIMULATIONS", 2)
+    host = create_host([DISCOVER_SIMULATIONS])
+    for simulation_id in ("simulation-a", "simulation-b", "simulation-c"):
+        host.add_simulation(simulation_id)
+        host.remove_simulation(simulation_id)
+
+    host.add_simulation("simulation-a")
+    host.add_simulation("simulation-c")
+
+    # simulation-a is forgotten, therefore it can be started again
+    assert set(host.matchers) == {"simulation-a"}
+
+
+@pytest.mark.usefixtures("redis_db")
+def test_the_metrics_options_of_the_matchers_are_ignored_with_a_warning(create_host, caplog):
+    with caplog.at_level(logging.WARNING, logger=multi_simulation_host.__name__):
+        host = create_host(["simulation-a"], matcher_kwargs={"metrics_port": 9100})
+
+    assert host.matchers["simulation-a"].metrics is host.metrics
+    assert "metrics_port and stats_log_interval" in caplog.text
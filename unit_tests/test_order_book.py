@@ -0,0 +1,119 @@
+# pylint: disable=missing-function-docstring
+
+import pytest
+
+from gsy_matching_engine_sdk.matchers.order_book import OrderBook
+
+MARKET_ID = "market-1"
+TIME_SLOT = "2022-03-15T00:00"
+NEXT_TIME_SLOT = "2022-03-15T00:15"
+
+
+def _create_order(order_id: str, order_type: str, energy: float = 1.,
+                  energy_rate: float = 20.) -> dict:
+    return {"id": order_id, "type": order_type, "energy": energy, "energy_rate": energy_rate}
+
+
+def _create_bids_offers(bids=(), offers=(), time_slot: str = TIME_SLOT) -> dict:
+    return {MARKET_ID: {time_slot: {"bids": list(bids), "offers": list(offers)}}}
+
+
+@pytest.fixture(name="order_book")
+def order_book_fixture():
+    order_book = OrderBook()
+    order_book.apply_snapshot(_create_bids_offers(
+        bids=[_create_order("bid-1", "Bid"), _create_order("bid-2", "Bid")],
+        offers=[_create_order("offer-1", "Offer")]))
+    return order_book
+
+
+def test_apply_snapshot_returns_the_diffs_of_the_changed_partitions(order_book):
+    updated_bid = _create_order("bid-1", "Bid", energy=0.5)
+    new_offer = _create_order("offer-2", "Offer")
+    diffs = order_book.apply_snapshot(_create_bids_offers(
+        bids=[updated_bid], offers=[_create_order("offer-1", "Offer"), new_offer]))
+
+    bids_diff = diffs[(MARKET_ID, TIME_SLOT)]["bids"]
+    offers_diff = diffs[(MARKET_ID, TIME_SLOT)]["offers"]
+    assert bids_diff.traded == [updated_bid]
+    assert [order["id"] for order in bids_diff.removed] == ["bid-2"]
+    assert not bids_diff.added
+    assert offers_diff.added == [new_offer]
+    assert not offers_diff.removed and not offers_diff.traded
+    assert len(order_book) == 3
+
+
+def test_apply_snapshot_without_changes_returns_no_diffs(order_book):
+    diffs = order_book.apply_snapshot(_create_bids_offers(
+        bids=[_create_order("bid-2", "Bid"), _create_order("bid-1", "Bid")],
+        offers=[_create_order("offer-1", "Offer")]))
+
+    assert not diffs
+    assert not order_book.changed_matching_data
+    assert order_book.get_matching_data()[MARKET_ID][TIME_SLOT]
+
+
+def test_apply_snapshot_removes_the_time_slots_missing_from_the_snapshot(order_book):
+    diffs = order_book.apply_snapshot(_create_bids_offers(
+        bids=[_create_order("bid-3", "Bid")], time_slot=NEXT_TIME_SLOT))
+
+    assert [order["id"] for order in diffs[(MARKET_ID, TIME_SLOT)]["bids"].removed] == [
+        "bid-1", "bid-2"]
+    assert order_book.get_partition(MARKET_ID, TIME_SLOT) is None
+    assert list(order_book.changed_matching_data[MARKET_ID]) == [NEXT_TIME_SLOT]
+
+
+def test_apply_snapshot_leaves_the_markets_missing_from_the_snapshot_untouched(order_book):
+    order_book.apply_snapshot({"market-2": {TIME_SLOT: {
+        "bids": [_create_order("bid-3", "Bid")], "offers": []}}})
+
+    assert order_book.get_partition(MARKET_ID, TIME_SLOT) is not None
+    assert list(order_book.changed_matching_data) == ["market-2"]
+
+
+def test_get_matching_data_sorts_the_orders_by_energy_rate():
+    order_book = OrderBook()
+    order_book.apply_snapshot(_create_bids_offers(
+        bids=[_create_order("bid-1", "Bid", energy_rate=10),
+              _create_order("bid-2", "Bid", energy_rate=30)],
+        offers=[_create_order("offer-1", "Offer", energy_rate=25),
+                _create_order("offer-2", "Offer", energy_rate=15)]))
+
+    data = order_book.get_matching_data()[MARKET_ID][TIME_SLOT]
+    assert [order["id"] for order in data["bids"]] == ["bid-2", "bid-1"]
+    assert [order["id"] for order in data["offers"]] == ["offer-2", "offer-1"]
+
+
+def test_apply_diff_updates_one_partition(order_book):
+    order_book.apply_diff(
+        MARKET_ID, TIME_SLOT, added=[_create_order("offer-2", "Offer")],
+        removed_ids=["bid-2"], traded=[_create_order("bid-1", "Bid", energy=0.2)])
+
+    data = order_book.changed_matching_data[MARKET_ID][TIME_SLOT]
+    assert [(order["id"], order["energy"]) for order in data["bids"]] == [("bid-1", 0.2)]
+    assert {order["id"] for order in data["offers"]} == {"offer-1", "offer-2"}
+
+
+def test_apply_diff_removes_the_emptied_partition(order_book):
+    order_book.apply_diff(MARKET_ID, TIME_SLOT, removed_ids=["bid-1", "bid-2", "offer-1"])
+
+    assert order_book.get_partition(MARKET_ID, TIME_SLOT) is None
+    assert len(order_book) == 0
+
+
+@pytest.mark.parametrize("markets_info", [
+    {MARKET_ID: {"type_name": "Spot Market", "time_slots": {NEXT_TIME_SLOT}}},
+    {"market-2": {"type_name": "Spot Market", "time_slots": {TIME_SLOT}}},
+])
+def test_retain_time_slots_drops_the_closed_partitions(order_book, markets_info):
+    order_book.retain_time_slots(markets_info)
+
+    assert len(order_book) == 0
+    assert not order_book.get_matching_data()
+
+
+def test_retain_time_slots_keeps_the_open_partitions(order_book):
+    order_book.retain_time_slots(
+        {MARKET_ID: {"type_name": "Spot Market", "time_slots": {TIME_SLOT}}})
+
+    assert len(order_book) == 3
@@ -0,0 +1,90 @@
+# pylint: disable=missing-function-docstring
+
+import random
+
+import pytest
+
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matchers.parallel_matching_runner import ParallelMatchingRunner
+from gsy_matching_engine_sdk.matching_algorithms import VectorizedPayAsClearMatchingAlgorithm
+from unit_tests.factories import create_bid, create_offer
+
+TIME_SLOTS = ("2022-03-15T00:15", "2022-03-15T00:00")
+
+
+def _create_matching_data(markets_count: int) -> dict:
+    rng = random.Random(markets_count)
+    return {f"market-{market_index}": {time_slot: {
+        "bids": [create_bid(f"bid-{market_index}-{time_slot}-{index}", rng.randint(1, 5),
+                            rng.randint(10, 30)) for index in range(5)],
+        "offers": [create_offer(f"offer-{market_index}-{time_slot}-{index}",
+                                rng.randint(1, 5), rng.randint(10, 30)) for index in range(5)]}
+        for time_slot in TIME_SLOTS}
+        for market_index in range(markets_count)}
+
+
+def _get_trades(recommendations):
+    return [(recommendation["market_id"], recommendation["time_slot"],
+             recommendation["bid"]["id"], recommendation["offer"]["id"],
+             recommendation["selected_energy"], recommendation["trade_rate"])
+            for recommendation in recommendations]
+
+
+def _get_serial_trades(matching_data):
+    return _get_trades(VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations(
+        matching_data))
+
+
+@pytest.fixture(name="runner", params=[1, 2], ids=["in_thread", "pool"])
+def runner_fixture(request):
+    runner = ParallelMatchingRunner(VectorizedPayAsClearMatchingAlgorithm,
+                                    max_workers=request.param)
+    yield runner
+    runner.shutdown()
+
+
+def test_recommendations_are_the_ones_of_the_serial_algorithm_in_payload_order(runner):
+    matching_data = _create_matching_data(markets_count=3)
+
+    trades = _get_trades(runner.get_matches_recommendations(matching_data))
+
+    assert trades
+    assert trades == _get_serial_trades(matching_data)
+    assert len(runner.last_shard_timings) == 6
+
+
+def test_partitions_without_bids_or_offers_are_skipped(runner):
+    matching_data = _create_matching_data(markets_count=2)
+    matching_data["market-0"][TIME_SLOTS[0]]["offers"] = []
+
+    runner.get_matches_recommendations(matching_data)
+
+    assert len(runner.last_shard_timings) == 3
+
+
+def test_shards_are_dropped_once_the_deadline_expires(runner):
+    deadline = MatchingDeadline()
+    deadline.cancel()
+
+    assert not runner.get_matches_recommendations(_create_matching_data(markets_count=3),
+                                                  deadline=deadline)
+    assert not runner.last_shard_timings
+
+
+def test_every_shard_is_matched_before_a_distant_deadline(runner):
+    matching_data = _create_matching_data(markets_count=3)
+
+    trades = _get_trades(runner.get_matches_recommendations(
+        matching_data, deadline=MatchingDeadline(budget=60)))
+
+    assert sorted(trades) == sorted(_get_serial_trades(matching_data))
+
+
+def test_iter_matches_recommendations_yields_each_shard(runner):
+    matching_data = _create_matching_data(markets_count=3)
+
+    batches = list(runner.iter_matches_recommendations(matching_data))
+
+    assert len(batches) == 6
+    assert sorted(trade for batch in batches for trade in _get_trades(batch)) == sorted(
+        _get_serial_trades(matching_data))
@@ -0,0 +1,37 @@
+# pylint: disable=missing-function-docstring
+
+from gsy_matching_engine_sdk.matchers.matching_deadline import MatchingDeadline
+from gsy_matching_engine_sdk.matching_algorithms import VectorizedPayAsClearMatchingAlgorithm
+from unit_tests.factories import (
+    MARKET_ID, TIME_SLOT, create_bid, create_matching_data, create_offer, get_trades)
+
+
+def test_trades_are_cleared_at_the_rate_of_the_marginal_offer():
+    matching_data = create_matching_data(
+        bids=[create_bid("bid-1", 5, 30), create_bid("bid-2", 5, 15)],
+        offers=[create_offer("offer-2", 4, 20), create_offer("offer-1", 3, 10)])
+
+    recommendations = VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations(
+        matching_data)
+
+    assert sorted(get_trades(recommendations)) == [
+        ("bid-1", "offer-1", 3, 20), ("bid-1", "offer-2", 2, 20)]
+    assert {(recommendation["market_id"], recommendation["time_slot"])
+            for recommendation in recommendations} == {(MARKET_ID, TIME_SLOT)}
+
+
+def test_orders_whose_rates_do_not_cross_are_not_matched():
+    matching_data = create_matching_data(
+        bids=[create_bid("bid", 5, 10)], offers=[create_offer("offer", 5, 20)])
+
+    assert not VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations(matching_data)
+
+
+def test_nothing_is_matched_after_the_deadline():
+    deadline = MatchingDeadline()
+    deadline.cancel()
+    matching_data = create_matching_data(
+        bids=[create_bid("bid", 5, 30)], offers=[create_offer("offer", 5, 20)])
+
+    assert not VectorizedPayAsClearMatchingAlgorithm.get_matches_recommendations(
+        matching_data, deadline=deadline)
@@ -0,0 +1,62 @@
+# pylint: disable=missing-function-docstring
+
+import pytest
+
+from gsy_matching_engine_sdk.matchers.recommendations_batches import split_recommendations
+from gsy_matching_engine_sdk.serializers import SERIALIZERS, get_serializer
+
+
+def _create_recommendations(count: int):
+    return [{"market_id": "market", "time_slot": "2022-03-15T00:00", "selected_energy": 1.,
+             "trade_rate": 20., "bid": {"id": f"bid-{index}"}, "offer": {"id": f"offer-{index}"}}
+            for index in range(count)]
+
+
+@pytest.fixture(name="serializer", params=list(SERIALIZERS))
+def serializer_fixture(request):
+    return get_serializer(request.param)
+
+
+def test_split_recommendations_bounds_the_count_of_the_batches(serializer):
+    recommendations = _create_recommendations(10)
+    batches = split_recommendations(recommendations, serializer, max_batch_recommendations=4)
+
+    assert [len(batch.recommendations) for batch in batches] == [4, 4, 2]
+    assert [recommendation for batch in batches
+            for recommendation in batch.recommendations] == recommendations
+
+
+def test_split_recommendations_bounds_the_size_of_the_batches(serializer):
+    recommendations = _create_recommendations(20)
+    recommendation_size = len(serializer.dumps(recommendations[0]))
+    max_batch_bytes = 5 * recommendation_size
+    batches = split_recommendations(recommendations, serializer, max_batch_bytes=max_batch_bytes)
+
+    assert len(batches) > 1
+    for batch in batches:
+        assert len(batch.payload) <= max_batch_bytes
+    assert sum(len(batch.recommendations) for batch in batches) == 20
+
+
+def test_split_recommendations_encodes_the_payload_of_each_batch(serializer):
+    batches = split_recommendations(
+        _create_recommendations(5), serializer, max_batch_recommendations=2)
+
+    for batch in batches:
+        assert serializer.loads(batch.payload) == batch.data
+
+
+def test_split_recommendations_sends_an_oversized_recommendation_alone(serializer):
+    recommendations = _create_recommendations(3)
+    recommendations[1]["bid"]["padding"] = "x" * 1000
+    batches = split_recommendations(recommendations, serializer, max_batch_bytes=500)
+
+    assert [batch.recommendations for batch in batches] == [[recommendation]
+                                                            for recommendation in recommendations]
+
+
+def test_split_recommendations_of_no_recommendations_is_one_empty_batch(serializer):
+    batches = split_recommendations([], serializer)
+
+    assert len(batches) == 1
+    assert serializer.loads(batches[0].payload) == {"recommended_matches": []}
@@ -0,0 +1,105 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import fakeredis
+import pytest
+from gsy_framework.redis_channels import MatchingEngineChannels
+
+from gsy_matching_engine_sdk.matchers.recommendations_stream import (
+    RecommendationsStreamBuffer, iter_partitions)
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+from unit_tests.fake_simulation import answer_simulation_id_request
+
+SIMULATION_ID = "simulation"
+TIME_SLOTS = ("2022-03-15T00:15", "2022-03-15T00:00")
+MAX_BATCH_RECOMMENDATIONS = 3
+PARTITION_RECOMMENDATIONS = 5
+TIMEOUT_SECONDS = 10
+
+
+def _create_recommendation(market_id, time_slot, index):
+    return {"market_id": market_id, "time_slot": time_slot, "selected_energy": 1.,
+            "trade_rate": 20., "bid": {"id": f"bid-{market_id}-{time_slot}-{index}"},
+            "offer": {"id": f"offer-{market_id}-{time_slot}-{index}"},
+            "matching_requirements": None}
+
+
+def _create_bids_offers(markets_count: int = 2):
+    return {f"market-{market_index}": {time_slot: {"bids": [], "offers": []}
+                                       for time_slot in TIME_SLOTS}
+            for market_index in range(markets_count)}
+
+
+class _StreamingMatcher(RedisBaseMatcher):
+    """Matcher that yields the recommendations of each market / time slot partition."""
+
+    max_batch_recommendations = MAX_BATCH_RECOMMENDATIONS
+
+    def iter_recommendations(self, data):
+        for market_id, time_slot, _ in iter_partitions(data["bids_offers"]):
+            yield [_create_recommendation(market_id, time_slot, index)
+                   for index in range(PARTITION_RECOMMENDATIONS)]
+
+
+def test_iter_partitions_yields_the_nearest_time_slots_first():
+    bids_offers = _create_bids_offers()
+
+    partitions = [(market_id, time_slot)
+                  for market_id, time_slot, _ in iter_partitions(bids_offers)]
+
+    assert partitions == [("market-0", TIME_SLOTS[1]), ("market-1", TIME_SLOTS[1]),
+                          ("market-0", TIME_SLOTS[0]), ("market-1", TIME_SLOTS[0])]
+
+
+def test_the_first_recommendations_are_submitted_immediately():
+    stream_buffer = RecommendationsStreamBuffer(max_batch_recommendations=3, flush_interval=60)
+
+    assert stream_buffer.add([]) is None
+    assert stream_buffer.add([1]) == [1]
+    # Later ones wait to fill a batch
+    assert stream_buffer.add([2]) is None
+    assert stream_buffer.add([3, 4]) == [2, 3, 4]
+    assert stream_buffer.add([5]) is None
+    assert stream_buffer.flush() == [5]
+    assert not stream_buffer.flush()
+
+
+def test_the_recommendations_are_submitted_after_the_flush_interval():
+    stream_buffer = RecommendationsStreamBuffer(max_batch_recommendations=3, flush_interval=0)
+
+    assert stream_buffer.add([1]) == [1]
+    assert stream_buffer.add([2]) == [2]
+
+
+@pytest.fixture(name="redis_db")
+def redis_db_fixture():
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture(name="matcher")
+def matcher_fixture(redis_db):
+    answer_simulation_id_request(redis_db, SIMULATION_ID)
+    matcher = _StreamingMatcher(redis_db=redis_db)
+    matcher.wait_until_ready(timeout=TIMEOUT_SECONDS)
+    yield matcher
+    matcher.pubsub_thread.stop()
+    matcher.event_dispatcher.shutdown()
+
+
+def test_the_streamed_recommendations_are_submitted_in_bounded_batches(redis_db, matcher):
+    pubsub = redis_db.pubsub()
+    pubsub.subscribe(MatchingEngineChannels(SIMULATION_ID).recommendations)
+    assert pubsub.get_message(timeout=TIMEOUT_SECONDS)["type"] == "subscribe"
+    bids_offers = _create_bids_offers()
+
+    matcher._on_offers_bids_response({"bids_offers": bids_offers})
+
+    batches = []
+    while (message := pubsub.get_message(timeout=0.1)) is not None:
+        batches.append(matcher.serializer.loads(message["data"])["recommended_matches"])
+    pubsub.close()
+    assert len(batches) > 1
+    assert all(len(batch) <= MAX_BATCH_RECOMMENDATIONS for batch in batches)
+    assert [recommendation for batch in batches for recommendation in batch] == [
+        _create_recommendation(market_id, time_slot, index)
+        for market_id, time_slot, _ in iter_partitions(bids_offers)
+        for index in range(PARTITION_RECOMMENDATIONS)]
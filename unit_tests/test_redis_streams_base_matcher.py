@@ -0,0 +1,118 @@
+# pylint: disable=missing-function-docstring
+
+import json
+import time
+
+import fakeredis
+import pytest
+from gsy_framework.redis_channels import MatchingEngineChannels
+
+from gsy_matching_engine_sdk.matchers.redis_streams_base_matcher import RedisStreamsBaseMatcher
+from unit_tests.fake_simulation import answer_simulation_id_request
+
+SIMULATION_ID = "simulation"
+STREAM = MatchingEngineChannels(SIMULATION_ID).events
+CONSUMER_GROUP = "matchers"
+TIMEOUT_SECONDS = 10
+
+
+class _StreamsMatcher(RedisStreamsBaseMatcher):
+    """Matcher that keeps the sequence numbers of the handled events."""
+
+    def __init__(self, *args, **kwargs):
+        self.handled_numbers = []
+        super().__init__(*args, **kwargs)
+
+    def on_matched_recommendations_response(self, data):
+        self.handled_numbers.append(data["number"])
+
+
+def _wait_for(condition) -> bool:
+    end_time = time.monotonic() + TIMEOUT_SECONDS
+    while not condition():
+        if time.monotonic() > end_time:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _add_events(redis_db, numbers):
+    for number in numbers:
+        redis_db.xadd(STREAM, {"data": json.dumps(
+            {"event": "match", "recommendations": [], "status": "success", "number": number})})
+
+
+@pytest.fixture(name="server")
+def server_fixture():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture(name="redis_db")
+def redis_db_fixture(server):
+    return fakeredis.FakeRedis(server=server)
+
+
+@pytest.fixture(name="start_matcher")
+def start_matcher_fixture(server, redis_db):
+    matchers = []
+
+    def start_matcher(**kwargs):
+        answer_simulation_id_request(redis_db, SIMULATION_ID)
+        matcher = _StreamsMatcher(redis_db=fakeredis.FakeRedis(server=server),
+                                  consumer_group=CONSUMER_GROUP, **kwargs)
+        matchers.append(matcher)
+        assert matcher.wait_until_ready(timeout=TIMEOUT_SECONDS)
+        return matcher
+
+    yield start_matcher
+    for matcher in matchers:
+        matcher.stop_reading(TIMEOUT_SECONDS)
+        matcher.pubsub_thread.stop()
+        matcher.event_dispatcher.shutdown(wait=False)
+
+
+def test_every_event_is_handled_in_order(redis_db, start_matcher):
+    _add_events(redis_db, range(20))  # Appended before the matcher starts
+    matcher = start_matcher(consumer_name="consumer", batch_size=4, max_read_ahead=8)
+    _add_events(redis_db, range(20, 100))
+
+    assert _wait_for(lambda: len(matcher.handled_numbers) == 100)
+    assert matcher.handled_numbers == list(range(100))
+    assert redis_db.xpending(STREAM, CONSUMER_GROUP)["pending"] == 0
+
+
+def test_pending_entries_are_handled_after_a_restart(redis_db, start_matcher):
+    _add_events(redis_db, range(5))
+    redis_db.xgroup_create(STREAM, CONSUMER_GROUP, id="0")
+    # The matcher read these entries, then stopped before acknowledging them
+    redis_db.xreadgroup(CONSUMER_GROUP, "consumer", {STREAM: ">"}, count=3)
+    assert redis_db.xpending(STREAM, CONSUMER_GROUP)["pending"] == 3
+
+    matcher = start_matcher(consumer_name="consumer")
+
+    assert _wait_for(lambda: len(matcher.handled_numbers) == 5)
+    assert matcher.handled_numbers == list(range(5))
+    assert redis_db.xpending(STREAM, CONSUMER_GROUP)["pending"] == 0
+
+
+def test_acknowledged_entries_are_trimmed(redis_db, start_matcher):
+    matcher = start_matcher(consumer_name="consumer", trim_interval=0.05)
+    _add_events(redis_db, range(10))
+
+    assert _wait_for(lambda: len(matcher.handled_numbers) == 10)
+    assert _wait_for(lambda: redis_db.xlen(STREAM) == 0)
+
+
+def test_entries_pending_in_another_group_are_not_trimmed(redis_db, start_matcher):
+    _add_events(redis_db, range(10))
+    redis_db.xgroup_create(STREAM, "other-matchers", id="0")
+    redis_db.xreadgroup("other-matchers", "other-consumer", {STREAM: ">"}, count=4)
+    redis_db.xack(STREAM, "other-matchers", *[entry_id for entry_id, _ in redis_db.xrange(
+        STREAM, count=2)])
+    matcher = start_matcher(consumer_name="consumer", trim_interval=0.05)
+
+    assert _wait_for(lambda: len(matcher.handled_numbers) == 10)
+    # The first two entries are acknowledged by both groups, the others are still needed
+    assert _wait_for(lambda: redis_db.xlen(STREAM) == 8)
+    time.sleep(0.2)
+    assert redis_db.xlen(STREAM) == 8
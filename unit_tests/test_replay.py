@@ -0,0 +1,89 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import json
+
+import fakeredis
+import pytest
+
+from gsy_matching_engine_sdk.matchers.redis_base_matcher import RedisBaseMatcher
+from gsy_matching_engine_sdk.recorder import INBOUND, OUTBOUND, EventRecorder, read_recording
+from gsy_matching_engine_sdk.replay import ReplayDriver
+from unit_tests.factories import (
+    MARKET_ID, TIME_SLOT, create_bid, create_matching_data, create_offer)
+from unit_tests.fake_simulation import answer_simulation_id_request
+
+TICKS_COUNT = 3
+TIMEOUT_SECONDS = 10
+
+
+class _Matcher(RedisBaseMatcher):
+    """Matcher that requests the orders on every tick and submits one recommendation."""
+
+    def on_tick(self, data):
+        self.request_offers_bids(filters={})
+
+    def on_offers_bids_response(self, data):
+        bids_offers = data["bids_offers"][MARKET_ID][TIME_SLOT]
+        self.submit_matches([{
+            "market_id": MARKET_ID, "time_slot": TIME_SLOT, "bid": bids_offers["bids"][0],
+            "offer": bids_offers["offers"][0], "selected_energy": 1, "trade_rate": 30,
+            "matching_requirements": None}])
+
+
+def _get_events():
+    markets_info = {MARKET_ID: {"type_name": "Spot Market", "time_slots": [TIME_SLOT]}}
+    bids_offers = create_matching_data(
+        bids=[create_bid("bid", 1, 30)], offers=[create_offer("offer", 1, 20)])
+    for _ in range(TICKS_COUNT):
+        yield {"event": "tick", "markets_info": markets_info}
+        yield {"event": "offers_bids_response", "bids_offers": bids_offers}
+    yield {"event": "finish"}
+
+
+@pytest.fixture(name="recording_path")
+def recording_path_fixture(tmp_path):
+    """Record a session of a matcher, whose events are sent as if they came from Redis."""
+    path = str(tmp_path / "session.jsonl.gz")
+    redis_db = fakeredis.FakeRedis()
+    answer_simulation_id_request(redis_db, "simulation")
+    matcher = _Matcher(redis_db=redis_db, record_path=path)
+    matcher.wait_until_ready(timeout=TIMEOUT_SECONDS)
+    for event in _get_events():
+        matcher._on_event_or_response({"data": json.dumps(event)})
+        assert matcher.event_dispatcher.wait_until_idle(TIMEOUT_SECONDS)
+    matcher.pubsub_thread.stop()
+    matcher.event_dispatcher.shutdown()
+    matcher.recorder.close()
+    return path
+
+
+def test_the_exchanged_messages_are_recorded(recording_path):
+    records = list(read_recording(recording_path))
+
+    assert [record["k"] for record in records if record["d"] == INBOUND] == [
+        event["event"] for event in _get_events()]
+    # The area map is requested once connected, then the orders and recommendations per tick
+    assert [record["k"] for record in records if record["d"] == OUTBOUND] == (
+        ["area_map"] + ["offers_bids", "recommendations"] * TICKS_COUNT)
+    assert records[1]["p"] == next(_get_events())
+
+
+def test_the_recording_is_replayed_offline(recording_path):
+    report = ReplayDriver(_Matcher, recording_path).run()
+
+    assert report.events_count == 2 * TICKS_COUNT + 1
+    # An offers/bids request and a recommendations submission per tick
+    assert report.sent_messages_count == 2 * TICKS_COUNT
+    assert len(report.tick_to_submit_latencies) == TICKS_COUNT
+    assert report.latency_percentile(50) > 0
+    assert report.events_per_second > 0
+
+
+def test_the_recorder_appends_to_an_existing_recording(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    for kind in ("tick", "finish"):
+        recorder = EventRecorder(path)
+        recorder.record(INBOUND, kind, {"event": kind})
+        recorder.close()
+
+    assert [record["k"] for record in read_recording(path)] == ["tick", "finish"]
@@ -0,0 +1,55 @@
+# pylint: disable=missing-function-docstring
+
+import json
+
+import pytest
+
+from gsy_matching_engine_sdk.serializers import (
+    SERIALIZERS, JSONSerializer, get_serializer, peek_event_type)
+
+
+@pytest.mark.parametrize("payload", [
+    '{"event": "tick", "markets_info": {}}',
+    '  {\n  "event" : "tick", "markets_info": {}}',
+    '{"markets_info": {"event": "market"}, "event": "tick"}',
+    '{"markets_info": {}, "event":"tick"}\n',
+])
+@pytest.mark.parametrize("encode", [str, str.encode])
+def test_peek_event_type_reads_the_first_or_last_key(payload, encode):
+    assert peek_event_type(encode(payload)) == "tick"
+
+
+@pytest.mark.parametrize("payload", [
+    '{"markets_info": {}, "event": "tick", "n": 1}',
+    '{"data": {"event": "tick"}, "n": 1}',
+    '{"event": "esc\\"aped"}',
+    "not json",
+    "",
+])
+def test_peek_event_type_returns_none_if_the_type_is_not_at_a_peeked_position(payload):
+    assert peek_event_type(payload) is None
+
+
+def test_peek_event_type_ignores_the_nested_events_far_from_the_end():
+    payload = json.dumps({"data": {"event": "nested"}, "padding": "x" * 300})
+    assert peek_event_type(payload) is None
+
+
+@pytest.mark.parametrize("name", SERIALIZERS)
+def test_serializers_roundtrip_the_payloads(name):
+    serializer = get_serializer(name)
+    data = {"event": "tick", "markets_info": {"market": {"time_slots": ["2022-03-15T00:00"]}},
+            "energy": 1.5}
+
+    assert serializer.loads(serializer.dumps(data)) == data
+    assert peek_event_type(serializer.dumps(data)) == "tick"
+
+
+def test_unknown_serializer_is_rejected():
+    with pytest.raises(ValueError):
+        get_serializer("unknown")
+
+
+def test_auto_serializer_selects_an_available_one():
+    assert get_serializer("auto").is_available()
+    assert isinstance(get_serializer("json"), JSONSerializer)
@@ -0,0 +1,33 @@
+"""Import time checks of the CLI, based on benchmarks/startup_time.py."""
+# pylint: disable=missing-function-docstring
+
+import statistics
+
+import pytest
+
+from benchmarks.startup_time import SCENARIOS, TRANSPORT_MODULES, _run_importtime
+
+# Budget of the import of the CLI, generous enough to leave room for slow CI runners
+MAX_CLI_IMPORT_MS = 1000
+RUNS = 3
+
+# Transport stacks that each scenario must not load
+UNEXPECTED_TRANSPORTS = {
+    "cli import": TRANSPORT_MODULES,
+    "cli --help": TRANSPORT_MODULES,
+    "redis setup": ("websockets", "aiohttp"),
+    "rest setup": ("redis", "aiohttp"),
+}
+
+
+def test_cli_import_time_is_within_budget():
+    code, env = SCENARIOS["cli import"]
+    totals = [sum(_run_importtime(code, env)[0].values()) / 1000 for _ in range(RUNS)]
+    assert statistics.median(totals) <= MAX_CLI_IMPORT_MS
+
+
+@pytest.mark.parametrize("scenario", UNEXPECTED_TRANSPORTS)
+def test_only_the_used_transport_is_imported(scenario):
+    code, env = SCENARIOS[scenario]
+    _, loaded_transports = _run_importtime(code, env)
+    assert not set(loaded_transports) & set(UNEXPECTED_TRANSPORTS[scenario])
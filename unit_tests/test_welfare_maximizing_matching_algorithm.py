@@ -0,0 +1,73 @@
+# pylint: disable=missing-function-docstring
+
+import pytest
+
+from gsy_matching_engine_sdk.matchers.columnar_order_book import ColumnarOrderBook
+from gsy_matching_engine_sdk.matching_algorithms import (
+    IndexedAttributedMatchingAlgorithm, WelfareMaximizingMatchingAlgorithm)
+from unit_tests.factories import (
+    create_bid, create_matching_data, create_offer, get_surplus, get_trades)
+
+
+def test_the_total_surplus_is_maximized():
+    # The greedy attributed matching trades offer-wind with bid-wind first, for a surplus of 33
+    matching_data = create_matching_data(
+        bids=[create_bid("bid", 2, 30),
+              create_bid("bid-wind", 1, 25, requirements=[{"energy_type": ["Wind"]}])],
+        offers=[create_offer("offer-wind", 1, 10, energy_type="Wind"),
+                create_offer("offer-pv", 1, 12, energy_type="PV")])
+
+    recommendations = WelfareMaximizingMatchingAlgorithm().get_matches_recommendations(
+        matching_data)
+
+    assert get_surplus(IndexedAttributedMatchingAlgorithm.get_matches_recommendations(
+        matching_data)) == pytest.approx(33)
+    assert get_surplus(recommendations) == pytest.approx(38)
+    assert sorted(get_trades(recommendations)) == [
+        ("bid", "offer-pv", 1, 30), ("bid", "offer-wind", 1, 30)]
+
+
+def test_requirements_are_satisfied():
+    matching_data = create_matching_data(
+        bids=[create_bid("bid", 1, 30, requirements=[{"trading_partners": ["seller-b"]}])],
+        offers=[create_offer("offer-a", 1, 10, seller_id="seller-a"),
+                create_offer("offer-b", 1, 20, seller_id="seller-b")])
+
+    recommendations = WelfareMaximizingMatchingAlgorithm().get_matches_recommendations(
+        matching_data)
+
+    assert get_trades(recommendations) == [("bid", "offer-b", 1, 30)]
+
+
+@pytest.mark.parametrize("warm_start", [True, False])
+def test_the_next_ticks_are_solved_like_the_first_one(warm_start):
+    algorithm = WelfareMaximizingMatchingAlgorithm(warm_start=warm_start)
+    bids = [create_bid(f"bid-{index}", 1 + index % 3, 20 + index) for index in range(6)]
+    offers = [create_offer(f"offer-{index}", 1 + index % 2, 15 + 2 * index)
+              for index in range(6)]
+    first_surplus = get_surplus(algorithm.get_matches_recommendations(
+        create_matching_data(bids, offers)))
+
+    offers[0] = create_offer("offer-new", 1, 18)
+    surplus = get_surplus(algorithm.get_matches_recommendations(
+        create_matching_data(bids, offers)))
+
+    assert first_surplus > 0
+    assert surplus == pytest.approx(get_surplus(
+        WelfareMaximizingMatchingAlgorithm(warm_start=False).get_matches_recommendations(
+            create_matching_data(bids, offers))))
+
+
+def test_the_columnar_order_book_is_matched_like_the_payload():
+    matching_data = create_matching_data(
+        bids=[create_bid("bid-1", 2, 30, requirements=[{"energy_type": ["Wind"]}]),
+              create_bid("bid-2", 2, 25)],
+        offers=[create_offer("offer-1", 1, 20, energy_type="PV"),
+                create_offer("offer-2", 2, 22, energy_type="Wind")])
+
+    trades = sorted(get_trades(WelfareMaximizingMatchingAlgorithm().get_matches_recommendations(
+        ColumnarOrderBook.from_bids_offers(matching_data))))
+
+    assert trades
+    assert trades == sorted(get_trades(
+        WelfareMaximizingMatchingAlgorithm().get_matches_recommendations(matching_data)))